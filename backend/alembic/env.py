@@ -3,6 +3,7 @@ import os
 from logging.config import fileConfig
 
 from alembic import context
+from sqlalchemy import text
 
 # make sure the app package is importable
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -11,7 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'a
 from app.core.database import engine, Base  # noqa: E402
 
 # Import all models so Alembic can detect them for autogenerate
-from app.models import user, canteen, menu_item, cart, order, complaints, payment  # noqa: E402, F401
+from app.models import user, canteen, menu_item, cart, order, complaints, payment, canteen_stats  # noqa: E402, F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -24,6 +25,9 @@ if config.config_file_name is not None:
 # add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Arbitrary, but fixed: the advisory lock that serialises concurrent `alembic upgrade` runs
+MIGRATION_LOCK_KEY = 7_264_310_001
+
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
@@ -34,6 +38,13 @@ def run_migrations_online() -> None:
     connectable = engine
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Every backend pod runs the migrations before it starts (see
+            # deployment/backend.yaml): hold a session lock so only one migrates
+            # at a time and the others find the schema already up to date.
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
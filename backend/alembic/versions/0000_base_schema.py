@@ -0,0 +1,270 @@
+"""base schema: the tables that existed before the first migration
+
+Revision ID: 0000_base_schema
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+
+Until now the base tables were created by `Base.metadata.create_all` at app
+startup, and the migrations only added to them. The app no longer creates
+tables, so this revision does, as they were before 0001. Databases that were
+created by create_all already have them: every table, index and type is
+created only if it is missing, and the later revisions skip what exists.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0000_base_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Stored by name, as SQLAlchemy does for Python enums (app.models.payment)
+PAYMENT_METHODS = ('UPI', 'WALLET', 'PAY_LATER', 'CASH')
+PAYMENT_STATUSES = ('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED')
+
+
+def _create_enum(name: str, values) -> None:
+    labels = ', '.join(f"'{value}'" for value in values)
+    op.execute(f"""
+        DO $$ BEGIN
+            CREATE TYPE {name} AS ENUM ({labels});
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+    """)
+
+
+def _id_index(table: str) -> None:
+    op.create_index(f'ix_{table}_id', table, ['id'], if_not_exists=True)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('email', sa.String()),
+        sa.Column('password', sa.String()),
+        sa.Column('role', sa.String()),
+        sa.Column('profile_picture', sa.String()),
+        sa.Column('preferred_payment', sa.String()),
+        sa.Column('is_vegetarian', sa.Boolean()),
+        sa.Column('notif_prefs', sa.JSON()),
+        sa.Column('upi_id', sa.String()),
+        if_not_exists=True,
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True, if_not_exists=True)
+    _id_index('users')
+
+    op.create_table(
+        'canteens',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('image', sa.String()),
+        sa.Column('location', sa.String()),
+        sa.Column('rating', sa.Float()),
+        sa.Column('open_time', sa.Time()),
+        sa.Column('close_time', sa.Time()),
+        sa.Column('is_open', sa.Boolean()),
+        sa.Column('description', sa.String()),
+        sa.Column('phone', sa.String(), unique=True),
+        sa.Column('email', sa.String(), unique=True),
+        sa.Column('schedule', sa.JSON()),
+        sa.Column('tags', sa.JSON()),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        if_not_exists=True,
+    )
+    _id_index('canteens')
+
+    for table in ('canteen_staff_association', 'user_favorite_canteen_association'):
+        op.create_table(
+            table,
+            sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('canteen_id', sa.Integer(), sa.ForeignKey('canteens.id'), primary_key=True),
+            if_not_exists=True,
+        )
+
+    op.create_table(
+        'carts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+        sa.Column('created_at', sa.DateTime(timezone=True)),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.Column('pickup_date', sa.DateTime()),
+        sa.Column('pickup_time', sa.String()),
+        if_not_exists=True,
+    )
+    _id_index('carts')
+
+    op.create_table(
+        'user_wallets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+        sa.Column('balance', sa.Float()),
+        sa.Column('is_privileged', sa.Boolean()),
+        sa.Column('credit_limit', sa.Float()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime()),
+        if_not_exists=True,
+    )
+    _id_index('user_wallets')
+
+    # stock_count is added by 0001
+    op.create_table(
+        'menu_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String()),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('image', sa.String()),
+        sa.Column('category', sa.String()),
+        sa.Column('canteen_id', sa.Integer(), sa.ForeignKey('canteens.id'), nullable=False),
+        sa.Column('tags', sa.JSON()),
+        sa.Column('rating', sa.Float()),
+        sa.Column('rating_count', sa.Integer()),
+        sa.Column('is_available', sa.Boolean()),
+        sa.Column('is_featured', sa.Boolean()),
+        sa.Column('is_popular', sa.Boolean()),
+        sa.Column('preparation_time', sa.Integer()),
+        sa.Column('customization_options', sa.JSON()),
+        if_not_exists=True,
+    )
+    _id_index('menu_items')
+
+    op.create_table(
+        'merchants',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('canteen_id', sa.Integer(), sa.ForeignKey('canteens.id'), nullable=False, unique=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('razorpay_merchant_id', sa.String(), nullable=False, unique=True),
+        sa.Column('razorpay_key_id', sa.String(), nullable=False),
+        sa.Column('razorpay_key_secret', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime()),
+        if_not_exists=True,
+    )
+    _id_index('merchants')
+
+    # subtotal and tax are added by 0002
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('canteen_id', sa.Integer(), sa.ForeignKey('canteens.id'), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String()),
+        sa.Column('order_time', sa.DateTime(timezone=True)),
+        sa.Column('confirmed_time', sa.DateTime(timezone=True)),
+        sa.Column('preparing_time', sa.DateTime(timezone=True)),
+        sa.Column('ready_time', sa.DateTime(timezone=True)),
+        sa.Column('delivery_time', sa.DateTime(timezone=True)),
+        sa.Column('cancelled_time', sa.DateTime(timezone=True)),
+        sa.Column('payment_method', sa.String()),
+        sa.Column('payment_status', sa.String()),
+        sa.Column('customer_note', sa.String()),
+        sa.Column('cancellation_reason', sa.String()),
+        sa.Column('pickup_time', sa.String()),
+        sa.Column('is_pre_order', sa.Boolean()),
+        if_not_exists=True,
+    )
+    _id_index('orders')
+
+    # customization_hash (and its unique line index) is added by 0004
+    op.create_table(
+        'cart_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('cart_id', sa.Integer(), sa.ForeignKey('carts.id'), nullable=False),
+        sa.Column('menu_item_id', sa.Integer(), sa.ForeignKey('menu_items.id'), nullable=False),
+        sa.Column('customizations', sa.JSON()),
+        if_not_exists=True,
+    )
+    _id_index('cart_items')
+
+    op.create_table(
+        'complaints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id')),
+        sa.Column('complaint_text', sa.String(), nullable=False),
+        sa.Column('heading', sa.String()),
+        sa.Column('complaint_type', sa.String()),
+        sa.Column('status', sa.String()),
+        sa.Column('is_escalated', sa.Boolean()),
+        sa.Column('response_text', sa.String()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime()),
+        if_not_exists=True,
+    )
+    _id_index('complaints')
+
+    # snapshot_* are added by 0002, customization_hash by 0004
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('quantity', sa.Integer()),
+        sa.Column('note', sa.String()),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id'), nullable=False),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('menu_items.id'), nullable=False),
+        if_not_exists=True,
+    )
+    _id_index('order_items')
+
+    op.create_table(
+        'order_steps',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id'), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('completed', sa.Boolean()),
+        sa.Column('current', sa.Boolean()),
+        if_not_exists=True,
+    )
+    _id_index('order_steps')
+
+    _create_enum('paymentmethod', PAYMENT_METHODS)
+    _create_enum('paymentstatus', PAYMENT_STATUSES)
+    op.create_table(
+        'payments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id'), nullable=False),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('merchant_id', sa.Integer(), sa.ForeignKey('merchants.id'), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('payment_method', postgresql.ENUM(*PAYMENT_METHODS, name='paymentmethod', create_type=False), nullable=False),
+        sa.Column('payment_status', postgresql.ENUM(*PAYMENT_STATUSES, name='paymentstatus', create_type=False), nullable=False),
+        sa.Column('transaction_id', sa.String(), unique=True),
+        sa.Column('razorpay_order_id', sa.String(), unique=True),
+        sa.Column('razorpay_payment_id', sa.String(), unique=True),
+        sa.Column('razorpay_signature', sa.String()),
+        sa.Column('payment_response', sa.String()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime()),
+        if_not_exists=True,
+    )
+    _id_index('payments')
+
+    op.create_table(
+        'wallet_transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('wallet_id', sa.Integer(), sa.ForeignKey('user_wallets.id'), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('payment_id', sa.Integer(), sa.ForeignKey('payments.id')),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    _id_index('wallet_transactions')
+
+
+def downgrade() -> None:
+    for table in (
+        'wallet_transactions', 'payments', 'order_steps', 'order_items', 'complaints', 'cart_items',
+        'orders', 'merchants', 'menu_items', 'user_wallets', 'carts', 'user_favorite_canteen_association',
+        'canteen_staff_association', 'canteens', 'users',
+    ):
+        op.drop_table(table)
+    op.execute("DROP TYPE IF EXISTS paymentstatus")
+    op.execute("DROP TYPE IF EXISTS paymentmethod")
@@ -1,7 +1,7 @@
 """add stock_count to menu_items
 
 Revision ID: 0001_add_stock_count
-Revises: 
+Revises: 0000_base_schema
 Create Date: 2025-11-21 00:00:00.000000
 """
 from alembic import op
@@ -9,18 +9,20 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '0001_add_stock_count'
-down_revision = None
+down_revision = '0000_base_schema'
 branch_labels = None
 depends_on = None
 
 
+def _has_column(table: str, column: str) -> bool:
+    # A failed ALTER aborts the whole Postgres transaction, so check rather than try/except
+    return any(c['name'] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
 def upgrade() -> None:
-    # Add stock_count column with default 0 if it does not exist
-    try:
+    # Add stock_count column with default 0 if it does not exist (e.g. created by create_all)
+    if not _has_column('menu_items', 'stock_count'):
         op.add_column('menu_items', sa.Column('stock_count', sa.Integer(), nullable=False, server_default=sa.text('0')))
-    except Exception:
-        # If the column already exists or add fails, ignore to keep migrations idempotent
-        pass
 
 
 def downgrade() -> None:
@@ -14,26 +14,23 @@ branch_labels = None
 depends_on = None
 
 
+def _has_column(table: str, column: str) -> bool:
+    # A failed ALTER aborts the whole Postgres transaction, so check rather than try/except
+    return any(c['name'] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
 def upgrade() -> None:
     # Add subtotal and tax to orders
-    try:
+    if not _has_column('orders', 'subtotal'):
         op.add_column('orders', sa.Column('subtotal', sa.Float(), nullable=True, server_default=sa.text('0')))
-    except Exception:
-        pass
-    try:
+    if not _has_column('orders', 'tax'):
         op.add_column('orders', sa.Column('tax', sa.Float(), nullable=True, server_default=sa.text('0')))
-    except Exception:
-        pass
 
     # Add snapshot fields to order_items
-    try:
+    if not _has_column('order_items', 'snapshot_name'):
         op.add_column('order_items', sa.Column('snapshot_name', sa.String(), nullable=True))
-    except Exception:
-        pass
-    try:
+    if not _has_column('order_items', 'snapshot_price'):
         op.add_column('order_items', sa.Column('snapshot_price', sa.Float(), nullable=True, server_default=sa.text('0')))
-    except Exception:
-        pass
 
 
 def downgrade() -> None:
@@ -0,0 +1,53 @@
+"""add canteen_daily_stats rollup table
+
+Revision ID: 0003_add_canteen_daily_stats
+Revises: 0002_add_order_snapshot_and_totals
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_add_canteen_daily_stats'
+down_revision = '0002_add_order_snapshot_and_totals'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Skipped when the table already exists (e.g. created by create_all)
+    op.create_table(
+        'canteen_daily_stats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('canteen_id', sa.Integer(), sa.ForeignKey('canteens.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('gross_revenue', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.Column('cancelled_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('cancelled_revenue', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.UniqueConstraint('canteen_id', 'day', name='uq_canteen_daily_stats_canteen_day'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_canteen_daily_stats_id', 'canteen_daily_stats', ['id'], if_not_exists=True)
+
+    # Populate the rollups from existing orders (IST calendar days)
+    op.execute("""
+        INSERT INTO canteen_daily_stats (canteen_id, day, order_count, gross_revenue, cancelled_count, cancelled_revenue)
+        SELECT canteen_id,
+               CAST(timezone('Asia/Kolkata', order_time) AS DATE),
+               COUNT(id),
+               COALESCE(SUM(total_amount), 0),
+               COUNT(CASE WHEN status = 'cancelled' THEN 1 END),
+               COALESCE(SUM(CASE WHEN status = 'cancelled' THEN total_amount ELSE 0 END), 0)
+        FROM orders
+        WHERE order_time IS NOT NULL
+        GROUP BY canteen_id, CAST(timezone('Asia/Kolkata', order_time) AS DATE)
+        ON CONFLICT (canteen_id, day) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    try:
+        op.drop_table('canteen_daily_stats')
+    except Exception:
+        pass
@@ -0,0 +1,104 @@
+"""add customization_hash to cart_items and order_items
+
+Revision ID: 0004_add_customization_hash
+Revises: 0003_add_canteen_daily_stats
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.helpers.customizations import EMPTY_CUSTOMIZATION_HASH, canonicalize_customizations, customization_hash
+
+# revision identifiers, used by Alembic.
+revision = '0004_add_customization_hash'
+down_revision = '0003_add_canteen_daily_stats'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _has_column(table: str, column: str) -> bool:
+    # A failed ALTER aborts the whole Postgres transaction, so check rather than try/except
+    return any(c['name'] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _backfill_cart_items(bind) -> None:
+    """Rewrites every cart line's customizations in canonical form and stores its hash."""
+    cart_items = sa.table(
+        'cart_items',
+        sa.column('id', sa.Integer),
+        sa.column('customizations', sa.JSON),
+        sa.column('customization_hash', sa.String),
+    )
+    rows = bind.execute(sa.select(cart_items.c.id, cart_items.c.customizations)).fetchall()
+    updates = [
+        {
+            'b_id': row.id,
+            'b_customizations': canonicalize_customizations(row.customizations),
+            'b_hash': customization_hash(row.customizations),
+        }
+        for row in rows
+    ]
+    stmt = (
+        cart_items.update()
+        .where(cart_items.c.id == sa.bindparam('b_id'))
+        .values(customizations=sa.bindparam('b_customizations'), customization_hash=sa.bindparam('b_hash'))
+    )
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        bind.execute(stmt, updates[start:start + BACKFILL_BATCH_SIZE])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if not _has_column('cart_items', 'customization_hash'):
+        op.add_column('cart_items', sa.Column('customization_hash', sa.String(length=64), nullable=True))
+    _backfill_cart_items(bind)
+
+    # Lines that only differed by key/list order are now duplicates: fold their
+    # quantities into the oldest line before the unique index is created.
+    op.execute("""
+        UPDATE cart_items keep
+        SET quantity = dup.total
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+            FROM cart_items
+            GROUP BY cart_id, menu_item_id, customization_hash
+            HAVING COUNT(*) > 1
+        ) dup
+        WHERE keep.id = dup.keep_id
+    """)
+    op.execute("""
+        DELETE FROM cart_items ci
+        USING cart_items keep
+        WHERE keep.cart_id = ci.cart_id
+          AND keep.menu_item_id = ci.menu_item_id
+          AND keep.customization_hash = ci.customization_hash
+          AND keep.id < ci.id
+    """)
+    op.alter_column('cart_items', 'customization_hash', nullable=False)
+    op.create_index(
+        'uq_cart_items_line', 'cart_items', ['cart_id', 'menu_item_id', 'customization_hash'], unique=True,
+        if_not_exists=True,
+    )
+
+    # Order lines never persisted their customizations, so existing rows get the empty hash
+    if not _has_column('order_items', 'customization_hash'):
+        op.add_column(
+            'order_items',
+            sa.Column(
+                'customization_hash',
+                sa.String(length=64),
+                nullable=False,
+                server_default=sa.text(f"'{EMPTY_CUSTOMIZATION_HASH}'"),
+            ),
+        )
+    op.create_index('ix_order_items_customization_hash', 'order_items', ['customization_hash'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_customization_hash', table_name='order_items')
+    op.drop_column('order_items', 'customization_hash')
+    op.drop_index('uq_cart_items_line', table_name='cart_items')
+    op.drop_column('cart_items', 'customization_hash')
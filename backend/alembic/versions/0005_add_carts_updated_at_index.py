@@ -0,0 +1,23 @@
+"""index carts.updated_at for the abandoned-cart sweeper
+
+Revision ID: 0005_add_carts_updated_at_index
+Revises: 0004_add_customization_hash
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0005_add_carts_updated_at_index'
+down_revision = '0004_add_customization_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Carts written before updated_at was always set would never expire
+    op.execute("UPDATE carts SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+    op.create_index('ix_carts_updated_at', 'carts', ['updated_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_carts_updated_at', table_name='carts')
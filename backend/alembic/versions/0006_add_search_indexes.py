@@ -0,0 +1,50 @@
+"""full-text and trigram search indexes on menu_items and canteens
+
+Revision ID: 0006_add_search_indexes
+Revises: 0005_add_carts_updated_at_index
+Create Date: 2026-10-19 00:00:00.000000
+
+The tsvector index expressions must match `_menu_vector` / `_canteen_vector`
+in app/helpers/search.py exactly, or the planner will not use them.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0006_add_search_indexes'
+down_revision = '0005_add_carts_updated_at_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_menu_items_search ON menu_items USING gin ((
+            setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple'::regconfig, coalesce(category, '')), 'B')
+            || setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'C')
+        ))
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_menu_items_name_trgm ON menu_items USING gin (name gin_trgm_ops)")
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_canteens_search ON canteens USING gin ((
+            setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'B')
+            || setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'C')
+        ))
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_canteens_name_trgm ON canteens USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_canteens_location_trgm ON canteens USING gin (location gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    for name in (
+        'ix_canteens_location_trgm',
+        'ix_canteens_name_trgm',
+        'ix_canteens_search',
+        'ix_menu_items_name_trgm',
+        'ix_menu_items_search',
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
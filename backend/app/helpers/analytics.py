@@ -0,0 +1,344 @@
+"""
+Sales analytics aggregated in SQL, with per-bucket caching.
+
+Every aggregate is computed by Postgres (`date_trunc`, GROUP BY) over column
+values only; no `Order` ORM objects are loaded. Results are cached per time
+bucket once it has closed (its end plus a settle margin for late cancellations
+is in the past), so repeat requests only hit the database for the buckets that
+are missing or still open. A vendor can still cancel an old order: this
+worker drops the canteen's buckets when that happens (see
+`app.helpers.canteen_stats.record_status_change`), and the other workers'
+copies expire after ANALYTICS_CACHE_TTL_MINUTES.
+
+All buckets are IST wall-clock buckets, matching how the canteens operate.
+"""
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+IST = ZoneInfo("Asia/Kolkata")
+GRANULARITIES = ("hour", "day", "week", "month")
+MAX_BUCKETS = 2000
+# A bucket is considered closed this long after it ends (late cancellations settle first).
+SETTLE_MARGIN = timedelta(minutes=int(os.getenv("ANALYTICS_SETTLE_MINUTES", "60")))
+# Bounds how long another worker serves a bucket after a late cancellation.
+CACHE_TTL_SECONDS = int(os.getenv("ANALYTICS_CACHE_TTL_MINUTES", "15")) * 60
+
+
+# ===================================================================
+# 1. BUCKET CACHE
+# ===================================================================
+
+class BucketCache:
+    """
+    A small thread-safe LRU for closed analytics buckets, keyed by
+    (kind, canteen_id, granularity, bucket start). Entries expire after `ttl`
+    seconds.
+    """
+    def __init__(self, max_entries: int = 50_000, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[Hashable]) -> Dict[Hashable, Any]:
+        found: Dict[Hashable, Any] = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[1]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any]) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate_canteen(self, canteen_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._data if key[1] == canteen_id]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+bucket_cache = BucketCache()
+
+
+# ===================================================================
+# 2. BUCKET ARITHMETIC (naive IST wall-clock datetimes)
+# ===================================================================
+
+def to_ist_naive(dt: datetime) -> datetime:
+    """Naive inputs are taken to be IST already; aware ones are converted."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(IST).replace(tzinfo=None)
+
+
+def ist_naive_to_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=IST).astimezone(timezone.utc)
+
+
+def bucket_floor(dt: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # ISO weeks start on Monday, like Postgres date_trunc('week', ...)
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}.")
+
+
+def bucket_next(start: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return start + timedelta(hours=1)
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(weeks=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def iter_buckets(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Bucket starts covering [start, end)."""
+    buckets = []
+    cursor = bucket_floor(start, granularity)
+    while cursor < end:
+        buckets.append(cursor)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f"Range too large: more than {MAX_BUCKETS} {granularity} buckets.")
+        cursor = bucket_next(cursor, granularity)
+    return buckets
+
+
+def _is_closed(bucket_end: datetime, now: datetime) -> bool:
+    return bucket_end + SETTLE_MARGIN <= now
+
+
+def _now_ist() -> datetime:
+    return datetime.now(IST).replace(tzinfo=None)
+
+
+def _resolve_range(start: Optional[datetime], end: Optional[datetime], default_days: int) -> Tuple[datetime, datetime]:
+    end_ist = to_ist_naive(end) if end else _now_ist()
+    start_ist = to_ist_naive(start) if start else end_ist - timedelta(days=default_days)
+    if start_ist >= end_ist:
+        raise ValueError("'from' must be earlier than 'to'.")
+    return start_ist, end_ist
+
+
+def _cached_buckets(
+    kind: str,
+    canteen_id: int,
+    buckets: List[datetime],
+    granularity: str,
+    load: Callable[[datetime, datetime], Dict[datetime, Any]],
+    empty: Callable[[], Any],
+) -> Dict[datetime, Any]:
+    """
+    Returns a value per bucket, serving closed buckets from the cache and
+    loading the contiguous span of missing/open ones with a single `load` call.
+    """
+    if not buckets:
+        return {}
+    now = _now_ist()
+    keys = {b: (kind, canteen_id, granularity, b) for b in buckets}
+    cached = bucket_cache.get_many(list(keys.values()))
+    values = {b: cached[k] for b, k in keys.items() if k in cached}
+
+    missing = [b for b in buckets if b not in values]
+    if missing:
+        span_start, span_end = missing[0], bucket_next(missing[-1], granularity)
+        loaded = load(span_start, span_end)
+        to_cache = {}
+        for b in missing:
+            value = loaded.get(b, empty())
+            values[b] = value
+            if _is_closed(bucket_next(b, granularity), now):
+                to_cache[keys[b]] = value
+        bucket_cache.put_many(to_cache)
+    return values
+
+
+# ===================================================================
+# 3. AGGREGATES
+# ===================================================================
+
+# Bucket expression shared by the statements below. Orders are timestamptz, so
+# converting to IST wall-clock time first makes date_trunc align with IST days.
+_LOCAL_TS = "timezone('Asia/Kolkata', o.order_time)"
+
+
+def sales_timeseries(
+    db: Session,
+    canteen_id: int,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Orders and revenue (cancelled orders excluded) per bucket, zero-filled."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}.")
+    start_ist, end_ist = _resolve_range(start, end, default_days=7)
+    buckets = iter_buckets(start_ist, end_ist, granularity)
+
+    def load(span_start: datetime, span_end: datetime) -> Dict[datetime, Any]:
+        rows = db.execute(
+            text(f"""
+                SELECT date_trunc(:granularity, {_LOCAL_TS}) AS bucket,
+                       COUNT(*) AS orders,
+                       COALESCE(SUM(o.total_amount), 0) AS revenue
+                FROM orders o
+                WHERE o.canteen_id = :canteen_id
+                  AND o.order_time >= :start AND o.order_time < :end
+                  AND o.status <> 'cancelled'
+                GROUP BY bucket
+            """),
+            {
+                "granularity": granularity,
+                "canteen_id": canteen_id,
+                "start": ist_naive_to_utc(span_start),
+                "end": ist_naive_to_utc(span_end),
+            },
+        )
+        return {r.bucket: (int(r.orders), float(r.revenue)) for r in rows}
+
+    values = _cached_buckets("series", canteen_id, buckets, granularity, load, lambda: (0, 0.0))
+    series = []
+    for b in buckets:
+        orders, revenue = values[b]
+        series.append({
+            "bucket_start": b,
+            "orders": orders,
+            "revenue": round(revenue, 2),
+            "avg_ticket": round(revenue / orders, 2) if orders else 0.0,
+        })
+    return series
+
+
+def top_items(
+    db: Session,
+    canteen_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """Best-selling items by quantity, folded from cached per-day item totals."""
+    start_ist, end_ist = _resolve_range(start, end, default_days=30)
+    days = iter_buckets(start_ist, end_ist, "day")
+
+    def load(span_start: datetime, span_end: datetime) -> Dict[datetime, Any]:
+        rows = db.execute(
+            text(f"""
+                SELECT date_trunc('day', {_LOCAL_TS}) AS bucket,
+                       oi.item_id,
+                       MAX(COALESCE(oi.snapshot_name, mi.name)) AS name,
+                       SUM(oi.quantity) AS quantity,
+                       SUM(oi.quantity * COALESCE(oi.snapshot_price, mi.price, 0)) AS revenue
+                FROM order_items oi
+                JOIN orders o ON o.id = oi.order_id
+                LEFT JOIN menu_items mi ON mi.id = oi.item_id
+                WHERE o.canteen_id = :canteen_id
+                  AND o.order_time >= :start AND o.order_time < :end
+                  AND o.status <> 'cancelled'
+                GROUP BY bucket, oi.item_id
+            """),
+            {"canteen_id": canteen_id, "start": ist_naive_to_utc(span_start), "end": ist_naive_to_utc(span_end)},
+        )
+        per_day: Dict[datetime, Dict[int, Tuple[str, int, float]]] = {}
+        for r in rows:
+            per_day.setdefault(r.bucket, {})[r.item_id] = (r.name, int(r.quantity or 0), float(r.revenue or 0.0))
+        return per_day
+
+    per_day = _cached_buckets("items", canteen_id, days, "day", load, dict)
+
+    totals: Dict[int, List[Any]] = {}
+    for day_items in per_day.values():
+        for item_id, (name, quantity, revenue) in day_items.items():
+            entry = totals.setdefault(item_id, [name, 0, 0.0])
+            entry[1] += quantity
+            entry[2] += revenue
+
+    best = heapq.nlargest(limit, totals.items(), key=lambda kv: (kv[1][1], kv[1][2]))
+    return [
+        {"rank": rank, "item_id": item_id, "name": name, "quantity": quantity, "revenue": round(revenue, 2)}
+        for rank, (item_id, (name, quantity, revenue)) in enumerate(best, start=1)
+    ]
+
+
+def hourly_heatmap(
+    db: Session,
+    canteen_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Order counts per (ISO weekday, hour) cell, folded from cached per-day hourly counts."""
+    start_ist, end_ist = _resolve_range(start, end, default_days=28)
+    days = iter_buckets(start_ist, end_ist, "day")
+
+    def load(span_start: datetime, span_end: datetime) -> Dict[datetime, Any]:
+        rows = db.execute(
+            text(f"""
+                SELECT date_trunc('day', {_LOCAL_TS}) AS bucket,
+                       CAST(EXTRACT(HOUR FROM {_LOCAL_TS}) AS INTEGER) AS hour,
+                       COUNT(*) AS orders,
+                       COALESCE(SUM(o.total_amount), 0) AS revenue
+                FROM orders o
+                WHERE o.canteen_id = :canteen_id
+                  AND o.order_time >= :start AND o.order_time < :end
+                  AND o.status <> 'cancelled'
+                GROUP BY bucket, hour
+            """),
+            {"canteen_id": canteen_id, "start": ist_naive_to_utc(span_start), "end": ist_naive_to_utc(span_end)},
+        )
+        per_day: Dict[datetime, Dict[int, Tuple[int, float]]] = {}
+        for r in rows:
+            per_day.setdefault(r.bucket, {})[r.hour] = (int(r.orders), float(r.revenue))
+        return per_day
+
+    per_day = _cached_buckets("heatmap", canteen_id, days, "day", load, dict)
+
+    cells: Dict[Tuple[int, int], List[Any]] = {}
+    for day, hours in per_day.items():
+        weekday = day.isoweekday()
+        for hour, (orders, revenue) in hours.items():
+            cell = cells.setdefault((weekday, hour), [0, 0.0])
+            cell[0] += orders
+            cell[1] += revenue
+
+    return [
+        {"weekday": weekday, "hour": hour, "orders": orders, "revenue": round(revenue, 2)}
+        for (weekday, hour), (orders, revenue) in sorted(cells.items())
+    ]
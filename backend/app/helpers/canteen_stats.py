@@ -0,0 +1,166 @@
+"""
+Incremental maintenance of the `canteen_daily_stats` rollup table.
+
+Order mutations call `record_order_created` / `record_status_change` inside
+their own transaction, so the counters commit (or roll back) together with the
+order. The backfill rebuilds the rollups from `orders` for a date range with a
+single INSERT ... SELECT:
+
+    python -m app.helpers.canteen_stats --from 2025-01-01 --to 2025-12-31
+"""
+import argparse
+import sys
+from datetime import date, datetime, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, case, cast, delete, func, select, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.helpers.analytics import bucket_cache
+from app.models.canteen_stats import CanteenDailyStats
+from app.models.order import Order
+
+STATS_TIMEZONE = "Asia/Kolkata"
+
+
+def stats_day(dt: Optional[datetime]) -> date:
+    """The rollup bucket (IST calendar date) for an order timestamp. Naive datetimes are UTC."""
+    if dt is None:
+        dt = datetime.now(timezone.utc)
+    elif dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(ZoneInfo(STATS_TIMEZONE)).date()
+
+
+def _bump(
+    db: Session,
+    canteen_id: int,
+    day: date,
+    orders: int = 0,
+    gross: float = 0.0,
+    cancelled: int = 0,
+    cancelled_revenue: float = 0.0,
+) -> None:
+    """Adds deltas to one (canteen, day) bucket, creating it if needed, in one statement."""
+    stmt = insert(CanteenDailyStats).values(
+        canteen_id=canteen_id,
+        day=day,
+        order_count=orders,
+        gross_revenue=gross,
+        cancelled_count=cancelled,
+        cancelled_revenue=cancelled_revenue,
+    )
+    table = CanteenDailyStats.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.canteen_id, table.c.day],
+        set_={
+            "order_count": table.c.order_count + stmt.excluded.order_count,
+            "gross_revenue": table.c.gross_revenue + stmt.excluded.gross_revenue,
+            "cancelled_count": table.c.cancelled_count + stmt.excluded.cancelled_count,
+            "cancelled_revenue": table.c.cancelled_revenue + stmt.excluded.cancelled_revenue,
+        },
+    )
+    db.execute(stmt)
+
+
+def record_order_created(db: Session, order: Order) -> None:
+    """Counts a newly flushed order. Does not commit."""
+    amount = float(order.total_amount or 0.0)
+    is_cancelled = order.status == "cancelled"
+    _bump(
+        db,
+        order.canteen_id,
+        stats_day(order.order_time),
+        orders=1,
+        gross=amount,
+        cancelled=1 if is_cancelled else 0,
+        cancelled_revenue=amount if is_cancelled else 0.0,
+    )
+
+
+def record_status_change(db: Session, order: Order, old_status: Optional[str], new_status: Optional[str]) -> None:
+    """
+    Adjusts the cancellation counters when an order enters or leaves
+    'cancelled'. Does not commit. The canteen's cached analytics buckets are
+    dropped, since the analytics exclude cancelled orders.
+    """
+    was_cancelled = old_status == "cancelled"
+    is_cancelled = new_status == "cancelled"
+    if was_cancelled == is_cancelled:
+        return
+    bucket_cache.invalidate_canteen(order.canteen_id)
+    sign = 1 if is_cancelled else -1
+    _bump(
+        db,
+        order.canteen_id,
+        stats_day(order.order_time),
+        cancelled=sign,
+        cancelled_revenue=sign * float(order.total_amount or 0.0),
+    )
+
+
+def backfill_canteen_stats(db: Session, from_day: Optional[date] = None, to_day: Optional[date] = None) -> int:
+    """
+    Rebuilds the rollups for [from_day, to_day] (inclusive, open-ended when None)
+    from the orders table and commits. Returns the number of buckets written.
+    """
+    order_day = cast(func.timezone(STATS_TIMEZONE, Order.order_time), Date)
+
+    stats_filter = []
+    orders_filter = []
+    if from_day is not None:
+        stats_filter.append(CanteenDailyStats.day >= from_day)
+        orders_filter.append(order_day >= from_day)
+    if to_day is not None:
+        stats_filter.append(CanteenDailyStats.day <= to_day)
+        orders_filter.append(order_day <= to_day)
+
+    is_cancelled = Order.status == "cancelled"
+    source = (
+        select(
+            Order.canteen_id,
+            order_day.label("day"),
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.total_amount), 0.0),
+            func.count(case((is_cancelled, 1))),
+            func.coalesce(func.sum(case((is_cancelled, Order.total_amount), else_=0.0)), 0.0),
+        )
+        .where(and_(Order.order_time.isnot(None), *orders_filter))
+        .group_by(Order.canteen_id, order_day)
+    )
+
+    try:
+        db.execute(delete(CanteenDailyStats).where(*stats_filter))
+        result = db.execute(
+            insert(CanteenDailyStats).from_select(
+                ["canteen_id", "day", "order_count", "gross_revenue", "cancelled_count", "cancelled_revenue"],
+                source,
+            )
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result.rowcount
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the canteen_daily_stats rollups from orders.")
+    parser.add_argument("--from", dest="from_day", type=date.fromisoformat, help="First day (YYYY-MM-DD, IST).")
+    parser.add_argument("--to", dest="to_day", type=date.fromisoformat, help="Last day (YYYY-MM-DD, IST).")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        written = backfill_canteen_stats(db, args.from_day, args.to_day)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt {written} canteen/day buckets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
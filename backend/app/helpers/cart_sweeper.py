@@ -0,0 +1,172 @@
+"""
+Deletes abandoned carts (and their lines) in small, short-lived batches.
+
+A cart is abandoned when its `updated_at` is older than the TTL; every cart
+write bumps `updated_at`, so active carts are never touched. Each batch is
+its own transaction:
+
+    WITH victims AS (SELECT id FROM carts WHERE updated_at < :cutoff
+                     ORDER BY updated_at LIMIT :k FOR UPDATE SKIP LOCKED)
+    DELETE cart_items ... ; DELETE carts ...
+
+`SKIP LOCKED` passes over carts a request is using right now (adding a line
+takes a key-share lock on its cart), and `lock_timeout` bounds any other wait,
+so the sweeper yields to customer traffic instead of queueing behind it.
+
+    python -m app.helpers.cart_sweeper --days 14 --batch-size 500
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+CART_TTL_DAYS = int(os.getenv("CART_TTL_DAYS", "14"))
+SWEEP_BATCH_SIZE = 500
+SWEEP_LOCK_TIMEOUT_MS = 2000
+# Lock timeouts in a row before the run gives up
+SWEEP_MAX_LOCK_TIMEOUTS = 10
+# SQLSTATE of a lock_timeout expiry (lock_not_available)
+LOCK_NOT_AVAILABLE = "55P03"
+
+_SWEEP_BATCH = text("""
+    WITH victims AS (
+        SELECT id FROM carts
+        WHERE updated_at < :cutoff
+        ORDER BY updated_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    gone_lines AS (
+        DELETE FROM cart_items WHERE cart_id IN (SELECT id FROM victims) RETURNING 1
+    ),
+    gone_carts AS (
+        DELETE FROM carts WHERE id IN (SELECT id FROM victims) RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM gone_carts) AS carts, (SELECT COUNT(*) FROM gone_lines) AS lines
+""")
+
+_COUNT_ABANDONED = text("""
+    SELECT COUNT(*) AS carts,
+           (SELECT COUNT(*) FROM cart_items ci JOIN carts c ON c.id = ci.cart_id WHERE c.updated_at < :cutoff) AS lines
+    FROM carts WHERE updated_at < :cutoff
+""")
+
+
+class SweepReport(BaseModel):
+    cutoff: datetime
+    dry_run: bool = False
+    batches: int = 0
+    carts_deleted: int = 0
+    lines_deleted: int = 0
+    # Batches abandoned because a lock could not be taken within the timeout
+    lock_timeouts: int = 0
+    # Stopped early after SWEEP_MAX_LOCK_TIMEOUTS lock timeouts; old carts remain
+    gave_up: bool = False
+    elapsed_seconds: float = 0.0
+    slowest_batch_ms: float = 0.0
+
+
+
+def sweep_abandoned_carts(
+    db: Session,
+    days: int = CART_TTL_DAYS,
+    batch_size: int = SWEEP_BATCH_SIZE,
+    pause_seconds: float = 0.05,
+    max_batches: Optional[int] = None,
+    lock_timeout_ms: int = SWEEP_LOCK_TIMEOUT_MS,
+    dry_run: bool = False,
+) -> SweepReport:
+    """
+    Deletes carts untouched for `days` days, committing after every batch of
+    `batch_size` carts and pausing in between. Returns the run's totals.
+    """
+    report = SweepReport(cutoff=datetime.now(timezone.utc) - timedelta(days=days), dry_run=dry_run)
+    started = time.perf_counter()
+
+    if dry_run:
+        counts = db.execute(_COUNT_ABANDONED, {"cutoff": report.cutoff}).one()
+        report.carts_deleted, report.lines_deleted = int(counts.carts), int(counts.lines)
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return report
+
+    while max_batches is None or report.batches < max_batches:
+        batch_started = time.perf_counter()
+        try:
+            # SET LOCAL only lasts for this batch's transaction
+            db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+            counts = db.execute(_SWEEP_BATCH, {"cutoff": report.cutoff, "batch_size": batch_size}).one()
+            db.commit()
+        except OperationalError as exc:
+            db.rollback()
+            if getattr(exc.orig, "pgcode", None) != LOCK_NOT_AVAILABLE:
+                raise
+            # Lock timeout: give way to live traffic and try again after a pause
+            report.lock_timeouts += 1
+            if report.lock_timeouts > SWEEP_MAX_LOCK_TIMEOUTS:
+                report.gave_up = True
+                break
+            time.sleep(pause_seconds * 10)
+            continue
+        except Exception:
+            db.rollback()
+            raise
+
+        report.batches += 1
+        report.carts_deleted += int(counts.carts)
+        report.lines_deleted += int(counts.lines)
+        report.slowest_batch_ms = max(report.slowest_batch_ms, round((time.perf_counter() - batch_started) * 1000, 1))
+        if counts.carts < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    report.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Delete carts that have not been touched for a number of days.")
+    parser.add_argument("--days", type=int, default=CART_TTL_DAYS, help="Cart TTL in days (default: %(default)s).")
+    parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+    parser.add_argument("--pause-ms", type=int, default=50, help="Pause between batches.")
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--lock-timeout-ms", type=int, default=SWEEP_LOCK_TIMEOUT_MS)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the abandoned carts.")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = sweep_abandoned_carts(
+            db,
+            days=args.days,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause_ms / 1000,
+            max_batches=args.max_batches,
+            lock_timeout_ms=args.lock_timeout_ms,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+
+    verb = "Would delete" if report.dry_run else "Deleted"
+    print(
+        f"{'⚠️' if report.gave_up else '✅'} {verb} {report.carts_deleted} carts / {report.lines_deleted} lines older than {report.cutoff.isoformat()} "
+        f"in {report.batches} batches ({report.elapsed_seconds}s, slowest batch {report.slowest_batch_ms} ms, "
+        f"{report.lock_timeouts} lock timeouts)."
+    )
+    if report.gave_up:
+        print(f"❌ Gave up after {report.lock_timeouts} lock timeouts; abandoned carts remain.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
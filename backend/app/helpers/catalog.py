@@ -0,0 +1,239 @@
+"""
+In-process snapshot of the browsable catalog (canteens and their menu items).
+
+Read-mostly features (typeahead, faceted browsing, HTTP caching) work off an
+immutable `CatalogSnapshot` instead of querying `menu_items` per request.
+The cache keeps a version counter that is bumped after any commit that
+inserted, deleted or changed a catalog field of a MenuItem or Canteen through
+the ORM. The next `catalog.get(db)` then reloads the snapshot with two column
+queries. Stock levels are deliberately not part of the catalog (they change on
+every order), so stock-only updates leave the version alone.
+
+Other workers only see an edit once their snapshot expires
+(CATALOG_CACHE_TTL_SECONDS, default 60); the version only moves on expiry if
+the reloaded catalog actually differs.
+
+Indexes derived from a snapshot are memoised on it with `snapshot.derived(...)`,
+so they are rebuilt exactly once per catalog version.
+"""
+import os
+import threading
+import time
+from datetime import time as dt_time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.canteen import Canteen
+from app.models.menu_item import MenuItem
+
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+
+# Attributes whose changes don't affect the catalog
+_VOLATILE_ATTRIBUTES = {"stock_count"}
+
+
+class CatalogMenuItem(NamedTuple):
+    id: int
+    canteen_id: int
+    name: str
+    description: Optional[str]
+    price: float
+    image: Optional[str]
+    category: Optional[str]
+    tags: Tuple[str, ...]
+    rating: float
+    rating_count: int
+    is_available: bool
+    is_featured: bool
+    is_popular: bool
+    preparation_time: int
+    customization_options: Optional[Dict[str, Any]]
+
+
+class CatalogCanteen(NamedTuple):
+    id: int
+    name: str
+    location: Optional[str]
+    is_open: bool
+    tags: Tuple[str, ...]
+    image: Optional[str] = None
+    rating: float = 0.0
+    open_time: Optional[dt_time] = None
+    close_time: Optional[dt_time] = None
+    description: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    user_id: Optional[str] = None
+
+
+class CatalogSnapshot:
+    """An immutable view of the catalog at one version."""
+    def __init__(self, version: int, canteens: List[CatalogCanteen], menu_items: List[CatalogMenuItem]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.canteens = canteens
+        self.canteens_by_id = {c.id: c for c in canteens}
+        self.menu_items = menu_items
+        self.menu_items_by_id = {m.id: m for m in menu_items}
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def derived(self, name: str, build: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """Returns the index called `name`, building it from this snapshot on first use."""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = build(self)
+                    self._derived[name] = value
+        return value
+
+
+def _tags(value: Any) -> Tuple[str, ...]:
+    return tuple(str(tag) for tag in value) if isinstance(value, list) else ()
+
+
+def load_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    canteens = [
+        CatalogCanteen(
+            id=row.id,
+            name=row.name,
+            location=row.location,
+            is_open=bool(row.is_open),
+            tags=_tags(row.tags),
+            image=row.image,
+            rating=float(row.rating or 0.0),
+            open_time=row.open_time,
+            close_time=row.close_time,
+            description=row.description,
+            phone=row.phone,
+            email=row.email,
+            user_id=row.user_id,
+        )
+        for row in db.execute(
+            select(
+                Canteen.id, Canteen.name, Canteen.location, Canteen.is_open, Canteen.tags, Canteen.image,
+                Canteen.rating, Canteen.open_time, Canteen.close_time, Canteen.description, Canteen.phone,
+                Canteen.email, Canteen.user_id,
+            ).order_by(Canteen.id)
+        )
+    ]
+    menu_items = [
+        CatalogMenuItem(
+            id=row.id,
+            canteen_id=row.canteen_id,
+            name=row.name,
+            description=row.description,
+            price=float(row.price or 0.0),
+            image=row.image,
+            category=row.category,
+            tags=_tags(row.tags),
+            rating=float(row.rating or 0.0),
+            rating_count=int(row.rating_count or 0),
+            is_available=bool(row.is_available) if row.is_available is not None else True,
+            is_featured=bool(row.is_featured),
+            is_popular=bool(row.is_popular),
+            preparation_time=int(row.preparation_time or 15),
+            customization_options=row.customization_options if isinstance(row.customization_options, dict) else None,
+        )
+        for row in db.execute(
+            select(
+                MenuItem.id, MenuItem.canteen_id, MenuItem.name, MenuItem.description, MenuItem.price,
+                MenuItem.image, MenuItem.category, MenuItem.tags, MenuItem.rating, MenuItem.rating_count,
+                MenuItem.is_available, MenuItem.is_featured, MenuItem.is_popular, MenuItem.preparation_time,
+                MenuItem.customization_options,
+            ).order_by(MenuItem.id)
+        )
+    ]
+    return CatalogSnapshot(version, canteens, menu_items)
+
+
+class CatalogCache:
+    """Holds the current snapshot; reloads it when the version moves or it expires."""
+    def __init__(self, ttl_seconds: float = CATALOG_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.version = 1
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and snapshot.loaded_at + self.ttl_seconds > time.monotonic()
+        )
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            fresh = load_snapshot(db, self.version)
+            if snapshot is not None and snapshot.version == self.version:
+                # Expired by TTL only: keep the version (and the derived indexes)
+                # unless another worker changed the catalog in the meantime.
+                if fresh.canteens == snapshot.canteens and fresh.menu_items == snapshot.menu_items:
+                    snapshot.loaded_at = fresh.loaded_at
+                    return snapshot
+                self.version += 1
+                fresh.version = self.version
+            self._snapshot = fresh
+            return fresh
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self.version += 1
+
+
+catalog = CatalogCache()
+
+
+# The version is bumped after commit (not at flush) so a concurrent reload can
+# never cache pre-commit data under the new version.
+_DIRTY_KEY = "catalog_dirty"
+
+
+def _touches_catalog(obj: Any) -> bool:
+    if not isinstance(obj, (MenuItem, Canteen)):
+        return False
+    state = inspect(obj)
+    return any(
+        attr.history.has_changes()
+        for attr in state.attrs
+        if attr.key not in _VOLATILE_ATTRIBUTES and attr.key in state.mapper.column_attrs
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_dirty(session: Session, flush_context) -> None:
+    if any(isinstance(obj, (MenuItem, Canteen)) for obj in list(session.new) + list(session.deleted)) or any(
+        _touches_catalog(obj) for obj in session.dirty
+    ):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        catalog.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_mark(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
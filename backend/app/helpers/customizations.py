@@ -0,0 +1,81 @@
+"""
+Canonical form and stable hash of a cart/order line's customizations.
+
+Two lines are "the same item" when they have the same menu item and the same
+canonical customizations, so the hash is stored on `cart_items` and
+`order_items` and matched through a plain b-tree index instead of comparing
+JSON values. Canonicalisation makes the hash independent of key order, list
+order, surrounding whitespace and unset/empty fields:
+
+    {"additions": ["Cheese", "Olives"], "size": "Large"}
+    {"size": " Large", "additions": ["Olives", "Cheese"], "removals": [], "notes": None}
+
+both canonicalise (and hash) identically.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Mapping, Optional
+
+import strawberry
+
+LIST_FIELDS = ("additions", "removals")
+TEXT_FIELDS = ("size", "notes")
+
+
+def _option_label(value: Any) -> str:
+    # Options may arrive as plain names or as {"name": ..., "price": ...} objects
+    if isinstance(value, Mapping):
+        value = value.get("name") or value.get("label") or json.dumps(value, sort_keys=True)
+    return str(value).strip()
+
+
+def _as_mapping(customizations: Any) -> Optional[Mapping[str, Any]]:
+    if customizations is None:
+        return None
+    if isinstance(customizations, Mapping):
+        return customizations
+    if isinstance(customizations, str):
+        try:
+            decoded = json.loads(customizations)
+        except json.JSONDecodeError:
+            return None
+        return decoded if isinstance(decoded, Mapping) else None
+    # Strawberry inputs and other plain objects
+    return {k: v for k, v in vars(customizations).items() if v is not strawberry.UNSET}
+
+
+def canonicalize_customizations(customizations: Any) -> Optional[Dict[str, Any]]:
+    """
+    Returns the canonical dict for a customizations value (dict, JSON string or
+    CustomizationsInput), or None when nothing is actually customised.
+    """
+    data = _as_mapping(customizations)
+    if not data:
+        return None
+
+    canonical: Dict[str, Any] = {}
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        if value is None or value is strawberry.UNSET:
+            continue
+        text = json.dumps(value, sort_keys=True) if isinstance(value, (Mapping, list)) else str(value).strip()
+        if text:
+            canonical[field] = text
+    for field in LIST_FIELDS:
+        values = data.get(field)
+        if not values or values is strawberry.UNSET:
+            continue
+        labels: List[str] = sorted(label for label in (_option_label(v) for v in values) if label)
+        if labels:
+            canonical[field] = labels
+    return canonical or None
+
+
+def customization_hash(customizations: Any) -> str:
+    """Hex sha256 of the canonical JSON. Uncustomised lines all share one hash."""
+    canonical = canonicalize_customizations(customizations) or {}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+EMPTY_CUSTOMIZATION_HASH = customization_hash(None)
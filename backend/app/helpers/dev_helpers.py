@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.order import Order, OrderItem
+from app.helpers.canteen_stats import record_order_created
 
 router = APIRouter(prefix="/api/dev", tags=["Dev"])
 
@@ -22,6 +23,7 @@ async def create_demo_order(db: Session = Depends(get_db), user_id: str | None =
 
     # Add one OrderItem referencing menu_item 101 if available
     db.add(OrderItem(order_id=order.id, item_id=101, quantity=1))
+    record_order_created(db, order)
     db.commit()
     db.refresh(order)
 
@@ -0,0 +1,193 @@
+"""
+Streaming order exports for vendors and admins.
+
+GET /api/export/orders?canteen_id=&from=&to=&format=csv|ndjson
+
+Rows come from a single `orders LEFT JOIN order_items` statement read through a
+server-side cursor, and are encoded and flushed to the client in small chunks,
+so memory stays constant however many orders are exported. CSV has one line
+per order item (order columns repeated); NDJSON has one object per order with
+its items nested.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.core.database import SessionLocal, engine
+from app.helpers.time_utils import to_ist_iso
+from app.models.canteen import Canteen
+from app.models.order import Order, OrderItem
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+IST = ZoneInfo("Asia/Kolkata")
+# Rows fetched from the server-side cursor per round-trip.
+EXPORT_FETCH_SIZE = 2000
+# Encoded rows buffered before a chunk is sent to the client.
+EXPORT_FLUSH_ROWS = 500
+
+CSV_COLUMNS = [
+    "order_id", "order_time", "canteen_id", "user_id", "status", "payment_method", "payment_status",
+    "subtotal", "tax", "total_amount",
+    "item_id", "item_name", "unit_price", "quantity", "line_total", "item_note",
+]
+
+
+def _day_bounds_utc(from_day: Optional[date], to_day: Optional[date]):
+    """Inclusive IST calendar days -> half-open UTC range."""
+    start = datetime.combine(from_day, time.min, IST).astimezone(timezone.utc) if from_day else None
+    end = datetime.combine(to_day + timedelta(days=1), time.min, IST).astimezone(timezone.utc) if to_day else None
+    return start, end
+
+
+def _export_statement(canteen_id: Optional[int], start: Optional[datetime], end: Optional[datetime]):
+    o, oi = Order.__table__, OrderItem.__table__
+    stmt = (
+        select(
+            o.c.id.label("order_id"), o.c.order_time, o.c.canteen_id, o.c.user_id, o.c.status,
+            o.c.payment_method, o.c.payment_status, o.c.subtotal, o.c.tax, o.c.total_amount,
+            oi.c.item_id, oi.c.snapshot_name, oi.c.snapshot_price, oi.c.quantity, oi.c.note.label("item_note"),
+        )
+        .select_from(o.outerjoin(oi, oi.c.order_id == o.c.id))
+        .order_by(o.c.id, oi.c.id)
+    )
+    if canteen_id is not None:
+        stmt = stmt.where(o.c.canteen_id == canteen_id)
+    if start is not None:
+        stmt = stmt.where(o.c.order_time >= start)
+    if end is not None:
+        stmt = stmt.where(o.c.order_time < end)
+    return stmt
+
+
+def _stream_rows(stmt) -> Iterator[Any]:
+    """Yields rows from a dedicated connection with a server-side cursor."""
+    # The request's session is closed before a streaming body is sent, so the
+    # generator owns its own connection for as long as the client is reading.
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_FETCH_SIZE).execute(stmt)
+        for row in result:
+            yield row
+
+
+def _line_total(row) -> float:
+    return round(float(row.snapshot_price or 0.0) * int(row.quantity or 0), 2)
+
+
+def _csv_chunks(rows: Iterator[Any]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow([
+            row.order_id, to_ist_iso(row.order_time), row.canteen_id, row.user_id, row.status,
+            row.payment_method, row.payment_status, row.subtotal, row.tax, row.total_amount,
+            row.item_id, row.snapshot_name, row.snapshot_price, row.quantity,
+            _line_total(row) if row.item_id is not None else None,
+            row.item_note,
+        ])
+        pending += 1
+        if pending >= EXPORT_FLUSH_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows: Iterator[Any]) -> Iterator[str]:
+    # Rows arrive ordered by order id, so only the current order is ever buffered.
+    current: Optional[Dict[str, Any]] = None
+    lines: List[str] = []
+    for row in rows:
+        if current is None or current["order_id"] != row.order_id:
+            if current is not None:
+                lines.append(json.dumps(current))
+                if len(lines) >= EXPORT_FLUSH_ROWS:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            current = {
+                "order_id": row.order_id,
+                "order_time": to_ist_iso(row.order_time),
+                "canteen_id": row.canteen_id,
+                "user_id": row.user_id,
+                "status": row.status,
+                "payment_method": row.payment_method,
+                "payment_status": row.payment_status,
+                "subtotal": row.subtotal,
+                "tax": row.tax,
+                "total_amount": row.total_amount,
+                "items": [],
+            }
+        if row.item_id is not None:
+            current["items"].append({
+                "item_id": row.item_id,
+                "name": row.snapshot_name,
+                "unit_price": row.snapshot_price,
+                "quantity": row.quantity,
+                "line_total": _line_total(row),
+                "note": row.item_note,
+            })
+    if current is not None:
+        lines.append(json.dumps(current))
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _ensure_export_access(user, canteen_id: Optional[int]) -> None:
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentication required.")
+    if user.role == "admin":
+        return
+    if canteen_id is None:
+        raise HTTPException(status_code=400, detail="canteen_id is required.")
+    db = SessionLocal()
+    try:
+        canteen = db.query(Canteen).filter(Canteen.id == canteen_id).first()
+        if not canteen:
+            raise HTTPException(status_code=404, detail="Canteen not found.")
+        if canteen.user_id != user.id and not any(s.id == user.id for s in canteen.staff):
+            raise HTTPException(status_code=403, detail="You can only export orders for your own canteen.")
+    finally:
+        db.close()
+
+
+@router.get("/orders")
+def export_orders(
+    request: Request,
+    canteen_id: Optional[int] = None,
+    from_day: Optional[date] = Query(None, alias="from"),
+    to_day: Optional[date] = Query(None, alias="to"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+):
+    """
+    Streams the orders of a canteen (admins may omit canteen_id to export all
+    canteens) placed between two inclusive IST dates.
+    """
+    _ensure_export_access(request.scope.get("user"), canteen_id)
+    if from_day and to_day and from_day > to_day:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+
+    start, end = _day_bounds_utc(from_day, to_day)
+    rows = _stream_rows(_export_statement(canteen_id, start, end))
+
+    scope = f"canteen-{canteen_id}" if canteen_id is not None else "all"
+    period = f"{from_day or 'start'}_{to_day or 'now'}"
+    if format == "ndjson":
+        body, media_type, ext = _ndjson_chunks(rows), "application/x-ndjson", "ndjson"
+    else:
+        body, media_type, ext = _csv_chunks(rows), "text/csv", "csv"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders_{scope}_{period}.{ext}"'},
+    )
@@ -0,0 +1,220 @@
+"""
+HTTP-cacheable GET endpoints for read-mostly catalog queries.
+
+GET /api/cached/{operation}[?canteenId=...]
+
+Each operation is a persisted GraphQL document (the same selections the
+frontend sends) executed against the normal schema. Responses carry a strong
+ETag (sha256 of the body) and Cache-Control, so browsers and nginx can cache
+and revalidate them.
+
+The serialized body is kept in memory together with the state it was built
+from: the catalog version, plus for menus the canteen's stock levels (which
+are not part of the catalog). While that state is unchanged, a request is
+answered from memory, and `If-None-Match` gets a 304, without running any
+resolver. ETags are content hashes, so they stay valid across workers.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.helpers.catalog import catalog
+from app.models.menu_item import MenuItem
+from app.schema import schema
+
+router = APIRouter(prefix="/api/cached", tags=["Cache"])
+
+HTTP_CACHE_MAX_ENTRIES = 512
+
+_CANTEEN_FIELDS = """
+      id
+      name
+      location
+      image
+      rating
+      openTime
+      closeTime
+      isOpen
+      description
+      phone
+      email
+      tags
+      userId
+"""
+
+_MENU_ITEM_FIELDS = """
+      id
+      canteenId
+      canteenName
+      name
+      description
+      price
+      category
+      image
+      tags
+      rating
+      ratingCount
+      isAvailable
+      isVegetarian
+      isFeatured
+      isPopular
+      preparationTime
+      customizationOptions {
+        sizes {
+          name
+          price
+        }
+        additions {
+          name
+          price
+        }
+        removals
+      }
+      stockCount
+"""
+
+
+def _canteen_stock_state(db: Session, variables: Dict[str, Any]) -> int:
+    rows = db.execute(
+        select(MenuItem.id, MenuItem.stock_count)
+        .where(MenuItem.canteen_id == variables["canteenId"])
+        .order_by(MenuItem.id)
+    ).all()
+    return hash(tuple(tuple(row) for row in rows))
+
+
+class PersistedQuery(NamedTuple):
+    document: str
+    # Cache-Control max-age in seconds
+    max_age: int
+    # Query-string parameters passed as Int! variables
+    int_params: Tuple[str, ...] = ()
+    # Extra state besides the catalog version that the result depends on
+    extra_state: Optional[Callable[[Session, Dict[str, Any]], Any]] = None
+
+
+PERSISTED_QUERIES: Dict[str, PersistedQuery] = {
+    "getAllCanteens": PersistedQuery(
+        document="query GetAllCanteens {\n  getAllCanteens {" + _CANTEEN_FIELDS + "  }\n}",
+        max_age=60,
+    ),
+    "getOpenCanteens": PersistedQuery(
+        document="query GetOpenCanteens {\n  getOpenCanteens {" + _CANTEEN_FIELDS + "  }\n}",
+        max_age=60,
+    ),
+    "getMenuItemsByCanteen": PersistedQuery(
+        document=(
+            "query GetMenuItemsByCanteen($canteenId: Int!) {\n"
+            "  getMenuItemsByCanteen(canteenId: $canteenId) {" + _MENU_ITEM_FIELDS + "  }\n}"
+        ),
+        # Stock moves with every order; keep shared caches short-lived
+        max_age=10,
+        int_params=("canteenId",),
+        extra_state=_canteen_stock_state,
+    ),
+}
+
+
+class CachedResponse(NamedTuple):
+    state: Any
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """LRU of serialized responses keyed by (operation, variables)."""
+    def __init__(self, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Tuple[str, str], state: Any) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.state != state:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple[str, str], entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def _variables(query: PersistedQuery, request: Request) -> Dict[str, Any]:
+    variables: Dict[str, Any] = {}
+    for name in query.int_params:
+        raw = request.query_params.get(name)
+        if raw is None:
+            raise HTTPException(status_code=400, detail=f"Missing query parameter '{name}'.")
+        try:
+            variables[name] = int(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Query parameter '{name}' must be an integer.")
+    return variables
+
+
+@router.get("/{operation}")
+async def cached_query(operation: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Runs a persisted read-only query, answering from memory / with 304 while its data is unchanged."""
+    query = PERSISTED_QUERIES.get(operation)
+    if query is None:
+        raise HTTPException(status_code=404, detail=f"Unknown operation '{operation}'.")
+    variables = _variables(query, request)
+
+    state = (catalog.get(db).version, query.extra_state(db, variables) if query.extra_state else None)
+    key = (operation, json.dumps(variables, sort_keys=True))
+    cache_control = f"public, max-age={query.max_age}, stale-while-revalidate={query.max_age * 2}"
+
+    entry = response_cache.get(key, state)
+    if entry is None:
+        context = {"request": request, "response": response, "user": request.scope.get("user"), "db": db}
+        result = await schema.execute(query.document, variable_values=variables, context_value=context)
+        if result.errors:
+            # Errors are never cached
+            return Response(
+                content=json.dumps({"data": result.data, "errors": [e.formatted for e in result.errors]}),
+                media_type="application/json",
+                headers={"Cache-Control": "no-store"},
+            )
+        body = json.dumps({"data": result.data}, separators=(",", ":")).encode()
+        entry = CachedResponse(state=state, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+        response_cache.put(key, entry)
+
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,178 @@
+"""
+Faceted menu browsing over precomputed per-canteen bitset indexes.
+
+For each canteen the catalog snapshot yields a `CanteenMenuIndex`: the
+canteen's items in a fixed order, and for every category, tag, price band and
+the vegetarian flag an int whose bit i is set when item i has that value.
+Filtering is AND/OR of those ints and facet counts are `int.bit_count()`, so a
+browse request costs a few dozen integer operations plus one page of sorting
+(pre-sorted orders per sort key). Indexes are memoised on the snapshot and
+rebuilt only when the catalog version changes.
+"""
+from functools import partial
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.helpers.catalog import CatalogMenuItem, CatalogSnapshot, catalog
+from app.helpers.search import MAX_PAGE_SIZE, VEGETARIAN_TAG
+from app.models.menu_item import BrowseSort
+
+# (label, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS: Tuple[Tuple[str, float, float], ...] = (
+    ("under-50", 0.0, 50.0),
+    ("50-100", 50.0, 100.0),
+    ("100-200", 100.0, 200.0),
+    ("200-plus", 200.0, float("inf")),
+)
+
+
+def price_band(price: float) -> str:
+    for label, low, high in PRICE_BANDS:
+        if low <= price < high:
+            return label
+    return PRICE_BANDS[0][0]
+
+
+class BrowseQuery(NamedTuple):
+    categories: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+    vegetarian: Optional[bool] = None
+    price_bands: Tuple[str, ...] = ()
+    available_only: bool = False
+
+
+class BrowseOutcome(NamedTuple):
+    items: List[CatalogMenuItem]
+    total: int
+    categories: List[Tuple[str, int]]
+    tags: List[Tuple[str, int]]
+    price_bands: List[Tuple[str, int]]
+    vegetarian: int
+    non_vegetarian: int
+
+
+def _key(value: str) -> str:
+    return value.strip().casefold()
+
+
+def _bits(values: Dict[str, int], position: int, key: str) -> None:
+    values[key] = values.get(key, 0) | (1 << position)
+
+
+class CanteenMenuIndex:
+    def __init__(self, items: List[CatalogMenuItem]):
+        self.items = items
+        self.all = (1 << len(items)) - 1
+        self.categories: Dict[str, int] = {}
+        self.tags: Dict[str, int] = {}
+        self.price_bands: Dict[str, int] = {label: 0 for label, _, _ in PRICE_BANDS}
+        self.vegetarian = 0
+        self.available = 0
+        # Display label for each casefolded key (first spelling seen wins)
+        self.labels: Dict[str, str] = {}
+
+        vegetarian_key = _key(VEGETARIAN_TAG)
+        for position, item in enumerate(items):
+            if item.category:
+                key = _key(item.category)
+                self.labels.setdefault(key, item.category)
+                _bits(self.categories, position, key)
+            for tag in item.tags:
+                key = _key(tag)
+                self.labels.setdefault(key, tag)
+                _bits(self.tags, position, key)
+                if key == vegetarian_key:
+                    self.vegetarian |= 1 << position
+            _bits(self.price_bands, position, price_band(item.price))
+            if item.is_available:
+                self.available |= 1 << position
+
+        positions = range(len(items))
+        self.orders: Dict[BrowseSort, List[int]] = {
+            BrowseSort.POPULAR: sorted(
+                positions, key=lambda i: (not items[i].is_popular, -items[i].rating, -items[i].rating_count, items[i].id)
+            ),
+            BrowseSort.PRICE_ASC: sorted(positions, key=lambda i: (items[i].price, items[i].id)),
+            BrowseSort.PRICE_DESC: sorted(positions, key=lambda i: (-items[i].price, items[i].id)),
+            BrowseSort.RATING: sorted(positions, key=lambda i: (-items[i].rating, -items[i].rating_count, items[i].id)),
+            BrowseSort.NAME: sorted(positions, key=lambda i: (items[i].name.casefold(), items[i].id)),
+        }
+
+    def _any_of(self, values: Dict[str, int], wanted: Iterable[str]) -> int:
+        wanted = [_key(value) for value in wanted]
+        if not wanted:
+            return self.all
+        mask = 0
+        for key in wanted:
+            mask |= values.get(key, 0)
+        return mask
+
+    def _all_of(self, values: Dict[str, int], wanted: Iterable[str]) -> int:
+        mask = self.all
+        for value in wanted:
+            mask &= values.get(_key(value), 0)
+        return mask
+
+    def _counts(self, values: Dict[str, int], base: int, labelled: bool = True) -> List[Tuple[str, int]]:
+        return [(self.labels.get(key, key) if labelled else key, (base & bits).bit_count()) for key, bits in values.items()]
+
+    def browse(self, query: BrowseQuery, sort: BrowseSort, limit: int, offset: int) -> BrowseOutcome:
+        category_mask = self._any_of(self.categories, query.categories)
+        tag_mask = self._all_of(self.tags, query.tags)
+        band_mask = self._any_of(self.price_bands, query.price_bands)
+        if query.vegetarian is None:
+            veg_mask = self.all
+        else:
+            veg_mask = self.vegetarian if query.vegetarian else self.all & ~self.vegetarian
+        available_mask = self.available if query.available_only else self.all
+
+        common = tag_mask & available_mask
+        matched = common & category_mask & band_mask & veg_mask
+
+        # Each facet's counts apply the filters of every other facet
+        categories = self._counts(self.categories, common & band_mask & veg_mask)
+        tags = self._counts(self.tags, matched)
+        bands = self._counts(self.price_bands, common & category_mask & veg_mask, labelled=False)
+        veg_base = common & category_mask & band_mask
+
+        page: List[CatalogMenuItem] = []
+        if matched:
+            skipped = 0
+            for position in self.orders[sort]:
+                if not (matched >> position) & 1:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page.append(self.items[position])
+                if len(page) >= limit:
+                    break
+
+        return BrowseOutcome(
+            items=page,
+            total=matched.bit_count(),
+            categories=sorted((c for c in categories if c[1]), key=lambda c: (-c[1], c[0])),
+            tags=sorted((t for t in tags if t[1]), key=lambda t: (-t[1], t[0])),
+            price_bands=bands,
+            vegetarian=(veg_base & self.vegetarian).bit_count(),
+            non_vegetarian=(veg_base & ~self.vegetarian).bit_count(),
+        )
+
+
+def _build_canteen_index(canteen_id: int, snapshot: CatalogSnapshot) -> CanteenMenuIndex:
+    return CanteenMenuIndex([item for item in snapshot.menu_items if item.canteen_id == canteen_id])
+
+
+def browse_menu(
+    db: Session,
+    canteen_id: int,
+    query: Optional[BrowseQuery] = None,
+    sort: BrowseSort = BrowseSort.POPULAR,
+    limit: int = 50,
+    offset: int = 0,
+) -> BrowseOutcome:
+    """One page of a canteen's menu matching `query`, with facet counts, from the cached catalog."""
+    snapshot = catalog.get(db)
+    index: CanteenMenuIndex = snapshot.derived(f"browse:{canteen_id}", partial(_build_canteen_index, canteen_id))
+    return index.browse(query or BrowseQuery(), sort, max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset))
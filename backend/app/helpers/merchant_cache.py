@@ -0,0 +1,146 @@
+"""
+In-process cache of merchant credentials and their prebuilt payment adapters.
+
+Merchant rows change almost never, but the payment path used to load them on
+every initiate/verify call. Entries are keyed by both canteen id and merchant
+id, expire after a TTL, and are dropped explicitly whenever a Merchant row is
+inserted, updated or deleted through the ORM. The drop happens once the
+transaction commits, as for the catalog (app.helpers.catalog): dropping at
+flush time would let a concurrent request reload and cache the old row (and
+its old keys) before the change is visible.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.helpers.payment_adapters import PaymentProcessor, get_payment_processor
+from app.helpers.payment_repository import MerchantRepository
+from app.models.payment import Merchant, PaymentMethod
+
+MERCHANT_CACHE_TTL_SECONDS = float(os.getenv("MERCHANT_CACHE_TTL_SECONDS", "600"))
+
+
+class MerchantSnapshot(BaseModel):
+    """A session-independent copy of a Merchant row."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    canteen_id: int
+    name: str
+    razorpay_merchant_id: str
+    razorpay_key_id: str
+    razorpay_key_secret: str
+    is_active: bool = True
+
+    @property
+    def credentials(self) -> Dict[str, str]:
+        return {"key_id": self.razorpay_key_id, "key_secret": self.razorpay_key_secret}
+
+
+class MerchantCacheEntry:
+    """A cached merchant together with its ready-to-use UPI adapter."""
+    __slots__ = ("merchant", "processor", "expires_at")
+
+    def __init__(self, merchant: MerchantSnapshot, processor: PaymentProcessor, expires_at: float):
+        self.merchant = merchant
+        self.processor = processor
+        self.expires_at = expires_at
+
+
+class MerchantCache:
+    """Thread-safe TTL cache of merchants keyed by canteen id and merchant id."""
+    def __init__(self, ttl_seconds: float = MERCHANT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._by_canteen: Dict[int, MerchantCacheEntry] = {}
+        self._by_id: Dict[int, MerchantCacheEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, index: Dict[int, MerchantCacheEntry], key: int) -> Optional[MerchantCacheEntry]:
+        with self._lock:
+            entry = index.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _store(self, merchant: Merchant) -> MerchantCacheEntry:
+        return self.put(MerchantSnapshot.model_validate(merchant))
+
+    def put(self, snapshot: MerchantSnapshot) -> MerchantCacheEntry:
+        """Caches a merchant that was already loaded elsewhere (e.g. by a joined query)."""
+        # UPI adapters don't use the session, so one instance can be shared.
+        processor = get_payment_processor(PaymentMethod.UPI, None, snapshot.credentials)
+        entry = MerchantCacheEntry(snapshot, processor, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            self._by_canteen[snapshot.canteen_id] = entry
+            self._by_id[snapshot.id] = entry
+        return entry
+
+    def peek_by_canteen_id(self, canteen_id: int) -> Optional[MerchantCacheEntry]:
+        """Returns the cached entry for a canteen without touching the database."""
+        return self._lookup(self._by_canteen, canteen_id)
+
+    def get_by_canteen_id(self, db: Session, canteen_id: int) -> Optional[MerchantCacheEntry]:
+        """Returns the cached merchant for a canteen, loading it on a miss."""
+        entry = self._lookup(self._by_canteen, canteen_id)
+        if entry is not None:
+            return entry
+        merchant = MerchantRepository(db).get_by_canteen_id(canteen_id)
+        return self._store(merchant) if merchant else None
+
+    def get_by_id(self, db: Session, merchant_id: int) -> Optional[MerchantCacheEntry]:
+        """Returns the cached merchant by primary key, loading it on a miss."""
+        entry = self._lookup(self._by_id, merchant_id)
+        if entry is not None:
+            return entry
+        merchant = MerchantRepository(db).get_by_id(merchant_id)
+        return self._store(merchant) if merchant else None
+
+    def invalidate(self, merchant_id: Optional[int] = None, canteen_id: Optional[int] = None) -> None:
+        """Drops every entry matching either key."""
+        with self._lock:
+            for entry in (self._by_id.get(merchant_id), self._by_canteen.get(canteen_id)):
+                if entry is not None:
+                    self._by_id.pop(entry.merchant.id, None)
+                    self._by_canteen.pop(entry.merchant.canteen_id, None)
+            self._by_id.pop(merchant_id, None)
+            self._by_canteen.pop(canteen_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_canteen.clear()
+            self._by_id.clear()
+
+
+merchant_cache = MerchantCache()
+
+
+# Session.info key: (merchant id, canteen id) pairs flushed in the current transaction
+_CHANGED_KEY = "merchant_cache_changed"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_merchants_changed(session: Session, flush_context) -> None:
+    changed = [obj for obj in list(session.new) + list(session.dirty) + list(session.deleted) if isinstance(obj, Merchant)]
+    if changed:
+        pending: Set[Tuple[Optional[int], Optional[int]]] = session.info.setdefault(_CHANGED_KEY, set())
+        pending.update((merchant.id, merchant.canteen_id) for merchant in changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_merchants(session: Session) -> None:
+    for merchant_id, canteen_id in session.info.pop(_CHANGED_KEY, ()):
+        merchant_cache.invalidate(merchant_id=merchant_id, canteen_id=canteen_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_merchant_marks(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,280 @@
+"""
+In-process metrics, exposed at GET /api/metrics in the Prometheus text format.
+
+Nothing here needs a metrics library or an external service. Latency
+histograms are recorded by `QueryStatsMiddleware` (per route and per GraphQL
+operation) and by `ResolverTimingExtension` (per root resolver). Everything
+else is read from the helpers that already keep counters when the endpoint
+is scraped:
+
+- SQL statements per operation (app.helpers.query_stats)
+- parse/validation time and APQ hits (app.helpers.persisted_queries)
+- query cost histograms (app.helpers.query_cost)
+- connection pool usage and checkout wait (engine.pool)
+- cache hits/misses: merchant_cache, bucket_cache, price_tables, catalog,
+  the document cache and the HTTP response cache
+- how long this worker took to start, by phase (filled in by app.main)
+
+Counters are per worker process; scrape each worker (or run one) to get
+totals. Scrapers send METRICS_TOKEN as a bearer token; admins are always
+allowed. Without a token nobody else is, unless METRICS_PUBLIC=1 opens the
+endpoint explicitly (local development).
+"""
+import inspect
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from strawberry.extensions import SchemaExtension
+
+router = APIRouter(prefix="/api", tags=["Metrics"])
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC") == "1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds per startup phase ("imports", "database", "total"), set once by the app's lifespan
+startup_seconds: Dict[str, float] = {}
+
+
+class Histogram:
+    """A labelled histogram with fixed upper bounds (cumulative on export, as Prometheus expects)."""
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One slot per bucket, then +Inf, count and sum
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+
+http_request_duration = Histogram()
+graphql_operation_duration = Histogram()
+resolver_duration = Histogram()
+pool_wait = Histogram((0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0))
+
+
+class ResolverTimingExtension(SchemaExtension):
+    """Times root (Query/Mutation) resolvers; nested fields are plain attribute reads."""
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+        labels = (f"{info.parent_type.name}.{info.field_name}",)
+        started = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if inspect.isawaitable(result):
+            async def timed():
+                try:
+                    return await result
+                finally:
+                    resolver_duration.observe(labels, time.perf_counter() - started)
+            return timed()
+        resolver_duration.observe(labels, time.perf_counter() - started)
+        return result
+
+
+def instrument_pool(pool) -> None:
+    """
+    Records how long each connection checkout waits on the pool (including
+    opening a new connection). SQLAlchemy has no pre-checkout event, so the
+    pool's `_do_get` is wrapped on this instance.
+    """
+    original = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return original()
+        finally:
+            pool_wait.observe((), time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+# ===================================================================
+# TEXT EXPOSITION
+# ===================================================================
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, names: Sequence[str] = (), values: Sequence[Any] = ()) -> None:
+        self.lines.append(f"{name}{_format_labels(names, values)} {_number(value)}")
+
+    def metric(self, name: str, kind: str, help_text: str, value: float) -> None:
+        self.family(name, kind, help_text)
+        self.sample(name, value)
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram, label_names: Sequence[str]) -> None:
+        self.family(name, "histogram", help_text)
+        for labels, series in sorted(histogram.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, series):
+                cumulative += int(count)
+                self.sample(f"{name}_bucket", cumulative, (*label_names, "le"), (*labels, _number(float(bound))))
+            cumulative += int(series[len(histogram.buckets)])
+            self.sample(f"{name}_bucket", cumulative, (*label_names, "le"), (*labels, "+Inf"))
+            self.sample(f"{name}_count", int(series[-2]), label_names, labels)
+            self.sample(f"{name}_sum", series[-1], label_names, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _cache_metrics(writer: MetricsWriter, caches: Iterable[Tuple[str, Any]]) -> None:
+    caches = list(caches)
+    for suffix, attribute in (("hits", "hits"), ("misses", "misses")):
+        name = f"smartcanteen_cache_{suffix}_total"
+        writer.family(name, "counter", f"Cache {suffix} per cache.")
+        for cache_name, cache in caches:
+            writer.sample(name, getattr(cache, attribute), ("cache",), (cache_name,))
+    writer.family("smartcanteen_cache_hit_ratio", "gauge", "hits / (hits + misses) per cache.")
+    for cache_name, cache in caches:
+        total = cache.hits + cache.misses
+        writer.sample("smartcanteen_cache_hit_ratio", cache.hits / total if total else 0.0, ("cache",), (cache_name,))
+
+
+def render_metrics() -> str:
+    # Imported lazily: these modules import models and the schema, which import this one
+    from app.core.database import engine
+    from app.helpers.analytics import bucket_cache
+    from app.helpers.catalog import catalog
+    from app.helpers.http_cache import response_cache
+    from app.helpers.merchant_cache import merchant_cache
+    from app.helpers.persisted_queries import document_stats, persisted_queries
+    from app.helpers.pricing import price_tables
+    from app.helpers.query_cost import COST_BUCKETS, cost_histograms
+    from app.helpers.query_stats import operation_query_stats
+    from app.helpers.tracing import slow_traces
+
+    writer = MetricsWriter()
+
+    writer.histogram(
+        "smartcanteen_http_request_duration_seconds", "HTTP request latency by route.",
+        http_request_duration, ("route", "method", "status"),
+    )
+    writer.histogram(
+        "smartcanteen_graphql_operation_duration_seconds", "GraphQL request latency by operation.",
+        graphql_operation_duration, ("operation",),
+    )
+    writer.histogram(
+        "smartcanteen_graphql_resolver_duration_seconds", "Root resolver latency.",
+        resolver_duration, ("field",),
+    )
+
+    operations = sorted(operation_query_stats.items())
+    for name, help_text, attribute in (
+        ("smartcanteen_db_statements_total", "SQL statements executed, by operation or route.", "statements"),
+        ("smartcanteen_db_seconds_total", "Time spent in SQL statements, by operation or route.", "db_seconds"),
+        ("smartcanteen_db_requests_total", "Requests accounted in the statement counters.", "requests"),
+    ):
+        writer.family(name, "counter", help_text)
+        for label, totals in operations:
+            writer.sample(name, getattr(totals, attribute), ("operation",), (label,))
+    writer.family("smartcanteen_db_max_statements_per_request", "gauge", "Most statements one request has run.")
+    for label, totals in operations:
+        writer.sample("smartcanteen_db_max_statements_per_request", totals.max_statements, ("operation",), (label,))
+
+    pool = engine.pool
+    for name, help_text, getter in (
+        ("smartcanteen_db_pool_size", "Configured pool size.", "size"),
+        ("smartcanteen_db_pool_checked_out", "Connections currently checked out.", "checkedout"),
+        ("smartcanteen_db_pool_checked_in", "Idle connections in the pool.", "checkedin"),
+        ("smartcanteen_db_pool_overflow", "Connections open beyond pool_size (negative: unused capacity).", "overflow"),
+    ):
+        if hasattr(pool, getter):
+            writer.metric(name, "gauge", help_text, getattr(pool, getter)())
+    writer.histogram("smartcanteen_db_pool_wait_seconds", "Time spent waiting for a pooled connection.", pool_wait, ())
+
+    writer.metric("smartcanteen_graphql_parse_seconds_total", "counter", "Time spent parsing queries.", document_stats.parse_seconds)
+    writer.metric("smartcanteen_graphql_parses_total", "counter", "Queries parsed (document cache misses).", document_stats.parse_count)
+    writer.metric("smartcanteen_graphql_validate_seconds_total", "counter", "Time spent validating queries.", document_stats.validate_seconds)
+    writer.metric("smartcanteen_graphql_validations_total", "counter", "Queries validated.", document_stats.validate_count)
+    writer.family("smartcanteen_graphql_apq_total", "counter", "Automatic persisted query lookups by outcome.")
+    for outcome, value in (("hit", document_stats.apq_hits), ("miss", document_stats.apq_misses), ("registered", document_stats.apq_registered)):
+        writer.sample("smartcanteen_graphql_apq_total", value, ("outcome",), (outcome,))
+    writer.metric("smartcanteen_graphql_apq_stored", "gauge", "Registered persisted queries in memory.", len(persisted_queries))
+
+    name = "smartcanteen_graphql_query_cost"
+    writer.family(name, "histogram", "Estimated query cost by operation.")
+    for label, histogram in sorted(cost_histograms.items()):
+        cumulative = 0
+        for bound, count in zip(COST_BUCKETS, histogram.buckets):
+            cumulative += count
+            writer.sample(f"{name}_bucket", cumulative, ("operation", "le"), (label, str(bound)))
+        writer.sample(f"{name}_bucket", histogram.count, ("operation", "le"), (label, "+Inf"))
+        writer.sample(f"{name}_count", histogram.count, ("operation",), (label,))
+        writer.sample(f"{name}_sum", histogram.sum, ("operation",), (label,))
+    writer.family("smartcanteen_graphql_cost_rejections_total", "counter", "Operations rejected by the cost limiter.")
+    for label, histogram in sorted(cost_histograms.items()):
+        writer.sample("smartcanteen_graphql_cost_rejections_total", histogram.rejected, ("operation",), (label,))
+
+    _cache_metrics(writer, (
+        ("merchant", merchant_cache),
+        ("analytics_buckets", bucket_cache),
+        ("price_tables", price_tables),
+        ("catalog", catalog),
+        ("graphql_documents", document_stats),
+        ("http_responses", response_cache),
+    ))
+    writer.metric("smartcanteen_traces_recorded_total", "counter", "Operations sampled by the tracing extension.", slow_traces.recorded)
+    writer.metric("smartcanteen_catalog_version", "gauge", "Catalog version in this worker.", catalog.version)
+    writer.family("smartcanteen_startup_seconds", "gauge", "How long this worker took to start, by phase.")
+    for phase, seconds in startup_seconds.items():
+        writer.sample("smartcanteen_startup_seconds", seconds, ("phase",), (phase,))
+    return writer.render()
+
+
+def _allowed(request: Request) -> bool:
+    user = request.scope.get("user")
+    if user is not None and getattr(user, "role", None) == "admin":
+        return True
+    if METRICS_TOKEN and request.headers.get("authorization") == f"Bearer {METRICS_TOKEN}":
+        return True
+    return METRICS_PUBLIC
+
+
+@router.get("/metrics")
+def metrics(request: Request):
+    """Prometheus text-format metrics for this worker."""
+    if not _allowed(request):
+        raise HTTPException(status_code=401, detail="Metrics token required.")
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,6 @@
 import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import inspect
 from passlib.context import CryptContext
 
 # It's crucial to adjust the import paths if this script is in a 'scripts' directory
@@ -9,7 +9,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.core.database import engine, Base, SessionLocal
+from app.core.database import engine, SessionLocal
 from app.models.canteen import Canteen
 from app.models.menu_item import MenuItem
 from app.models.user import User, user_favorite_canteen_association
@@ -37,9 +37,13 @@ def add_mock_users(db: Session):
         {"id": "d4e5f6a7-b8c9-0123-def1-234567890123", "name": "Vendor North", "email": "dileepkumar.adari@students.iiit.ac.in", "password": DEV_VENDOR_PASSWORD, "role": "vendor"},
     ]
     
+    # bcrypt is slow on purpose: hash each distinct password once, and look the
+    # users up in one query rather than one per row
+    hashes = {password: pwd_context.hash(password) for password in {u["password"] for u in users_data}}
+    existing_users = {u.id: u for u in db.query(User).filter(User.id.in_([u["id"] for u in users_data]))}
     for user_data in users_data:
-        existing_user = db.query(User).filter(User.id == user_data["id"]).first()
-        hashed_password = pwd_context.hash(user_data["password"])
+        existing_user = existing_users.get(user_data["id"])
+        hashed_password = hashes[user_data["password"]]
         if not existing_user:
             db.add(User(**{k:v for k,v in user_data.items() if k != 'password'}, password=hashed_password))
         else:
@@ -50,9 +54,10 @@ def add_mock_users(db: Session):
             db.add(existing_user)
     db.commit()
 
+    with_wallets = {uid for (uid,) in db.query(UserWallet.user_id).filter(UserWallet.user_id.in_([u["id"] for u in users_data]))}
     for user_data in users_data:
         uid = user_data["id"]
-        if not db.query(UserWallet).filter(UserWallet.user_id == uid).first():
+        if uid not in with_wallets:
             balance = 250.0 if user_data["role"] == "student" else 1000.0
             db.add(UserWallet(user_id=uid, balance=balance))
     db.commit()
@@ -100,8 +105,9 @@ def add_mock_canteens(db: Session):
         },
     ]
     
+    existing_ids = {cid for (cid,) in db.query(Canteen.id).filter(Canteen.id.in_([c["id"] for c in canteens_data]))}
     for canteen_data in canteens_data:
-        if not db.query(Canteen).filter(Canteen.id == canteen_data["id"]).first():
+        if canteen_data["id"] not in existing_ids:
             db.add(Canteen(**canteen_data))
     db.commit()
     print("✅ Canteens seeded.")
@@ -256,8 +262,9 @@ def add_mock_menu_items(db: Session):
         },
     ]
     
+    existing_items = {i.id: i for i in db.query(MenuItem).filter(MenuItem.id.in_([i["id"] for i in menu_items_data]))}
     for item_data in menu_items_data:
-        existing = db.query(MenuItem).filter(MenuItem.id == item_data["id"]).first()
+        existing = existing_items.get(item_data["id"])
         if not existing:
             db.add(MenuItem(**item_data))
         else:
@@ -380,8 +387,9 @@ def add_mock_merchants(db: Session):
     """Adds mock merchants for all canteens."""
     print("Seeding merchants...")
     all_canteens = db.query(Canteen).all()
+    with_merchants = {cid for (cid,) in db.query(Merchant.canteen_id)}
     for canteen in all_canteens:
-        if not db.query(Merchant).filter(Merchant.canteen_id == canteen.id).first():
+        if canteen.id not in with_merchants:
             db.add(Merchant(
                 canteen_id=canteen.id, name=f"{canteen.name} Merchant",
                 razorpay_merchant_id=f"merchant_{canteen.id}",
@@ -396,20 +404,11 @@ def initialize_mock_data():
     print("--- Starting Database Seeding ---")
     db = SessionLocal()
     try:
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created/verified.")
-        # Ensure DB schema includes new columns added in code (idempotent)
-        try:
-            # Add stock_count column if it doesn't exist (safe to run multiple times).
-            # Use sqlalchemy.text() to execute a textual SQL expression explicitly.
-            db.execute(text("ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS stock_count INTEGER DEFAULT 0;"))
-            db.commit()
-            print("✅ Ensured 'stock_count' column exists on menu_items.")
-        except Exception as e:
-            # If this fails, rollback and continue; later operations may still work if column is present.
-            db.rollback()
-            print(f"⚠️ Could not ensure 'stock_count' column: {e}")
-        
+        # The schema comes from the migrations (`alembic upgrade head`), which
+        # docker-compose runs before this script
+        if not inspect(engine).has_table("alembic_version"):
+            raise RuntimeError("The database has no schema yet: run `alembic upgrade head` first.")
+
         add_mock_users(db)
         add_mock_canteens(db)
         add_mock_menu_items(db)
@@ -428,4 +427,16 @@ def initialize_mock_data():
         print("--- Database Seeding Finished ---")
 
 if __name__ == "__main__":
-    initialize_mock_data()
\ No newline at end of file
+    import argparse
+    from app.helpers.synthetic_data import SyntheticScale, add_scale_arguments, generate, scale_from_args
+
+    parser = argparse.ArgumentParser(description="Seed the mock fixtures, optionally followed by synthetic volume.")
+    add_scale_arguments(parser, SyntheticScale(orders=0))
+    args = parser.parse_args()
+
+    initialize_mock_data()
+    if args.orders > 0:
+        # Appended after the fixtures (ids continue from theirs); see app/helpers/synthetic_data.py
+        print("--- Generating synthetic data ---")
+        result = generate(scale_from_args(args))
+        print(f"✅ Generated {result['orders']} orders in {result['total_seconds']:.1f}s")
\ No newline at end of file
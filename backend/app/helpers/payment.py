@@ -5,9 +5,8 @@ import traceback
 
 from app.core.database import get_db
 from app.helpers.payment_service import PaymentService
-from app.models.payment import Merchant, PaymentMethod
-from sqlalchemy import text
-from app.models.order import Order
+from app.helpers.merchant_cache import merchant_cache
+from app.models.payment import PaymentMethod
 from app.helpers.exceptions import ServiceError, PaymentVerificationError
 from pydantic import BaseModel
 from typing import Any, Dict, Optional
@@ -59,11 +58,11 @@ async def get_merchant_details(canteen_id: int, db: Session = Depends(get_db)):
     Retrieves the public details of a merchant, such as the Razorpay Key ID,
     which is needed by the frontend to initialize the payment process.
     """
-    merchant = db.query(Merchant).filter(Merchant.canteen_id == canteen_id).first()
-    if not merchant:
+    cached = merchant_cache.get_by_canteen_id(db, canteen_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Merchant not found for this canteen.")
     
-    return merchant
+    return cached.merchant
 
 @router.post("/initiate", response_model=InitiatePaymentResponse)
 async def initiate_payment_for_order(
@@ -79,34 +78,19 @@ async def initiate_payment_for_order(
     """
     payment_service = PaymentService(db)
     try:
-        # For a real implementation, you would get the user ID from the auth dependency.
-        # In dev mode (no auth), fall back to the actual order owner so local testing works.
-        user_id_from_auth = None
-        try:
-            # Try to read the order owner from the DB using a raw query to avoid ORM mapper init issues
-            res = db.execute(text('SELECT user_id FROM orders WHERE id = :id'), {'id': request.order_id}).fetchone()
-            if res and res[0]:
-                user_id_from_auth = res[0]
-        except Exception:
-            # If anything goes wrong, keep user_id_from_auth as None and let the service validate
-            user_id_from_auth = None
-
-        # If still not determined, use a dev placeholder (this will likely fail validation)
-        if not user_id_from_auth:
-            user_id_from_auth = "some_authenticated_user_id"
-        
         # Convert string method to Enum (be forgiving with case from frontend)
         raw_method = request.payment_method
         if isinstance(raw_method, str):
             raw_method = raw_method.lower()
         payment_method_enum = PaymentMethod(raw_method)
 
-        # Log the user id we will use for initiating payment (helps debug permission issues)
-        logging.info("Initiating payment for order %s using user_id=%s and method=%s", request.order_id, user_id_from_auth, payment_method_enum)
+        # For a real implementation, you would pass the user ID from the auth dependency.
+        # Without it (dev mode), the service bills the actual order owner, which it reads
+        # in the same query that loads the order, payment and merchant state.
+        logging.info("Initiating payment for order %s using method=%s", request.order_id, payment_method_enum)
         payment_record = payment_service.initiate_payment(
             order_id=request.order_id,
-            user_id=user_id_from_auth,
-            payment_method=payment_method_enum
+            payment_method=payment_method_enum,
         )
         
         return InitiatePaymentResponse(
@@ -115,7 +99,7 @@ async def initiate_payment_for_order(
             amount=payment_record.amount,
             payment_method=payment_record.payment_method.value,
             processor_order_id=payment_record.razorpay_order_id,
-            processor_data=getattr(payment_record, 'processor_data', {}),
+            processor_data=payment_record.processor_data,
             status=payment_record.payment_status.value
         )
     except ServiceError as e:
@@ -1,7 +1,6 @@
 import uuid
 from typing import Dict, Any, Optional
 
-import razorpay
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
@@ -58,6 +57,9 @@ class PaymentProcessor:
 
 class RazorpayAdapter(PaymentProcessor):
     def __init__(self, key_id: str, key_secret: str):
+        # Imported here: the SDK (and requests) is only needed once a UPI payment is made
+        import razorpay
+
         try:
             self.client = razorpay.Client(auth=(key_id, key_secret))
         except Exception as e:
@@ -0,0 +1,484 @@
+"""
+Nightly payment reconciliation.
+
+Streams the `payments` table with a server-side cursor, compares every stale
+PENDING payment and every recent COMPLETED one (the last `--lookback-days`)
+against the gateway, and writes a diff report as NDJSON (one issue per line). Orders marked `Paid` without a COMPLETED payment
+are reported as well.
+
+Everything is processed in bounded batches, so memory stays constant no matter
+how many payments exist: rows are never accumulated beyond `batch_size`, the
+report is written as it is produced, and fix-ups are flushed (and committed)
+one batch at a time through a separate write session.
+
+Usage:
+    python -m app.helpers.payment_reconciliation --dry-run
+    python -m app.helpers.payment_reconciliation --fake-gateway fixtures.json --report diff.ndjson
+    python -m app.helpers.payment_reconciliation --lookback-days 0   # full audit
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.order import Order
+from app.models.payment import Merchant, Payment, PaymentMethod, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_STALE_MINUTES = 30
+# COMPLETED payments older than this were checked by earlier runs; without a
+# window every run would re-fetch the whole payment history from the gateway.
+# PENDING payments are always checked, however old.
+DEFAULT_LOOKBACK_DAYS = 3
+
+# Order statuses that must not be moved back to 'confirmed' by a fix-up
+# (mirrors the guard in PaymentService.verify_payment).
+_FINAL_ORDER_STATUSES = ["delivered", "cancelled", "confirmed"]
+
+
+# ===================================================================
+# 1. DATA CONTRACTS
+# ===================================================================
+
+class GatewayRecord(BaseModel):
+    """The gateway's view of a single processor order."""
+    processor_order_id: str
+    # Normalized to 'captured', 'failed' or 'pending'; 'error' when the lookup
+    # itself failed and the gateway's state is unknown.
+    status: str
+    processor_payment_id: Optional[str] = None
+    amount: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReconciliationIssue(BaseModel):
+    """A single line of the diff report."""
+    kind: str
+    payment_id: Optional[int] = None
+    order_id: Optional[int] = None
+    local_status: Optional[str] = None
+    gateway_status: Optional[str] = None
+    action: str = "report"
+    detail: Optional[str] = None
+
+
+class ReconciliationReport(BaseModel):
+    """Summary counters for a reconciliation run (never holds the rows themselves)."""
+    scanned_payments: int = 0
+    scanned_orders: int = 0
+    issues: Dict[str, int] = {}
+    fixed_completed: int = 0
+    fixed_failed: int = 0
+    batches: int = 0
+    dry_run: bool = True
+
+    def count(self, kind: str) -> None:
+        self.issues[kind] = self.issues.get(kind, 0) + 1
+
+
+# ===================================================================
+# 2. GATEWAYS
+# ===================================================================
+
+class ReconciliationGateway:
+    """
+    Read-only gateway interface used by the reconciler.
+    `fetch_orders` receives one batch of processor order ids and returns
+    whatever it knows about them; ids missing from the result are unknown to
+    the gateway. Ids that could not be looked up (network or API errors) must
+    come back with status 'error' instead, so they are never failed for it.
+    """
+    def fetch_orders(self, merchant: Optional[Merchant], processor_order_ids: Sequence[str]) -> Dict[str, GatewayRecord]:
+        raise NotImplementedError
+
+
+class RazorpayReconciliationGateway(ReconciliationGateway):
+    """Looks processor orders up on Razorpay, one client per merchant."""
+    def __init__(self):
+        self._clients: Dict[int, Any] = {}
+
+    def _client_for(self, merchant: Merchant):
+        client = self._clients.get(merchant.id)
+        if client is None:
+            import razorpay
+
+            client = razorpay.Client(auth=(merchant.razorpay_key_id, merchant.razorpay_key_secret))
+            self._clients[merchant.id] = client
+        return client
+
+    def fetch_orders(self, merchant: Optional[Merchant], processor_order_ids: Sequence[str]) -> Dict[str, GatewayRecord]:
+        if merchant is None:
+            return {
+                order_id: GatewayRecord(processor_order_id=order_id, status="error", error="merchant not found")
+                for order_id in processor_order_ids
+            }
+        from razorpay.errors import BadRequestError
+
+        client = self._client_for(merchant)
+        records: Dict[str, GatewayRecord] = {}
+        for order_id in processor_order_ids:
+            try:
+                payments = client.order.payments(order_id).get("items", [])
+            except BadRequestError as e:
+                if "does not exist" in str(e).lower():
+                    # Razorpay has no such order: leave it out of the result
+                    continue
+                logger.warning("Razorpay lookup failed for %s: %s", order_id, e)
+                records[order_id] = GatewayRecord(processor_order_id=order_id, status="error", error=str(e))
+                continue
+            except Exception as e:
+                logger.warning("Razorpay lookup failed for %s: %s", order_id, e)
+                records[order_id] = GatewayRecord(processor_order_id=order_id, status="error", error=str(e))
+                continue
+            captured = next((p for p in payments if p.get("status") == "captured"), None)
+            if captured:
+                records[order_id] = GatewayRecord(
+                    processor_order_id=order_id,
+                    status="captured",
+                    processor_payment_id=captured.get("id"),
+                    amount=(captured.get("amount") or 0) / 100,
+                )
+            elif payments and all(p.get("status") == "failed" for p in payments):
+                records[order_id] = GatewayRecord(processor_order_id=order_id, status="failed")
+            else:
+                records[order_id] = GatewayRecord(processor_order_id=order_id, status="pending")
+        return records
+
+
+class FakeReconciliationGateway(ReconciliationGateway):
+    """
+    Offline gateway backed by a fixture, for local runs and demos.
+
+    The fixture is a JSON object keyed by processor order id, e.g.
+    {"order_abc": {"status": "captured", "processor_payment_id": "pay_1", "amount": 120.0}}
+    """
+    def __init__(self, records: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.records = {
+            key: GatewayRecord(processor_order_id=key, **value)
+            for key, value in (records or {}).items()
+        }
+
+    @classmethod
+    def from_fixture(cls, path: str) -> "FakeReconciliationGateway":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def fetch_orders(self, merchant: Optional[Merchant], processor_order_ids: Sequence[str]) -> Dict[str, GatewayRecord]:
+        return {oid: self.records[oid] for oid in processor_order_ids if oid in self.records}
+
+
+# ===================================================================
+# 3. RECONCILER
+# ===================================================================
+
+def _batched(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PaymentReconciler:
+    """
+    Compares local payments with the gateway and applies bounded fix-ups.
+
+    `read_db` is only used for streaming (it keeps its server-side cursor open
+    for the whole run); all writes go through `write_db`, which is committed
+    once per batch.
+    """
+    def __init__(
+        self,
+        read_db: Session,
+        write_db: Session,
+        gateway: ReconciliationGateway,
+        out: IO[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        stale_after: timedelta = timedelta(minutes=DEFAULT_STALE_MINUTES),
+        lookback: Optional[timedelta] = timedelta(days=DEFAULT_LOOKBACK_DAYS),
+        dry_run: bool = True,
+    ):
+        self.read_db = read_db
+        self.write_db = write_db
+        self.gateway = gateway
+        self.out = out
+        self.batch_size = batch_size
+        self.stale_after = stale_after
+        self.lookback = lookback
+        self.report = ReconciliationReport(dry_run=dry_run)
+        self._merchants: Dict[int, Optional[Merchant]] = {}
+
+    # --- helpers -----------------------------------------------------
+
+    def _emit(self, issue: ReconciliationIssue) -> None:
+        self.report.count(issue.kind)
+        self.out.write(issue.json(exclude_none=True) + "\n")
+
+    def _merchant(self, merchant_id: Optional[int]) -> Optional[Merchant]:
+        if merchant_id is None:
+            return None
+        if merchant_id not in self._merchants:
+            merchant = self.write_db.query(Merchant).filter(Merchant.id == merchant_id).first()
+            if merchant is not None:
+                # Detach so per-batch commits don't expire it.
+                self.write_db.expunge(merchant)
+            self._merchants[merchant_id] = merchant
+        return self._merchants[merchant_id]
+
+    def _stream_payments(self, now: datetime) -> Iterator[Any]:
+        checked = Payment.payment_status.in_([PaymentStatus.PENDING, PaymentStatus.COMPLETED])
+        if self.lookback is not None:
+            # created_at is stored naive, in UTC
+            since = (now - self.lookback).replace(tzinfo=None)
+            checked = or_(
+                Payment.payment_status == PaymentStatus.PENDING,
+                and_(Payment.payment_status == PaymentStatus.COMPLETED, Payment.created_at >= since),
+            )
+        # Column rows rather than ORM entities: nothing lands in the identity map.
+        stmt = (
+            select(
+                Payment.id,
+                Payment.order_id,
+                Payment.merchant_id,
+                Payment.amount,
+                Payment.payment_method,
+                Payment.payment_status,
+                Payment.razorpay_order_id,
+                Payment.created_at,
+            )
+            .where(checked)
+            .order_by(Payment.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        return iter(self.read_db.execute(stmt))
+
+    def _stream_paid_orders_without_payment(self) -> Iterator[Any]:
+        completed = exists().where(
+            and_(Payment.order_id == Order.id, Payment.payment_status == PaymentStatus.COMPLETED)
+        )
+        stmt = (
+            select(Order.id, Order.payment_method, Order.status)
+            .where(Order.payment_status == "Paid", ~completed)
+            .order_by(Order.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        return iter(self.read_db.execute(stmt))
+
+    # --- checks ------------------------------------------------------
+
+    def _check_payment_batch(self, rows: List[Any], now: datetime) -> None:
+        candidates = []
+        for row in rows:
+            self.report.scanned_payments += 1
+            if row.payment_method != PaymentMethod.UPI or not row.razorpay_order_id:
+                # Wallet and cash payments never touch the gateway.
+                continue
+            if row.payment_status == PaymentStatus.PENDING:
+                created_at = row.created_at
+                if created_at is not None and created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                if created_at is not None and now - created_at < self.stale_after:
+                    continue
+            candidates.append(row)
+
+        # One gateway round per merchant within the batch.
+        by_merchant: Dict[Optional[int], List[Any]] = {}
+        for row in candidates:
+            by_merchant.setdefault(row.merchant_id, []).append(row)
+
+        completed_fixups: List[Dict[str, Any]] = []
+        failed_fixups: List[Dict[str, Any]] = []
+        for merchant_id, merchant_rows in by_merchant.items():
+            records = self.gateway.fetch_orders(
+                self._merchant(merchant_id), [r.razorpay_order_id for r in merchant_rows]
+            )
+            for row in merchant_rows:
+                record = records.get(row.razorpay_order_id)
+                gateway_status = record.status if record else None
+                issue = ReconciliationIssue(
+                    kind="",
+                    payment_id=row.id,
+                    order_id=row.order_id,
+                    local_status=row.payment_status.value,
+                    gateway_status=gateway_status,
+                )
+
+                if gateway_status == "error":
+                    # Unknown, not failed: left as is for the next run
+                    issue.kind = "lookup_failed"
+                    issue.detail = record.error
+                    self._emit(issue)
+                    continue
+
+                if row.payment_status == PaymentStatus.PENDING:
+                    if gateway_status == "captured":
+                        issue.kind = "pending_but_captured"
+                        issue.action = "mark_completed"
+                        completed_fixups.append({
+                            "payment_id": row.id,
+                            "order_id": row.order_id,
+                            "processor_payment_id": record.processor_payment_id,
+                        })
+                    elif gateway_status in (None, "failed"):
+                        issue.kind = "stuck_pending"
+                        issue.action = "mark_failed"
+                        issue.detail = "not found at gateway" if record is None else "gateway reports failure"
+                        failed_fixups.append({"payment_id": row.id})
+                    else:
+                        issue.kind = "stuck_pending"
+                        issue.detail = "gateway still pending"
+                    self._emit(issue)
+                    continue
+
+                # COMPLETED locally: the gateway must agree.
+                if gateway_status != "captured":
+                    issue.kind = "completed_not_captured"
+                    issue.detail = "requires manual review"
+                    self._emit(issue)
+                elif record.amount is not None and abs(record.amount - float(row.amount or 0)) > 0.005:
+                    issue.kind = "amount_mismatch"
+                    issue.detail = f"local={row.amount} gateway={record.amount}"
+                    self._emit(issue)
+
+        self._apply_fixups(completed_fixups, failed_fixups)
+
+    def _apply_fixups(self, completed: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> None:
+        self.report.batches += 1
+        if self.report.dry_run or not (completed or failed):
+            return
+        try:
+            for fix in completed:
+                self.write_db.execute(
+                    update(Payment)
+                    .where(Payment.id == fix["payment_id"], Payment.payment_status == PaymentStatus.PENDING)
+                    .values(
+                        payment_status=PaymentStatus.COMPLETED,
+                        razorpay_payment_id=fix["processor_payment_id"],
+                        transaction_id=fix["processor_payment_id"],
+                        payment_response="reconciled",
+                    )
+                )
+            if completed:
+                self.write_db.execute(
+                    update(Order)
+                    .where(
+                        Order.id.in_([fix["order_id"] for fix in completed]),
+                        Order.status.notin_(_FINAL_ORDER_STATUSES),
+                    )
+                    .values(payment_status="Paid", status="confirmed", confirmed_time=datetime.now(timezone.utc))
+                )
+            if failed:
+                self.write_db.execute(
+                    update(Payment)
+                    .where(
+                        Payment.id.in_([fix["payment_id"] for fix in failed]),
+                        Payment.payment_status == PaymentStatus.PENDING,
+                    )
+                    .values(payment_status=PaymentStatus.FAILED, payment_response="reconciled: expired")
+                )
+            self.write_db.commit()
+        except Exception:
+            self.write_db.rollback()
+            raise
+        self.report.fixed_completed += len(completed)
+        self.report.fixed_failed += len(failed)
+
+    def _check_paid_orders(self) -> None:
+        for rows in _batched(self._stream_paid_orders_without_payment(), self.batch_size):
+            for row in rows:
+                self.report.scanned_orders += 1
+                self._emit(ReconciliationIssue(
+                    kind="paid_without_payment",
+                    order_id=row.id,
+                    local_status="Paid",
+                    detail=f"payment_method={row.payment_method} status={row.status}",
+                ))
+
+    # --- entrypoint --------------------------------------------------
+
+    def run(self) -> ReconciliationReport:
+        now = datetime.now(timezone.utc)
+        for rows in _batched(self._stream_payments(now), self.batch_size):
+            self._check_payment_batch(rows, now)
+        self._check_paid_orders()
+        return self.report
+
+
+def reconcile_payments(
+    gateway: Optional[ReconciliationGateway] = None,
+    out: IO[str] = sys.stdout,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stale_minutes: int = DEFAULT_STALE_MINUTES,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    dry_run: bool = True,
+) -> ReconciliationReport:
+    """Runs a full reconciliation pass with fresh read/write sessions."""
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    try:
+        reconciler = PaymentReconciler(
+            read_db,
+            write_db,
+            gateway or RazorpayReconciliationGateway(),
+            out,
+            batch_size=batch_size,
+            stale_after=timedelta(minutes=stale_minutes),
+            lookback=timedelta(days=lookback_days) if lookback_days > 0 else None,
+            dry_run=dry_run,
+        )
+        return reconciler.run()
+    finally:
+        read_db.close()
+        write_db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile local payments against the payment gateway.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--stale-minutes", type=int, default=DEFAULT_STALE_MINUTES,
+                        help="PENDING payments younger than this are left alone.")
+    parser.add_argument("--lookback-days", type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help="Only COMPLETED payments created this recently are checked (0: all of them).")
+    parser.add_argument("--report", help="Write the NDJSON diff report here (default: stdout).")
+    parser.add_argument("--fake-gateway", metavar="FIXTURE",
+                        help="Use an offline JSON fixture instead of calling Razorpay.")
+    parser.add_argument("--dry-run", action="store_true", help="Report only; do not apply fix-ups.")
+    args = parser.parse_args(argv)
+
+    gateway = (
+        FakeReconciliationGateway.from_fixture(args.fake_gateway)
+        if args.fake_gateway
+        else RazorpayReconciliationGateway()
+    )
+    out = open(args.report, "w") if args.report else sys.stdout
+    try:
+        report = reconcile_payments(
+            gateway=gateway,
+            out=out,
+            batch_size=args.batch_size,
+            stale_minutes=args.stale_minutes,
+            lookback_days=args.lookback_days,
+            dry_run=args.dry_run,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(report.json(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
+from sqlalchemy import exists, insert, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.models.payment import Payment, Merchant, UserWallet, WalletTransaction
+from app.models.order import Order
+from app.models.payment import Payment, PaymentStatus, Merchant, UserWallet, WalletTransaction
 from app.models.payment_dtos import (
-    PaymentCreateDTO, PaymentUpdateDTO,
+    PaymentCreateDTO, PaymentRecordDTO, PaymentUpdateDTO,
     MerchantCreateDTO, MerchantUpdateDTO,
     WalletTransactionCreateDTO,
 )
@@ -21,6 +24,53 @@ class PaymentRepository:
         self.db.refresh(db_payment)
         return db_payment
 
+    def create_returning(self, payment_data: PaymentCreateDTO) -> PaymentRecordDTO:
+        """
+        Inserts a payment with INSERT ... RETURNING and commits.
+        Unlike `create`, no refresh SELECT is issued after the commit.
+        """
+        row = self.db.execute(
+            insert(Payment)
+            .values(**payment_data.dict())
+            .returning(
+                Payment.id, Payment.order_id, Payment.user_id, Payment.merchant_id, Payment.amount,
+                Payment.payment_method, Payment.payment_status, Payment.razorpay_order_id,
+            )
+        ).one()
+        self.db.commit()
+        return PaymentRecordDTO.model_validate(row)
+
+    def get_initiation_state(self, order_id: int) -> Optional[Row]:
+        """
+        Loads everything needed to initiate a payment in a single round-trip:
+        the order, whether it already has a COMPLETED payment, and the
+        canteen's merchant (NULL columns when the canteen has none).
+        """
+        has_completed_payment = (
+            exists()
+            .where(Payment.order_id == Order.id, Payment.payment_status == PaymentStatus.COMPLETED)
+            .correlate(Order)
+        )
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                Order.user_id,
+                Order.canteen_id,
+                Order.status,
+                Order.total_amount,
+                has_completed_payment.label("has_completed_payment"),
+                Merchant.id.label("merchant_id"),
+                Merchant.name.label("merchant_name"),
+                Merchant.razorpay_merchant_id,
+                Merchant.razorpay_key_id,
+                Merchant.razorpay_key_secret,
+                Merchant.is_active.label("merchant_is_active"),
+            )
+            .outerjoin(Merchant, Merchant.canteen_id == Order.canteen_id)
+            .where(Order.id == order_id)
+        )
+        return self.db.execute(stmt).first()
+
     def get_by_id(self, payment_id: int) -> Optional[Payment]:
         """Gets a payment by its primary key."""
         return self.db.query(Payment).filter(Payment.id == payment_id).first()
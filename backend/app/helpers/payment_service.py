@@ -3,9 +3,10 @@ from typing import Dict, Any, Optional, List
 
 from app.helpers.payment_repository import PaymentRepository, MerchantRepository
 from app.helpers.payment_adapters import get_payment_processor, PaymentVerificationError
+from app.helpers.merchant_cache import MerchantSnapshot, merchant_cache
 from app.models.payment import Payment, PaymentMethod, PaymentStatus
 from app.models.order import Order # Assuming you have an Order model to get details
-from app.models.payment_dtos import PaymentCreateDTO, PaymentUpdateDTO
+from app.models.payment_dtos import PaymentCreateDTO, PaymentRecordDTO, PaymentUpdateDTO
 from app.helpers.exceptions import (
     OrderNotFoundError, PaymentAlreadyCompletedError,
     UnsupportedPaymentMethodError, MerchantNotFoundError, ServiceError
@@ -23,60 +24,78 @@ class PaymentService:
         self.merchant_repo = MerchantRepository(db)
 
     def initiate_payment(
-        self, order_id: int, user_id: str, payment_method: PaymentMethod
-    ) -> Payment:
+        self, order_id: int, payment_method: PaymentMethod, user_id: Optional[str] = None
+    ) -> PaymentRecordDTO:
         """
         Initiates a payment for an order, creating a pending payment record.
 
+        The order, its existing payment state and the canteen's merchant are
+        fetched with one joined query, and the payment is inserted with
+        INSERT ... RETURNING, so the UPI path costs two statements.
+        When `user_id` is given, the order must belong to that user.
+
         Returns:
-            The newly created Payment object with processor-specific details.
+            The newly created payment record with processor-specific details.
         """
-        # 1. Fetch and Validate the Order (Source of Truth)
-        order = self.db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).first()
-        if not order:
+        # 1. Fetch and Validate the Order (Source of Truth) together with payment and merchant state
+        state = self.payment_repo.get_initiation_state(order_id)
+        if not state or (user_id is not None and str(state.user_id) != str(user_id)):
             raise OrderNotFoundError(f"Order with ID {order_id} not found for this user.")
 
         # Prevent payment initiation for orders that are already cancelled, delivered, or confirmed
-        if getattr(order, 'status', None) in ["cancelled", "delivered", "confirmed"]:
-            raise ServiceError(f"Cannot initiate payment for order with status: '{order.status}'.")
+        if state.status in ["cancelled", "delivered", "confirmed"]:
+            raise ServiceError(f"Cannot initiate payment for order with status: '{state.status}'.")
 
         # 2. Check for existing completed payments
-        existing_payments = self.payment_repo.get_by_order_id(order_id)
-        if any(p.payment_status == PaymentStatus.COMPLETED for p in existing_payments):
+        if state.has_completed_payment:
             raise PaymentAlreadyCompletedError("This order has already been paid for.")
 
-        # 3. Get Merchant Info if needed
-        merchant_info = None
+        # 3. Get Merchant Info if needed (cached adapter, or the merchant columns we just joined)
+        merchant = None
+        processor = None
         if payment_method == PaymentMethod.UPI:
-            merchant = self.merchant_repo.get_by_canteen_id(order.canteen_id)
-            if not merchant:
+            cached = merchant_cache.peek_by_canteen_id(state.canteen_id)
+            if cached is None and state.merchant_id is not None:
+                cached = merchant_cache.put(MerchantSnapshot(
+                    id=state.merchant_id,
+                    canteen_id=state.canteen_id,
+                    name=state.merchant_name,
+                    razorpay_merchant_id=state.razorpay_merchant_id,
+                    razorpay_key_id=state.razorpay_key_id,
+                    razorpay_key_secret=state.razorpay_key_secret,
+                    is_active=bool(state.merchant_is_active),
+                ))
+            if not cached:
                 raise MerchantNotFoundError("No active merchant found for this canteen.")
-            merchant_info = {"key_id": merchant.razorpay_key_id, "key_secret": merchant.razorpay_key_secret}
+            merchant = cached.merchant
+            processor = cached.processor
 
         # 4. Get the correct payment processor from the factory
-        try:
-            processor = get_payment_processor(payment_method, self.db, merchant_info)
-        except NotImplementedError:
-            raise UnsupportedPaymentMethodError(f"Payment method '{payment_method.value}' is not supported.")
+        if processor is None:
+            try:
+                processor = get_payment_processor(payment_method, self.db)
+            except NotImplementedError:
+                raise UnsupportedPaymentMethodError(f"Payment method '{payment_method.value}' is not supported.")
 
         # 5. Process the payment with the adapter
-        payment_data = {"order_id": order_id, "user_id": user_id, "amount": order.total_amount}
+        owner_id = state.user_id
+        payment_data = {"order_id": order_id, "user_id": owner_id, "amount": state.total_amount}
         processor_response = processor.process_payment(payment_data)
 
         # 6. Create the pending payment record in our database using a type-safe DTO
         payment_dto = PaymentCreateDTO(
             order_id=order_id,
-            user_id=user_id,
+            user_id=owner_id,
             merchant_id=merchant.id if merchant else None,
-            amount=order.total_amount,
+            amount=state.total_amount,
             payment_method=payment_method,
             razorpay_order_id=processor_response.processor_order_id,
         )
-        payment_record = self.payment_repo.create(payment_dto)
-        
-        # Attach the processor data to the record for the mutation to return to the client
+        payment_record = self.payment_repo.create_returning(payment_dto)
+
+        # Attach the processor data to the record for the endpoint to return to the client
         payment_record.processor_data = processor_response.processor_data
-        
+
         return payment_record
 
     def verify_payment(self, razorpay_order_id: str, verification_data: Dict[str, Any]) -> Payment:
@@ -87,9 +106,13 @@ class PaymentService:
         if not payment:
             raise ServiceError("Payment record not found for this Razorpay order ID.")
 
-        merchant = self.merchant_repo.get_by_id(payment.merchant_id)
-        merchant_info = {"key_id": merchant.razorpay_key_id, "key_secret": merchant.razorpay_key_secret}
-        processor = get_payment_processor(payment.payment_method, self.db, merchant_info)
+        if payment.payment_method == PaymentMethod.UPI:
+            cached = merchant_cache.get_by_id(self.db, payment.merchant_id)
+            if not cached:
+                raise MerchantNotFoundError("Merchant for this payment no longer exists.")
+            processor = cached.processor
+        else:
+            processor = get_payment_processor(payment.payment_method, self.db)
 
         try:
             # The adapter will raise PaymentVerificationError on failure
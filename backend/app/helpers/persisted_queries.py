@@ -0,0 +1,210 @@
+"""
+Automatic persisted queries (APQ) and a parsed/validated document cache.
+
+APQ follows the Apollo protocol. A client first sends only
+`extensions.persistedQuery.sha256Hash`. If the hash is unknown the response is
+a `PersistedQueryNotFound` error, and the client retries once with the full
+query, which is checked against the hash and registered. After that, every
+request for that operation is a few dozen bytes.
+
+Independently of APQ, `DocumentCache` is a schema extension that keeps parsed
+and validated documents in an LRU keyed by the query text's sha256. A repeat
+query skips both graphql-core's parser and validator. Parse and validation
+time (and cache hits) are accumulated in `document_stats` for the metrics
+endpoint.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from graphql import DocumentNode, GraphQLError
+from graphql.language.parser import parse
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.schema.schema import validate_document
+from strawberry.types import ExecutionResult
+
+PERSISTED_QUERY_CACHE_SIZE = 1000
+DOCUMENT_CACHE_SIZE = 1000
+# Registered queries larger than this are executed but not stored
+MAX_PERSISTED_QUERY_BYTES = 64 * 1024
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class DocumentStats:
+    """Running totals of parse/validation work, exported by the metrics endpoint."""
+    def __init__(self):
+        self.parse_count = 0
+        self.parse_seconds = 0.0
+        self.validate_count = 0
+        self.validate_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.apq_hits = 0
+        self.apq_misses = 0
+        self.apq_registered = 0
+
+
+document_stats = DocumentStats()
+
+
+class _Entry(NamedTuple):
+    document: DocumentNode
+    # None until the document has been validated once
+    errors: Optional[List[GraphQLError]]
+
+
+class DocumentCache(SchemaExtension):
+    """Caches parsing and validation of query documents (LRU keyed by query sha256)."""
+    _entries: "OrderedDict[str, _Entry]" = OrderedDict()
+    _lock = threading.Lock()
+    max_entries = DOCUMENT_CACHE_SIZE
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def on_parse(self) -> Iterator[None]:
+        context = self.execution_context
+        key = self._key = query_hash(context.query or "")
+        entry = self._get(key)
+        if entry is not None:
+            document_stats.hits += 1
+            context.graphql_document = entry.document
+        else:
+            document_stats.misses += 1
+            started = time.perf_counter()
+            try:
+                document = parse(context.query, **context.parse_options)
+            except GraphQLError:
+                # Raising here would fail entering the hooks. Left unset, the
+                # document is parsed again by Strawberry, which reports the error.
+                document = None
+            finally:
+                document_stats.parse_count += 1
+                document_stats.parse_seconds += time.perf_counter() - started
+            if document is not None:
+                context.graphql_document = document
+                self._put(key, _Entry(document, None))
+        yield
+
+    def on_validate(self) -> Iterator[None]:
+        context = self.execution_context
+        key = getattr(self, "_key", None) or query_hash(context.query or "")
+        entry = self._get(key)
+        if entry is not None and entry.errors is not None:
+            context.errors = list(entry.errors)
+        else:
+            started = time.perf_counter()
+            errors = validate_document(context.schema._schema, context.graphql_document, context.validation_rules)
+            document_stats.validate_count += 1
+            document_stats.validate_seconds += time.perf_counter() - started
+            context.errors = errors
+            self._put(key, _Entry(context.graphql_document, list(errors)))
+        yield
+
+
+class PersistedQueryStore:
+    """LRU of registered query texts by sha256 hash."""
+    def __init__(self, max_entries: int = PERSISTED_QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._queries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sha256_hash: str) -> Optional[str]:
+        with self._lock:
+            query = self._queries.get(sha256_hash)
+            if query is not None:
+                self._queries.move_to_end(sha256_hash)
+            return query
+
+    def register(self, sha256_hash: str, query: str) -> None:
+        if len(query) > MAX_PERSISTED_QUERY_BYTES:
+            return
+        with self._lock:
+            self._queries[sha256_hash] = query
+            self._queries.move_to_end(sha256_hash)
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+persisted_queries = PersistedQueryStore()
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that resolves `extensions.persistedQuery` hashes to registered queries."""
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # A GET carrying only a persisted query hash has no `query` parameter either
+        return "extensions" not in request.query_params and super().should_render_graphql_ide(request)
+
+    async def _request_extensions(self, request) -> Dict[str, Any]:
+        try:
+            if request.method == "GET":
+                raw = request.query_params.get("extensions")
+                extensions = json.loads(raw) if raw else None
+            else:
+                extensions = self.parse_json(await request.get_body()).get("extensions")
+        except (ValueError, AttributeError):
+            return {}
+        return extensions if isinstance(extensions, dict) else {}
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        request_data = await super().parse_http_body(request)
+        persisted = (await self._request_extensions(request)).get("persistedQuery")
+        if not isinstance(persisted, dict):
+            return request_data
+
+        sha256_hash = persisted.get("sha256Hash")
+        if persisted.get("version") != 1 or not isinstance(sha256_hash, str):
+            raise HTTPException(400, "Unsupported persisted query version")
+
+        if request_data.query is None:
+            query = persisted_queries.get(sha256_hash)
+            if query is None:
+                document_stats.apq_misses += 1
+                raise PersistedQueryNotFound()
+            document_stats.apq_hits += 1
+            request_data.query = query
+            return request_data
+
+        if query_hash(request_data.query) != sha256_hash:
+            raise HTTPException(400, "provided sha does not match query")
+        persisted_queries.register(sha256_hash, request_data.query)
+        document_stats.apq_registered += 1
+        return request_data
+
+    async def execute_operation(self, request, context, root_value):
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryNotFound:
+            # Apollo clients look for this exact message/code to resend the full query
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})],
+            )
@@ -0,0 +1,129 @@
+"""
+Server-side pricing of carts and orders, including customization surcharges.
+
+A menu item's `customization_options` JSON is compiled once into a `PriceTable`
+(size name -> surcharge, addition name -> surcharge) and memoised by the
+option set itself, so a new table only appears when a vendor actually edits
+the options (the catalog version of that item); every worker reaches the same
+answer without any cross-process invalidation. Lines are then priced in one
+pass as
+
+    unit price = base price + size surcharge + sum(addition surcharges)
+
+matching what the menu UI shows. Unknown size/addition names carry no surcharge.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Union
+
+# Site-wide tax rate applied to the subtotal
+TAX_RATE = 0.05
+
+
+class PriceTable(NamedTuple):
+    sizes: Dict[str, float]
+    additions: Dict[str, float]
+
+
+EMPTY_PRICE_TABLE = PriceTable({}, {})
+
+
+class PricedLine(NamedTuple):
+    menu_item_id: int
+    quantity: int
+    unit_price: float
+    line_total: float
+
+
+class PricingSummary(NamedTuple):
+    lines: List[PricedLine]
+    subtotal: float
+    tax: float
+    total: float
+
+
+def _key(name: Any) -> str:
+    return str(name).strip().casefold()
+
+
+def _option_prices(options: Any) -> Dict[str, float]:
+    prices: Dict[str, float] = {}
+    for option in options or []:
+        if isinstance(option, Mapping) and option.get("name") is not None:
+            prices[_key(option["name"])] = float(option.get("price") or 0.0)
+    return prices
+
+
+def compile_price_table(options: Optional[Mapping[str, Any]]) -> PriceTable:
+    """Builds the surcharge lookup for one menu item's customization options."""
+    if not options:
+        return EMPTY_PRICE_TABLE
+    return PriceTable(_option_prices(options.get("sizes")), _option_prices(options.get("additions")))
+
+
+class PriceTableCache:
+    """Thread-safe LRU of compiled price tables keyed by the option set's JSON."""
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, PriceTable]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, options: Union[None, str, Mapping[str, Any]]) -> PriceTable:
+        """Accepts the options as stored JSON text (cheapest) or as a decoded dict."""
+        if not options:
+            return EMPTY_PRICE_TABLE
+        key = options if isinstance(options, str) else json.dumps(options, sort_keys=True)
+        with self._lock:
+            table = self._data.get(key)
+            if table is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+        table = compile_price_table(json.loads(key))
+        with self._lock:
+            self._data[key] = table
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return table
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+price_tables = PriceTableCache()
+
+
+def unit_price(base_price: Optional[float], table: PriceTable, customizations: Optional[Mapping[str, Any]]) -> float:
+    price = float(base_price or 0.0)
+    if not customizations:
+        return price
+    size = customizations.get("size")
+    if size:
+        price += table.sizes.get(_key(size), 0.0)
+    for addition in customizations.get("additions") or []:
+        name = addition.get("name") if isinstance(addition, Mapping) else addition
+        price += table.additions.get(_key(name), 0.0)
+    return price
+
+
+def price_lines(lines: Iterable[Mapping[str, Any]], tax_rate: float = TAX_RATE) -> PricingSummary:
+    """
+    Prices lines in one pass. Each line is a mapping with `menu_item_id`,
+    `quantity`, `base_price`, `options` (JSON text or dict) and `customizations`.
+    """
+    priced: List[PricedLine] = []
+    subtotal = 0.0
+    for line in lines:
+        quantity = int(line.get("quantity") or 0)
+        each = round(unit_price(line.get("base_price"), price_tables.get(line.get("options")), line.get("customizations")), 2)
+        total = round(each * quantity, 2)
+        subtotal += total
+        priced.append(PricedLine(line.get("menu_item_id"), quantity, each, total))
+    subtotal = round(subtotal, 2)
+    tax = round(subtotal * tax_rate, 2)
+    return PricingSummary(priced, subtotal, tax, round(subtotal + tax, 2))
@@ -0,0 +1,286 @@
+"""
+Cost-based admission control for GraphQL operations.
+
+`QueryCostLimiter` estimates an operation's cost from its document before it
+executes:
+
+    cost(field) = base + multiplier * (1 + cost(sub-selections))   for lists
+    cost(field) = base + cost(sub-selections)                      otherwise
+
+where `base` is DB_FIELD_COST for root fields (every root resolver queries the
+database) and FIELD_COSTS[...] (default 0) for nested fields, which are
+resolved from already-loaded rows. A list's multiplier is its `limit`
+argument when given (capped at LIST_LIMIT_CAP), else the field's estimated
+size from LIST_SIZE_ESTIMATES (unpaginated lists such as getMenuItems are
+priced at their realistic size).
+
+- cost > QUERY_COST_BUDGET: rejected with a QUERY_TOO_EXPENSIVE error.
+- cost > EXPENSIVE_QUERY_COST: admitted only while fewer than
+  EXPENSIVE_QUERY_SLOTS expensive operations are running. Otherwise it waits up
+  to EXPENSIVE_QUERY_WAIT_SECONDS and is then rejected with SERVER_BUSY, so a
+  burst of heavy queries can't take every pooled connection. (Resolvers are
+  synchronous today, so each worker runs one operation at a time and the gate
+  only matters once resolvers await; the budget is what protects the pool.)
+
+Per-operation cost histograms are kept in `cost_histograms` for the metrics
+endpoint. Operation names are chosen by clients, so `metric_label` admits the
+first MAX_OPERATION_LABELS distinct ones per worker and folds the rest into
+"other"; every per-operation metric goes through it.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableNode,
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionResult
+
+QUERY_COST_BUDGET = int(os.getenv("QUERY_COST_BUDGET", "10000"))
+EXPENSIVE_QUERY_COST = int(os.getenv("EXPENSIVE_QUERY_COST", "2000"))
+EXPENSIVE_QUERY_SLOTS = int(os.getenv("EXPENSIVE_QUERY_SLOTS", "2"))
+EXPENSIVE_QUERY_WAIT_SECONDS = float(os.getenv("EXPENSIVE_QUERY_WAIT_SECONDS", "5"))
+QUERY_MAX_DEPTH = 10
+
+DB_FIELD_COST = 10
+DEFAULT_LIST_SIZE = 20
+LIST_LIMIT_CAP = 100
+# Expected sizes of lists without a `limit` argument ("Type.field")
+LIST_SIZE_ESTIMATES: Dict[str, int] = {
+    "Query.getMenuItems": 500,
+    "Query.getAllComplaints": 500,
+    "Query.getAllOrders": 200,
+    "Query.getCanteenOrders": 500,
+    "Query.getCanteenActiveOrders": 50,
+    "Query.getActiveOrders": 10,
+    "Query.getMenuItemsByCanteen": 100,
+    "Query.getUsersByRole": 200,
+    "Query.getUserPaymentHistory": 100,
+    "Query.salesTimeseries": 100,
+    "Query.hourlyHeatmap": 168,
+    "OrderType.items": 5,
+    "OrderType.steps": 5,
+    "CartType.items": 10,
+    "CustomizationOptionsType.sizes": 4,
+    "CustomizationOptionsType.additions": 6,
+}
+
+# Nested fields that run their own queries ("Type.field"); none today, as every
+# nested type is built from rows its root resolver already loaded
+FIELD_COSTS: Dict[str, int] = {}
+
+COST_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+MAX_OPERATION_LABELS = int(os.getenv("MAX_OPERATION_LABELS", "200"))
+OTHER_OPERATIONS = "other"
+
+
+def operation_label(execution_context) -> str:
+    """The operation name, or its root fields for anonymous operations (chosen by the client: unbounded)."""
+    if execution_context.operation_name:
+        return execution_context.operation_name
+    document = execution_context.graphql_document
+    if document is None:
+        return "unknown"
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            if definition.name:
+                return definition.name.value
+            fields = sorted(
+                s.name.value for s in definition.selection_set.selections if isinstance(s, FieldNode)
+            )
+            return "+".join(fields[:3]) or "anonymous"
+    return "unknown"
+
+
+_metric_labels: Set[str] = set()
+_metric_labels_lock = threading.Lock()
+
+
+def metric_label(execution_context) -> str:
+    """`operation_label`, or "other" once MAX_OPERATION_LABELS distinct labels have been seen."""
+    label = operation_label(execution_context)
+    with _metric_labels_lock:
+        if label in _metric_labels:
+            return label
+        if len(_metric_labels) < MAX_OPERATION_LABELS:
+            _metric_labels.add(label)
+            return label
+    return OTHER_OPERATIONS
+
+
+class CostHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(COST_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0
+        self.rejected = 0
+        # Operations that went through the expensive-query gate
+        self.queued = 0
+
+    def observe(self, cost: int) -> None:
+        for i, bound in enumerate(COST_BUCKETS):
+            if cost <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.sum += cost
+
+
+cost_histograms: Dict[str, CostHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def _histogram(label: str) -> CostHistogram:
+    with _histograms_lock:
+        histogram = cost_histograms.get(label)
+        if histogram is None:
+            histogram = cost_histograms[label] = CostHistogram()
+        return histogram
+
+
+def _unwrap(type_) -> Tuple[Any, bool]:
+    is_list = False
+    while isinstance(type_, (GraphQLNonNull, GraphQLList)):
+        is_list = is_list or isinstance(type_, GraphQLList)
+        type_ = type_.of_type
+    return type_, is_list
+
+
+class CostCalculator:
+    def __init__(self, schema, document, variables: Optional[Dict[str, Any]]):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+
+    def _limit(self, field: FieldNode) -> Optional[int]:
+        for argument in field.arguments or ():
+            if argument.name.value not in ("limit", "first"):
+                continue
+            value = argument.value
+            if isinstance(value, IntValueNode):
+                return int(value.value)
+            if isinstance(value, VariableNode):
+                raw = self.variables.get(value.name.value)
+                return int(raw) if isinstance(raw, int) else None
+        return None
+
+    def selection_cost(self, selection_set: Optional[SelectionSetNode], parent, is_root: bool = False,
+                       seen: Tuple[str, ...] = ()) -> int:
+        if selection_set is None or not isinstance(parent, GraphQLObjectType):
+            return 0
+        total = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                total += self.field_cost(selection, parent, is_root, seen)
+            elif isinstance(selection, InlineFragmentNode):
+                target = parent
+                if selection.type_condition is not None:
+                    target = self.schema.get_type(selection.type_condition.name.value) or parent
+                total += self.selection_cost(selection.selection_set, target, is_root, seen)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in seen:
+                    continue
+                target = self.schema.get_type(fragment.type_condition.name.value) or parent
+                total += self.selection_cost(fragment.selection_set, target, is_root, seen + (name,))
+        return total
+
+    def field_cost(self, field: FieldNode, parent: GraphQLObjectType, is_root: bool, seen: Tuple[str, ...]) -> int:
+        name = field.name.value
+        definition = parent.fields.get(name)
+        if name.startswith("__") or definition is None:
+            return 0
+        field_type, is_list = _unwrap(definition.type)
+        base = DB_FIELD_COST if is_root else FIELD_COSTS.get(f"{parent.name}.{name}", 0)
+        children = self.selection_cost(field.selection_set, field_type, False, seen)
+        # Lists of scalars (tags, removals) come with their row
+        if not is_list or not isinstance(field_type, GraphQLObjectType):
+            return base + children
+        limit = self._limit(field)
+        multiplier = (
+            min(limit, LIST_LIMIT_CAP) if limit is not None
+            else LIST_SIZE_ESTIMATES.get(f"{parent.name}.{name}", DEFAULT_LIST_SIZE)
+        )
+        return base + max(multiplier, 0) * (1 + children)
+
+    def operation_cost(self, operation: OperationDefinitionNode) -> int:
+        root = self.schema.get_root_type(operation.operation)
+        return self.selection_cost(operation.selection_set, root, is_root=True)
+
+
+def query_cost(schema, document, variables: Optional[Dict[str, Any]] = None, operation_name: Optional[str] = None) -> int:
+    """Estimated cost of the operation that would be executed (the named one, or the only one)."""
+    calculator = CostCalculator(schema, document, variables)
+    operations: List[OperationDefinitionNode] = [
+        d for d in document.definitions if isinstance(d, OperationDefinitionNode)
+    ]
+    if operation_name:
+        operations = [o for o in operations if o.name and o.name.value == operation_name]
+    return max((calculator.operation_cost(o) for o in operations), default=0)
+
+
+_expensive_slots = asyncio.Semaphore(EXPENSIVE_QUERY_SLOTS)
+
+
+def ignore_introspection(context) -> bool:
+    """`should_ignore` for QueryDepthLimiter: GraphiQL's introspection query is deep by design."""
+    return context.field_name.startswith("__")
+
+
+def _error(message: str, code: str, **extensions) -> ExecutionResult:
+    return ExecutionResult(data=None, errors=[GraphQLError(message, extensions={"code": code, **extensions})])
+
+
+class QueryCostLimiter(SchemaExtension):
+    """Rejects operations over budget and queues expensive ones (see module docstring)."""
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        context = self.execution_context
+        cost = query_cost(context.schema._schema, context.graphql_document, context.variables, context.operation_name)
+        histogram = _histogram(metric_label(context))
+        histogram.observe(cost)
+
+        if cost > QUERY_COST_BUDGET:
+            histogram.rejected += 1
+            context.result = _error(
+                f"Query is too expensive: estimated cost {cost} exceeds the budget of {QUERY_COST_BUDGET}.",
+                "QUERY_TOO_EXPENSIVE", cost=cost, budget=QUERY_COST_BUDGET,
+            )
+            yield
+            return
+
+        if cost <= EXPENSIVE_QUERY_COST:
+            yield
+            return
+
+        histogram.queued += 1
+        try:
+            await asyncio.wait_for(_expensive_slots.acquire(), timeout=EXPENSIVE_QUERY_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            histogram.rejected += 1
+            context.result = _error("Server is busy; please retry shortly.", "SERVER_BUSY", cost=cost)
+            yield
+            return
+        try:
+            yield
+        finally:
+            _expensive_slots.release()
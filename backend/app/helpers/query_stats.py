@@ -0,0 +1,187 @@
+"""
+Per-request SQL statement accounting and a slow-query log.
+
+`QueryStatsMiddleware` binds a fresh `RequestQueryStats` to a context variable
+for every HTTP request. SQLAlchemy's before/after_cursor_execute events
+(registered on every Engine) add each statement's count and duration to
+whichever request is current, including work done in the threadpool, which
+inherits the context. `QueryStatsExtension` names the request after its
+GraphQL operation.
+
+When the request finishes:
+- its latency is recorded per route and per operation (app.helpers.metrics);
+- the response carries `Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>`;
+- totals are folded into `operation_query_stats` (per operation name, or per
+  route for REST endpoints) for the metrics endpoint; operation names past
+  MAX_OPERATION_LABELS are folded into "other";
+- statements slower than SLOW_QUERY_MS are logged as they finish, with
+  parameter values redacted to their types.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from strawberry.extensions import SchemaExtension
+
+from app.helpers.metrics import graphql_operation_duration, http_request_duration
+from app.helpers.query_cost import metric_label
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Longest statement text kept for logs and the slowest-statement metric
+STATEMENT_PREVIEW_CHARS = 300
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _preview(statement: str) -> str:
+    text = _WHITESPACE.sub(" ", statement).strip()
+    return text if len(text) <= STATEMENT_PREVIEW_CHARS else text[:STATEMENT_PREVIEW_CHARS] + "…"
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """Replaces bound values with their type names so logs never carry user data."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+class RequestQueryStats:
+    __slots__ = ("operation", "statements", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.operation: Optional[str] = None
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} queries", '
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+class OperationQueryStats:
+    """Running totals for one operation (or REST route)."""
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.max_statements = 0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+
+operation_query_stats: Dict[str, OperationQueryStats] = {}
+_operations_lock = threading.Lock()
+
+
+def _fold(label: str, stats: RequestQueryStats) -> None:
+    with _operations_lock:
+        totals = operation_query_stats.get(label)
+        if totals is None:
+            totals = operation_query_stats[label] = OperationQueryStats()
+        totals.requests += 1
+        totals.statements += stats.statements
+        totals.db_seconds += stats.db_seconds
+        totals.max_statements = max(totals.max_statements, stats.statements)
+        if stats.slowest_seconds > totals.slowest_seconds:
+            totals.slowest_seconds = stats.slowest_seconds
+            totals.slowest_statement = _preview(stats.slowest_statement or "")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, operation=%s): %s params=%s",
+            seconds * 1000,
+            stats.operation if stats else None,
+            _preview(statement),
+            redact_parameters(parameters, executemany),
+        )
+
+
+class QueryStatsExtension(SchemaExtension):
+    """Labels the current request's SQL stats with the GraphQL operation name."""
+    def on_execute(self) -> Iterator[None]:
+        stats = _current.get()
+        if stats is not None:
+            # Client-chosen names are capped (see metric_label), like the routes below
+            stats.operation = metric_label(self.execution_context)
+        yield
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware, so the context variable is visible to the whole request."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            # Route templates (not raw paths) keep the label sets bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            _fold(stats.operation or route, stats)
+            http_request_duration.observe((route, scope["method"], str(status)), elapsed)
+            if stats.operation:
+                graphql_operation_duration.observe((stats.operation,), elapsed)
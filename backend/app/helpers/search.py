@@ -0,0 +1,243 @@
+"""
+Ranked, typo-tolerant search over menu items and canteens.
+
+On Postgres, a document matches when either
+- its weighted `tsvector` (name > category/location > description) matches
+  the `websearch_to_tsquery` of the query, or
+- its name is trigram-similar to the query (`pg_trgm`), which catches typos
+  such as "panner tikka".
+
+Both conditions are served by GIN indexes (migration 0006), whose expressions
+must stay identical to `_menu_vector` / `_canteen_vector` below. Results are
+ranked by `ts_rank` plus trigram word similarity.
+
+Other databases (e.g. SQLite in tests) use `FallbackSearchIndex`, an in-memory
+token + trigram index with the same matching rules, built from the candidate
+rows on each call.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Float, String, cast, func, literal, literal_column, not_, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.canteen import Canteen
+from app.models.menu_item import MenuItem
+
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+VEGETARIAN_TAG = "Vegetarian"
+# pg_trgm's default similarity threshold; the fallback index uses the same one
+TRIGRAM_THRESHOLD = 0.3
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class MenuSearchFilters:
+    canteen_id: Optional[int] = None
+    category: Optional[str] = None
+    # Items must carry every one of these tags
+    tags: List[str] = field(default_factory=list)
+    # True: only items tagged Vegetarian; False: only items without that tag
+    vegetarian: Optional[bool] = None
+
+
+def _page(limit: int, offset: int) -> Tuple[int, int]:
+    return max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)
+
+
+# ===================================================================
+# 1. POSTGRES (tsvector + pg_trgm)
+# ===================================================================
+
+def _weighted(column, weight: str):
+    # Constants are inlined (not bound) so the expression matches the index definition
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(column, literal_column("''"))), literal_column(f"'{weight}'")
+    )
+
+
+def _menu_vector():
+    return _weighted(MenuItem.name, "A").op("||")(_weighted(MenuItem.category, "B")).op("||")(
+        _weighted(MenuItem.description, "C")
+    )
+
+
+def _canteen_vector():
+    return _weighted(Canteen.name, "A").op("||")(_weighted(Canteen.location, "B")).op("||")(
+        _weighted(Canteen.description, "C")
+    )
+
+
+def _text_match(vector, name_column, query: str):
+    """Returns (match condition, rank expression) for one document type."""
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    q = literal(query, String)
+    condition = or_(
+        vector.op("@@")(ts_query),
+        name_column.op("%")(q),
+        q.op("<%")(name_column),
+    )
+    rank = cast(func.ts_rank(vector, ts_query), Float) + func.word_similarity(q, name_column)
+    return condition, rank
+
+
+def _menu_filter_conditions(filters: MenuSearchFilters) -> List[Any]:
+    conditions = []
+    if filters.canteen_id is not None:
+        conditions.append(MenuItem.canteen_id == filters.canteen_id)
+    if filters.category:
+        conditions.append(func.lower(MenuItem.category) == filters.category.lower())
+    if filters.tags:
+        conditions.append(cast(MenuItem.tags, JSONB).contains(list(filters.tags)))
+    if filters.vegetarian is not None:
+        is_veg = func.coalesce(cast(MenuItem.tags, JSONB).contains([VEGETARIAN_TAG]), False)
+        conditions.append(is_veg if filters.vegetarian else not_(is_veg))
+    return conditions
+
+
+def _search_menu_items_pg(db: Session, query: str, filters: MenuSearchFilters, limit: int, offset: int) -> List[MenuItem]:
+    conditions = _menu_filter_conditions(filters)
+    stmt = select(MenuItem).options(joinedload(MenuItem.canteen))
+    if query:
+        match, rank = _text_match(_menu_vector(), MenuItem.name, query)
+        stmt = stmt.where(match, *conditions).order_by(rank.desc(), MenuItem.id)
+    else:
+        stmt = stmt.where(*conditions).order_by(MenuItem.is_popular.desc(), MenuItem.rating.desc(), MenuItem.id)
+    return list(db.execute(stmt.limit(limit).offset(offset)).scalars().unique())
+
+
+def _search_canteens_pg(db: Session, query: str, limit: int, offset: int) -> List[Canteen]:
+    stmt = select(Canteen)
+    if query:
+        match, rank = _text_match(_canteen_vector(), Canteen.name, query)
+        # Locations are short free text; let typos in them match too
+        q = literal(query, String)
+        stmt = stmt.where(or_(match, Canteen.location.op("%")(q))).order_by(
+            (rank + func.similarity(func.coalesce(Canteen.location, ""), q)).desc(), Canteen.id
+        )
+    else:
+        stmt = stmt.order_by(Canteen.id)
+    return list(db.execute(stmt.limit(limit).offset(offset)).scalars())
+
+
+# ===================================================================
+# 2. IN-MEMORY FALLBACK INDEX
+# ===================================================================
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Trigrams the way pg_trgm extracts them (each word padded with two spaces before, one after)."""
+    grams: Set[str] = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class FallbackSearchIndex:
+    """
+    Token and trigram index over a set of documents. Each document is a list of
+    (text, weight) fields; the first field is the "name" used for fuzzy matching.
+    """
+    def __init__(self, documents: Iterable[Tuple[Any, Sequence[Tuple[Optional[str], float]]]]):
+        self._docs: List[Any] = []
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._name_trigrams: List[Set[str]] = []
+        for position, (doc, fields) in enumerate(documents):
+            self._docs.append(doc)
+            for text, weight in fields:
+                for token in tokenize(text):
+                    postings = self._postings.setdefault(token, {})
+                    postings[position] = postings.get(position, 0.0) + weight
+            self._name_trigrams.append(trigrams(fields[0][0] if fields else None))
+
+    def search(self, query: str) -> List[Any]:
+        """Matching documents, best first."""
+        scores: Dict[int, float] = {}
+        for token in tokenize(query):
+            for position, weight in self._postings.get(token, {}).items():
+                scores[position] = scores.get(position, 0.0) + weight
+        query_grams = trigrams(query)
+        for position, name_grams in enumerate(self._name_trigrams):
+            similarity = trigram_similarity(query_grams, name_grams)
+            if similarity >= TRIGRAM_THRESHOLD or position in scores:
+                scores[position] = scores.get(position, 0.0) + similarity
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [self._docs[position] for position, _ in ranked]
+
+
+def _menu_item_passes(item: MenuItem, filters: MenuSearchFilters) -> bool:
+    tags = {str(tag).lower() for tag in (item.tags or [])}
+    if filters.canteen_id is not None and item.canteen_id != filters.canteen_id:
+        return False
+    if filters.category and (item.category or "").lower() != filters.category.lower():
+        return False
+    if filters.tags and not {t.lower() for t in filters.tags} <= tags:
+        return False
+    if filters.vegetarian is not None and (VEGETARIAN_TAG.lower() in tags) != filters.vegetarian:
+        return False
+    return True
+
+
+def _search_fallback(candidates: List[Any], fields: Callable[[Any], Sequence[Tuple[Optional[str], float]]], query: str) -> List[Any]:
+    if not query:
+        return candidates
+    return FallbackSearchIndex((doc, fields(doc)) for doc in candidates).search(query)
+
+
+# ===================================================================
+# 3. ENTRY POINTS
+# ===================================================================
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def search_menu_items(
+    db: Session,
+    query: str,
+    filters: Optional[MenuSearchFilters] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[MenuItem]:
+    """One page of menu items matching `query` and `filters`, best match first."""
+    filters = filters or MenuSearchFilters()
+    query = (query or "").strip()
+    limit, offset = _page(limit, offset)
+    if _is_postgres(db):
+        return _search_menu_items_pg(db, query, filters, limit, offset)
+
+    candidates = [item for item in db.query(MenuItem).all() if _menu_item_passes(item, filters)]
+    ranked = _search_fallback(
+        candidates, lambda item: [(item.name, 1.0), (item.category, 0.4), (item.description, 0.2)], query
+    )
+    return ranked[offset:offset + limit]
+
+
+def search_canteens(db: Session, query: str, limit: int = 20, offset: int = 0) -> List[Canteen]:
+    """One page of canteens matching `query` by name, location or description, best match first."""
+    query = (query or "").strip()
+    limit, offset = _page(limit, offset)
+    if _is_postgres(db):
+        return _search_canteens_pg(db, query, limit, offset)
+
+    ranked = _search_fallback(
+        db.query(Canteen).all(),
+        lambda canteen: [(canteen.name, 1.0), (canteen.location, 0.4), (canteen.description, 0.2)],
+        query,
+    )
+    return ranked[offset:offset + limit]
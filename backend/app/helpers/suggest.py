@@ -0,0 +1,115 @@
+"""
+Typeahead suggestions from an in-process prefix index.
+
+The index is a sorted array of (key, entry) pairs built from the catalog
+snapshot: every menu item name, tag and canteen name contributes one key per
+word start ("Masala Dosa" is found by "mas" and by "dos"). A lookup is a
+`bisect` to the first key >= prefix followed by a scan while keys still start
+with it, so suggestions never touch the database. The index is memoised on the
+snapshot and therefore rebuilt only when the catalog version changes.
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.helpers.catalog import CatalogSnapshot, catalog
+from app.models.menu_item import SuggestionKind
+
+MAX_SUGGESTIONS = 20
+# Upper bound on index entries examined for one (very short) prefix
+MAX_SCAN = 2000
+
+_WORD_START = re.compile(r"\b\w", re.UNICODE)
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: SuggestionKind
+    weight: float
+    menu_item_id: Optional[int] = None
+    canteen_id: Optional[int] = None
+    canteen_name: Optional[str] = None
+
+
+def normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").casefold().split())
+
+
+class PrefixIndex:
+    """Sorted keys with a parallel array of (suggestion position, key starts the text)."""
+    def __init__(self, suggestions: List[Suggestion]):
+        pairs: List[Tuple[str, int, bool]] = []
+        for position, suggestion in enumerate(suggestions):
+            text = normalize(suggestion.text)
+            for match in _WORD_START.finditer(text):
+                pairs.append((text[match.start():], position, match.start() == 0))
+        pairs.sort()
+        self.suggestions = suggestions
+        self._keys = [key for key, _, _ in pairs]
+        self._entries = [(position, whole) for _, position, whole in pairs]
+
+    def lookup(self, prefix: str, limit: int) -> List[Suggestion]:
+        """Suggestions with a word starting with `prefix`; whole-text prefix matches first, then by weight."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        best: Dict[int, bool] = {}
+        start = bisect_left(self._keys, prefix)
+        for i in range(start, min(len(self._keys), start + MAX_SCAN)):
+            if not self._keys[i].startswith(prefix):
+                break
+            position, whole = self._entries[i]
+            best[position] = best.get(position, False) or whole
+        ranked = sorted(
+            best.items(),
+            key=lambda kv: (not kv[1], -self.suggestions[kv[0]].weight, self.suggestions[kv[0]].text),
+        )
+        return [self.suggestions[position] for position, _ in ranked[:limit]]
+
+
+def build_suggest_index(snapshot: CatalogSnapshot) -> PrefixIndex:
+    suggestions: List[Suggestion] = []
+    tag_counts: Dict[str, int] = {}
+    tag_labels: Dict[str, str] = {}
+    items_per_canteen: Dict[int, int] = {}
+
+    for item in snapshot.menu_items:
+        if not item.is_available:
+            continue
+        canteen = snapshot.canteens_by_id.get(item.canteen_id)
+        items_per_canteen[item.canteen_id] = items_per_canteen.get(item.canteen_id, 0) + 1
+        suggestions.append(Suggestion(
+            text=item.name,
+            kind=SuggestionKind.MENU_ITEM,
+            # Popular, well-rated items float to the top of a crowded prefix
+            weight=item.rating * item.rating_count + (1000.0 if item.is_popular else 0.0),
+            menu_item_id=item.id,
+            canteen_id=item.canteen_id,
+            canteen_name=canteen.name if canteen else None,
+        ))
+        for tag in item.tags:
+            key = normalize(tag)
+            if key:
+                tag_counts[key] = tag_counts.get(key, 0) + 1
+                tag_labels.setdefault(key, tag)
+
+    for key, count in tag_counts.items():
+        suggestions.append(Suggestion(text=tag_labels[key], kind=SuggestionKind.TAG, weight=float(count)))
+    for canteen in snapshot.canteens:
+        suggestions.append(Suggestion(
+            text=canteen.name,
+            kind=SuggestionKind.CANTEEN,
+            weight=float(items_per_canteen.get(canteen.id, 0)),
+            canteen_id=canteen.id,
+            canteen_name=canteen.name,
+        ))
+    return PrefixIndex(suggestions)
+
+
+def suggest(db: Session, prefix: str, limit: int = 8) -> List[Suggestion]:
+    """Completions for `prefix`, served from the cached catalog snapshot."""
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    index: PrefixIndex = catalog.get(db).derived("suggest", build_suggest_index)
+    return index.lookup(prefix, limit)
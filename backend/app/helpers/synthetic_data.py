@@ -0,0 +1,512 @@
+"""
+Synthetic data at configurable scale, for benchmarks and realistic dev databases.
+
+    python -m app.helpers.synthetic_data --orders 1000000 --students 20000 --reset
+
+What it generates:
+- canteens, each with a vendor account, a merchant (placeholder keys) and a menu
+  of plausible dishes;
+- students (all sharing DEV_STUDENT_PASSWORD, hashed once) with wallets;
+- `--orders` orders over the last `--days` days, shaped like the real thing:
+  weekday/weekend volume, IST time-of-day peaks (breakfast, a lunch rush,
+  evening snacks), Zipf-skewed canteen, item and customer popularity,
+  1-4 line baskets, status timestamps that follow the order's age (the last
+  ~45 minutes are still active), and cancellations that get likelier at peak.
+
+Rows never go through the ORM. On Postgres orders and order lines are
+streamed with COPY, and worker processes generate the chunks while the main
+process copies them; elsewhere (e.g. SQLite) they are written with
+multi-row INSERTs. Each chunk has its own RNG derived from `--seed`, so the
+output does not depend on the number of workers. Integer ids start after
+the existing rows, so this can run on top of the mock_data fixtures; string
+ids carry `--prefix`, so a second run into the same database needs another
+prefix (or --reset). The daily rollups are rebuilt at the end.
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import datetime, time as dt_time, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from passlib.context import CryptContext
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base, SessionLocal, engine as default_engine
+from app.helpers.canteen_stats import STATS_TIMEZONE, backfill_canteen_stats
+from app.helpers.customizations import EMPTY_CUSTOMIZATION_HASH
+from app.helpers.mock_data import DEV_STUDENT_PASSWORD, DEV_VENDOR_PASSWORD
+from app.helpers.pricing import TAX_RATE
+from app.models.canteen import Canteen
+from app.models.menu_item import MenuItem
+from app.models.order import Order, OrderItem
+from app.models.payment import Merchant, UserWallet
+from app.models.user import User
+# Register every table, so --reset drops the ones referencing generated rows too
+import app.models.cart
+import app.models.canteen_stats
+import app.models.complaints
+
+ORDERS_PER_CHUNK = 20_000
+
+# Relative order volume per IST hour; canteens open 07:00-22:00
+HOURLY_WEIGHTS = {
+    7: 2, 8: 6, 9: 7, 10: 4, 11: 5, 12: 14, 13: 16, 14: 9,
+    15: 4, 16: 6, 17: 7, 18: 5, 19: 6, 20: 5, 21: 3,
+}
+PEAK_HOURS = {12, 13}
+WEEKEND_VOLUME = 0.4
+BASKET_SIZES = ((1, 55), (2, 30), (3, 10), (4, 5))
+PAYMENT_METHODS = (("UPI", 60), ("WALLET", 25), ("CASH", 15))
+CANCELLATION_REASONS = (
+    "Changed my mind", "Took too long", "Item unavailable", "Ordered by mistake", "Canteen closed early",
+)
+PEAK_CANCEL_BONUS = 0.03
+
+# Zipf exponents: how strongly demand concentrates on the top canteens/items/customers
+CANTEEN_SKEW = 0.8
+ITEM_SKEW = 1.1
+STUDENT_SKEW = 0.6
+
+CANTEEN_NAMES = (
+    "Central Canteen", "Library Cafe", "South Block Eatery", "North Spices", "Juice Corner",
+    "Hostel Mess", "Food Court", "Chai Point", "Tiffin Centre", "Night Canteen",
+)
+DISHES = (
+    ("Masala Dosa", "Breakfast"), ("Idli Sambar", "Breakfast"), ("Poha", "Breakfast"), ("Aloo Paratha", "Breakfast"),
+    ("Veg Thali", "Lunch"), ("Chicken Biryani", "Lunch"), ("Veg Biryani", "Lunch"), ("Rajma Chawal", "Lunch"),
+    ("Paneer Butter Masala", "Main Course"), ("Dal Makhani", "Main Course"), ("Chole Bhature", "Main Course"),
+    ("Butter Chicken", "Main Course"), ("Veg Fried Rice", "Main Course"), ("Hakka Noodles", "Main Course"),
+    ("Samosa", "Snacks"), ("Vada Pav", "Snacks"), ("Pav Bhaji", "Snacks"), ("Paneer Tikka", "Snacks"),
+    ("Veg Sandwich", "Snacks"), ("French Fries", "Snacks"), ("Masala Chai", "Beverage"), ("Filter Coffee", "Beverage"),
+    ("Cold Coffee", "Beverage"), ("Mango Lassi", "Beverage"), ("Fresh Lime Soda", "Beverage"),
+    ("Gulab Jamun", "Dessert"), ("Rasmalai", "Dessert"), ("Chocolate Brownie", "Dessert"),
+)
+NON_VEGETARIAN = {"Chicken Biryani", "Butter Chicken"}
+VARIANTS = ("", "Special", "Jumbo", "Mini", "Homestyle", "Spicy")
+CUSTOMIZATION_OPTIONS = (
+    None,
+    {"sizes": [], "additions": [{"name": "Extra Cheese", "price": 15}], "removals": ["Onion"], "notes_allowed": True},
+    {"sizes": [{"name": "Regular", "price": 0}, {"name": "Large", "price": 30}], "additions": [], "removals": [], "notes_allowed": False},
+)
+
+ORDER_COLUMNS = (
+    "id", "user_id", "canteen_id", "total_amount", "subtotal", "tax", "status", "order_time",
+    "confirmed_time", "preparing_time", "ready_time", "delivery_time", "cancelled_time",
+    "payment_method", "payment_status", "cancellation_reason", "is_pre_order",
+)
+# order_items ids come from the table's sequence
+ORDER_ITEM_COLUMNS = ("order_id", "item_id", "quantity", "snapshot_name", "snapshot_price", "customization_hash")
+
+
+class SyntheticScale(NamedTuple):
+    canteens: int = 10
+    items_per_canteen: int = 60
+    students: int = 20_000
+    orders: int = 1_000_000
+    days: int = 180
+    cancel_rate: float = 0.04
+    seed: int = 7
+
+
+class _Plan(NamedTuple):
+    """Everything a worker needs to generate any chunk of orders."""
+    scale: SyntheticScale
+    prefix: str
+    first_order_id: int
+    canteen_ids: Tuple[int, ...]
+    canteen_cum: Tuple[float, ...]
+    # Per canteen (same order as canteen_ids): item ids, names, prices and cumulative weights
+    menus: Tuple[Tuple[Tuple[int, ...], Tuple[str, ...], Tuple[float, ...], Tuple[float, ...]], ...]
+    student_cum: Tuple[float, ...]
+    # Each day's IST midnight in Unix seconds, with cumulative day weights
+    day_starts: Tuple[int, ...]
+    day_cum: Tuple[float, ...]
+    # Minute of the IST day (0-1439), with cumulative weights
+    minutes: Tuple[int, ...]
+    minute_cum: Tuple[float, ...]
+    now: int
+
+
+def _zipf_cum(n: int, skew: float) -> Tuple[float, ...]:
+    return tuple(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+def _cum(weights: Iterable[float]) -> Tuple[float, ...]:
+    return tuple(accumulate(weights))
+
+
+def student_id(prefix: str, i: int) -> str:
+    return f"{prefix}-student-{i:07d}"
+
+
+def vendor_id(prefix: str, canteen_number: int) -> str:
+    return f"{prefix}-vendor-{canteen_number:04d}"
+
+
+def _max_id(conn, table) -> int:
+    return conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+
+
+def _insert_rows(conn, table, rows: Sequence[Dict[str, Any]]) -> int:
+    # An executemany of insert(): SQLAlchemy batches it into multi-row
+    # INSERT ... VALUES statements, pages sized to the driver's parameter limit
+    if rows:
+        conn.execute(insert(table), list(rows))
+    return len(rows)
+
+
+# ===================================================================
+# REFERENCE DATA (users, canteens, menus)
+# ===================================================================
+
+def _password_hashes() -> Dict[str, str]:
+    # bcrypt is deliberately slow: hash each distinct password once, not per row
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return {"student": context.hash(DEV_STUDENT_PASSWORD), "vendor": context.hash(DEV_VENDOR_PASSWORD)}
+
+
+def _reference_rows(scale: SyntheticScale, prefix: str, first_canteen_id: int, first_item_id: int,
+                    rng: random.Random) -> Dict[str, List[Dict[str, Any]]]:
+    hashes = _password_hashes()
+    users = [
+        {"id": vendor_id(prefix, n), "name": f"Vendor {n}", "email": f"{prefix}.vendor{n}@example.com",
+         "password": hashes["vendor"], "role": "vendor", "is_vegetarian": False}
+        for n in range(1, scale.canteens + 1)
+    ]
+    users += [
+        {"id": student_id(prefix, i), "name": f"Student {i}", "email": f"{prefix}.student{i}@example.com",
+         "password": hashes["student"], "role": "student", "is_vegetarian": rng.random() < 0.4}
+        for i in range(scale.students)
+    ]
+    wallets = [{"user_id": student_id(prefix, i), "balance": 500.0} for i in range(scale.students)]
+
+    canteens, merchants, items = [], [], []
+    item_id = first_item_id
+    for n in range(1, scale.canteens + 1):
+        canteen_id = first_canteen_id + n - 1
+        canteens.append({
+            "id": canteen_id,
+            "name": f"{CANTEEN_NAMES[(n - 1) % len(CANTEEN_NAMES)]} {(n - 1) // len(CANTEEN_NAMES) + 1}",
+            "location": f"Block {chr(65 + (n - 1) % 26)}", "rating": round(rng.uniform(3.5, 4.8), 1),
+            "open_time": dt_time(7, 0), "close_time": dt_time(22, 0), "is_open": True,
+            "description": "Generated canteen.", "phone": f"{prefix}-{canteen_id:06d}",
+            "email": f"{prefix}.canteen{canteen_id}@example.com", "user_id": vendor_id(prefix, n),
+            "schedule": {"regular": "07:00-22:00"}, "tags": [],
+        })
+        # Placeholder keys, like app.helpers.mock_data: UPI payments use the mock adapter
+        merchants.append({
+            "canteen_id": canteen_id, "name": f"{canteens[-1]['name']} Merchant",
+            "razorpay_merchant_id": f"{prefix}_merchant_{canteen_id}",
+            "razorpay_key_id": "rzp_test_YOUR_KEY_ID", "razorpay_key_secret": "rzp_test_YOUR_KEY_SECRET",
+            "is_active": True,
+        })
+        # Each canteen serves a different slice of the dish list, in several variants
+        for i in range(scale.items_per_canteen):
+            dish, category = DISHES[(n * 7 + i) % len(DISHES)]
+            variant = VARIANTS[(i // len(DISHES)) % len(VARIANTS)]
+            tags = ["Vegetarian"] if dish not in NON_VEGETARIAN else []
+            if rng.random() < 0.2:
+                tags.append("Spicy")
+            items.append({
+                "id": item_id, "name": f"{variant} {dish}".strip(), "description": f"{category} favourite.",
+                "price": float(rng.randrange(20, 250, 5)), "category": category, "canteen_id": canteen_id,
+                "tags": tags, "rating": round(rng.uniform(3.0, 5.0), 1), "rating_count": rng.randint(0, 800),
+                "is_available": True, "is_featured": i < 3, "is_popular": i < 5,
+                "preparation_time": rng.choice((5, 10, 15, 20)),
+                "customization_options": CUSTOMIZATION_OPTIONS[i % len(CUSTOMIZATION_OPTIONS)],
+                "stock_count": 1_000_000,
+            })
+            item_id += 1
+    return {"users": users, "user_wallets": wallets, "canteens": canteens, "merchants": merchants, "menu_items": items}
+
+
+def _build_plan(scale: SyntheticScale, prefix: str, first_order_id: int, canteens: List[Dict[str, Any]],
+                items: List[Dict[str, Any]], rng: random.Random) -> _Plan:
+    canteen_ids = tuple(c["id"] for c in canteens)
+    # Popularity is by rank, so shuffle which canteen/item gets which rank
+    canteen_order = list(canteen_ids)
+    rng.shuffle(canteen_order)
+    canteen_cum = _zipf_cum(len(canteen_order), CANTEEN_SKEW)
+    menus = []
+    for canteen_id in canteen_order:
+        menu = [item for item in items if item["canteen_id"] == canteen_id]
+        rng.shuffle(menu)
+        menus.append((
+            tuple(item["id"] for item in menu), tuple(item["name"] for item in menu),
+            tuple(item["price"] for item in menu), _zipf_cum(len(menu), ITEM_SKEW),
+        ))
+
+    tz = ZoneInfo(STATS_TIMEZONE)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    today = now.astimezone(tz).date()
+    day_starts, day_weights = [], []
+    for back in range(scale.days - 1, -1, -1):
+        day = today - timedelta(days=back)
+        day_starts.append(int(datetime.combine(day, dt_time(0, 0), tz).timestamp()))
+        day_weights.append(WEEKEND_VOLUME if day.weekday() >= 5 else 1.0)
+    minutes = tuple(hour * 60 + m for hour in sorted(HOURLY_WEIGHTS) for m in range(60))
+    minute_cum = _cum(HOURLY_WEIGHTS[minute // 60] for minute in minutes)
+
+    return _Plan(
+        scale=scale, prefix=prefix, first_order_id=first_order_id, canteen_ids=tuple(canteen_order),
+        canteen_cum=canteen_cum, menus=tuple(menus), student_cum=_zipf_cum(scale.students, STUDENT_SKEW),
+        day_starts=tuple(day_starts), day_cum=_cum(day_weights), minutes=minutes, minute_cum=minute_cum,
+        now=int(now.timestamp()),
+    )
+
+
+# ===================================================================
+# ORDERS
+# ===================================================================
+
+def _pick(rng: random.Random, cum: Sequence[float]) -> int:
+    return bisect(cum, rng.random() * cum[-1])
+
+
+def _between(rng: random.Random, low: int, high: int) -> int:
+    # randint() is several times slower, and this runs millions of times
+    return low + int(rng.random() * (high - low + 1))
+
+
+def _weighted(options: Sequence[Tuple[Any, int]]) -> Tuple[Tuple[Any, ...], Tuple[float, ...]]:
+    return tuple(o for o, _ in options), _cum(w for _, w in options)
+
+
+_BASKETS, _BASKET_CUM = _weighted(BASKET_SIZES)
+_PAYMENTS, _PAYMENT_CUM = _weighted(PAYMENT_METHODS)
+
+
+def _order_rows(plan: _Plan, chunk: int, stamp: Callable[[int], Any]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Rows for chunk `chunk` of the orders, as tuples in ORDER_COLUMNS / ORDER_ITEM_COLUMNS
+    order. Times are computed in Unix seconds and passed through `stamp`.
+    """
+    scale = plan.scale
+    rng = random.Random(scale.seed * 1_000_003 + chunk)
+    first = plan.first_order_id + chunk * ORDERS_PER_CHUNK
+    last = min(plan.first_order_id + scale.orders, first + ORDERS_PER_CHUNK)
+    orders, lines = [], []
+    now, minutes, minute_cum, day_starts, day_cum = plan.now, plan.minutes, plan.minute_cum, plan.day_starts, plan.day_cum
+    minute = 60
+
+    for order_id in range(first, last):
+        canteen_index = _pick(rng, plan.canteen_cum)
+        item_ids, names, prices, item_cum = plan.menus[canteen_index]
+        local_minute = minutes[_pick(rng, minute_cum)]
+        placed = day_starts[_pick(rng, day_cum)] + local_minute * 60 + _between(rng, 0, 59)
+        if placed > now:
+            # Later today: fold back into the last 24 hours at the same time of day
+            placed -= 86_400
+
+        basket: Dict[int, int] = {}
+        for _ in range(_BASKETS[_pick(rng, _BASKET_CUM)]):
+            index = _pick(rng, item_cum)
+            basket[index] = basket.get(index, 0) + (1 if rng.random() < 0.8 else 2)
+        subtotal = 0.0
+        for index, quantity in basket.items():
+            subtotal += prices[index] * quantity
+            lines.append((order_id, item_ids[index], quantity, names[index], prices[index], EMPTY_CUSTOMIZATION_HASH))
+        subtotal = round(subtotal, 2)
+        tax = round(subtotal * TAX_RATE, 2)
+        payment = _PAYMENTS[_pick(rng, _PAYMENT_CUM)]
+
+        confirmed = preparing = ready = delivered = cancelled_at = reason = None
+        cancel_rate = scale.cancel_rate + (PEAK_CANCEL_BONUS if local_minute // 60 in PEAK_HOURS else 0.0)
+        if rng.random() < cancel_rate:
+            status = "cancelled"
+            cancelled_at = placed + minute * _between(rng, 1, 10)
+            reason = CANCELLATION_REASONS[_between(rng, 0, len(CANCELLATION_REASONS) - 1)]
+            payment_status = "Pending" if payment == "CASH" else "Refunded"
+        else:
+            # Lifecycle: confirmed in 1-3 min, cooking starts 1-4 min later, 5-20 min
+            # to cook, picked up 2-10 min after it's ready
+            confirmed = placed + minute * _between(rng, 1, 3)
+            preparing = confirmed + minute * _between(rng, 1, 4)
+            ready = preparing + minute * _between(rng, 5, 20)
+            delivered = ready + minute * _between(rng, 2, 10)
+            if delivered <= now:
+                status = "delivered"
+            elif ready <= now:
+                status, delivered = "ready", None
+            elif preparing <= now:
+                status, ready, delivered = "preparing", None, None
+            elif confirmed <= now:
+                status, preparing, ready, delivered = "confirmed", None, None, None
+            else:
+                status, confirmed, preparing, ready, delivered = "pending", None, None, None, None
+            payment_status = "Completed" if payment != "CASH" or status == "delivered" else "Pending"
+
+        orders.append((
+            order_id, student_id(plan.prefix, _pick(rng, plan.student_cum)), plan.canteen_ids[canteen_index],
+            round(subtotal + tax, 2), subtotal, tax, status, stamp(placed),
+            *(None if t is None else stamp(t) for t in (confirmed, preparing, ready, delivered, cancelled_at)),
+            payment, payment_status, reason, False,
+        ))
+    return orders, lines
+
+
+_day_text: Dict[int, str] = {}
+
+
+def _timestamp_text(seconds: int) -> str:
+    # Formatting datetimes dominated CSV generation; only the date needs it
+    day, second = divmod(seconds, 86_400)
+    date = _day_text.get(day)
+    if date is None:
+        date = _day_text[day] = datetime.fromtimestamp(day * 86_400, timezone.utc).strftime("%Y-%m-%d")
+    hour, second = divmod(second, 3600)
+    minute, second = divmod(second, 60)
+    return f"{date} {hour:02d}:{minute:02d}:{second:02d}+00"
+
+
+def _timestamp_datetime(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def _to_csv(rows: Iterable[tuple]) -> str:
+    # csv writes None as an unquoted empty field, which COPY reads as NULL;
+    # Postgres accepts True/False for booleans
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+_worker_plan: Optional[_Plan] = None
+
+
+def _init_worker(plan: _Plan) -> None:
+    global _worker_plan
+    _worker_plan = plan
+
+
+def _order_chunk_csv(chunk: int) -> Tuple[int, str, str]:
+    orders, lines = _order_rows(_worker_plan, chunk, _timestamp_text)
+    return len(orders), _to_csv(orders), _to_csv(lines)
+
+
+def _csv_chunks(plan: _Plan, chunks: Iterable[int], workers: int) -> Iterator[Tuple[int, str, str]]:
+    if workers <= 1:
+        _init_worker(plan)
+        yield from map(_order_chunk_csv, chunks)
+        return
+    # Workers generate the chunks in order while this process copies them
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan,)) as pool:
+        yield from pool.imap(_order_chunk_csv, chunks)
+
+
+def _copy(cursor, table: str, columns: Sequence[str], data: str) -> None:
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", io.StringIO(data))
+
+
+def _write_orders(engine: Engine, plan: _Plan, workers: int) -> Tuple[int, int]:
+    chunks = range((plan.scale.orders + ORDERS_PER_CHUNK - 1) // ORDERS_PER_CHUNK)
+    order_count = line_count = 0
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        if engine.dialect.name == "postgresql" and hasattr(cursor, "copy_expert"):
+            for orders, order_csv, line_csv in _csv_chunks(plan, chunks, workers):
+                _copy(cursor, "orders", ORDER_COLUMNS, order_csv)
+                _copy(cursor, "order_items", ORDER_ITEM_COLUMNS, line_csv)
+                order_count += orders
+                line_count += line_csv.count("\n")
+            return order_count, line_count
+
+        for chunk in chunks:
+            orders, lines = _order_rows(plan, chunk, _timestamp_datetime)
+            order_count += _insert_rows(conn, Order.__table__, [dict(zip(ORDER_COLUMNS, row)) for row in orders])
+            line_count += _insert_rows(conn, OrderItem.__table__, [dict(zip(ORDER_ITEM_COLUMNS, row)) for row in lines])
+    return order_count, line_count
+
+
+def _reset_sequences(conn) -> None:
+    for table in ("canteens", "menu_items", "orders", "order_items", "user_wallets"):
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+def generate(scale: SyntheticScale, prefix: str = "synthetic", reset: bool = False,
+             workers: Optional[int] = None, engine: Engine = default_engine) -> Dict[str, Any]:
+    """Writes a synthetic dataset. Returns row counts per table and seconds per phase."""
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(scale.seed)
+    with engine.begin() as conn:
+        first_canteen_id = _max_id(conn, Canteen.__table__) + 1
+        first_item_id = _max_id(conn, MenuItem.__table__) + 1
+        first_order_id = _max_id(conn, Order.__table__) + 1
+        reference = _reference_rows(scale, prefix, first_canteen_id, first_item_id, rng)
+        counts: Dict[str, Any] = {
+            "users": _insert_rows(conn, User.__table__, reference["users"]),
+            "user_wallets": _insert_rows(conn, UserWallet.__table__, reference["user_wallets"]),
+            "canteens": _insert_rows(conn, Canteen.__table__, reference["canteens"]),
+            "merchants": _insert_rows(conn, Merchant.__table__, reference["merchants"]),
+            "menu_items": _insert_rows(conn, MenuItem.__table__, reference["menu_items"]),
+        }
+    timings["reference_seconds"] = time.perf_counter() - started
+
+    phase = time.perf_counter()
+    plan = _build_plan(scale, prefix, first_order_id, reference["canteens"], reference["menu_items"], rng)
+    counts["orders"], counts["order_items"] = _write_orders(engine, plan, workers or os.cpu_count() or 1)
+    timings["orders_seconds"] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            _reset_sequences(conn)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+        db = SessionLocal(bind=engine)
+        try:
+            counts["canteen_daily_stats"] = backfill_canteen_stats(db)
+        finally:
+            db.close()
+    timings["finish_seconds"] = time.perf_counter() - phase
+    timings["total_seconds"] = time.perf_counter() - started
+    return {**counts, **timings}
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser, defaults: SyntheticScale = SyntheticScale()) -> None:
+    parser.add_argument("--canteens", type=int, default=defaults.canteens)
+    parser.add_argument("--items", type=int, default=defaults.items_per_canteen, help="Menu items per canteen.")
+    parser.add_argument("--students", type=int, default=defaults.students)
+    parser.add_argument("--orders", type=int, default=defaults.orders)
+    parser.add_argument("--days", type=int, default=defaults.days, help="Days of order history.")
+    parser.add_argument("--cancel-rate", type=float, default=defaults.cancel_rate, help="Off-peak cancellation rate.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def scale_from_args(args: argparse.Namespace) -> SyntheticScale:
+    return SyntheticScale(args.canteens, args.items, args.students, args.orders, args.days, args.cancel_rate, args.seed)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic canteens, users and orders.")
+    add_scale_arguments(parser)
+    parser.add_argument("--prefix", default="synthetic", help="Prefix for generated user ids and emails.")
+    parser.add_argument("--workers", type=int, help="Processes generating orders (default: CPU count).")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate every table first.")
+    args = parser.parse_args(argv)
+
+    result = generate(scale_from_args(args), prefix=args.prefix, reset=args.reset, workers=args.workers)
+    for key, value in result.items():
+        print(f"  {key:<20} {value:>12.1f}" if isinstance(value, float) else f"  {key:<20} {value:>12}")
+    print(f"✅ Generated {result['orders']} orders in {result['total_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
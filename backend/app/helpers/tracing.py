@@ -0,0 +1,246 @@
+"""
+Sampled per-operation traces: where the time of a slow GraphQL request went.
+
+`TracingExtension` records a span tree for a sampled fraction
+(TRACE_SAMPLE_RATE) of operations:
+
+    operation
+    ├── parse
+    ├── validate
+    └── execute
+        ├── Query.getCanteenOrders              (resolver)
+        │   ├── sql: SELECT ... FROM orders ...
+        │   └── sql: SELECT ... FROM menu_items ...   (e.g. a lazy load)
+        └── ...
+
+Root resolvers always get a span. Nested fields get one only if they ran SQL
+or took at least TRACE_FIELD_MIN_MS; the rest are attribute reads and would
+just bury the useful spans. SQL spans come from engine events and hang off
+the resolver that was running when the statement executed. Statements are
+previewed without their parameters.
+
+The TRACE_BUFFER_SIZE slowest traces per worker are kept in `slow_traces` and
+served to admins by the `slowTraces` query.
+"""
+import heapq
+import inspect
+import itertools
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from strawberry.extensions import SchemaExtension
+
+from app.helpers.query_cost import operation_label
+from app.helpers.query_stats import _preview
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "20"))
+TRACE_FIELD_MIN_MS = float(os.getenv("TRACE_FIELD_MIN_MS", "1"))
+# Spans beyond this are counted in `dropped_spans` instead of recorded
+TRACE_MAX_SPANS = 2000
+
+
+def _path_key(path) -> Tuple[Any, ...]:
+    return tuple(path.as_list())
+
+
+class Span:
+    __slots__ = ("id", "parent_id", "name", "kind", "start", "end", "has_sql")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, kind: str, start: float):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end: Optional[float] = None
+        self.has_sql = False
+
+
+class Trace:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self.operation = "unknown"
+        self.origin = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self._ids = itertools.count(1)
+        self.root = self.start_span(None, "operation", "operation")
+        self.execute: Optional[Span] = None
+        # Kept field spans by response path, so nested fields find their parent
+        self.fields: Dict[Tuple[Any, ...], Span] = {}
+
+    def start_span(self, parent: Optional[Span], name: str, kind: str) -> Span:
+        return Span(next(self._ids), parent.id if parent else None, name, kind, time.perf_counter())
+
+    def keep(self, span: Span) -> None:
+        span.end = span.end or time.perf_counter()
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        self.spans.append(span)
+
+    def field_parent(self, path) -> Span:
+        path = path.prev
+        while path is not None:
+            span = self.fields.get(_path_key(path))
+            if span is not None:
+                return span
+            path = path.prev
+        return self.execute or self.root
+
+    def finish_field(self, span: Span, path) -> None:
+        span.end = time.perf_counter()
+        is_root = path.prev is None
+        if is_root or span.has_sql or (span.end - span.start) * 1000 >= TRACE_FIELD_MIN_MS:
+            self.fields[_path_key(path)] = span
+            self.keep(span)
+
+    def offset_ms(self, instant: float) -> float:
+        return (instant - self.origin) * 1000
+
+
+class SlowTraceBuffer:
+    """The `max_entries` slowest traces seen (a min-heap on duration)."""
+    def __init__(self, max_entries: int = TRACE_BUFFER_SIZE):
+        self.max_entries = max_entries
+        self._heap: List[Tuple[float, int, Trace]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def offer(self, trace: Trace) -> None:
+        with self._lock:
+            self.recorded += 1
+            entry = (trace.duration, next(self._sequence), trace)
+            if len(self._heap) < self.max_entries:
+                heapq.heappush(self._heap, entry)
+            elif trace.duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Trace]:
+        with self._lock:
+            traces = [trace for _, _, trace in sorted(self._heap, reverse=True)]
+        return traces[:limit] if limit is not None else traces
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+
+slow_traces = SlowTraceBuffer()
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    trace = _trace.get()
+    if trace is None:
+        return
+    parent = _span.get()
+    conn.info.setdefault("trace_spans", []).append(trace.start_span(parent, _preview(statement), "sql"))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    trace = _trace.get()
+    if not spans or trace is None:
+        return
+    span = spans.pop()
+    span.end = time.perf_counter()
+    parent = _span.get()
+    if parent is not None:
+        parent.has_sql = True
+    trace.keep(span)
+
+
+class TracingExtension(SchemaExtension):
+    """
+    Records a span tree for sampled operations (see module docstring).
+
+    Strawberry reuses the first instance's `resolve` for later operations, so
+    all per-operation state lives in the context variables, not on `self`.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        if random.random() >= TRACE_SAMPLE_RATE:
+            yield
+            return
+        trace = Trace()
+        trace_token = _trace.set(trace)
+        span_token = _span.set(trace.root)
+        try:
+            yield
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+            trace.keep(trace.root)
+            trace.operation = operation_label(self.execution_context)
+            trace.duration = trace.root.end - trace.root.start
+            slow_traces.offer(trace)
+
+    def _phase(self, name: str) -> Iterator[None]:
+        trace = _trace.get()
+        if trace is None:
+            yield
+            return
+        span = trace.start_span(trace.root, name, "phase")
+        if name == "execute":
+            trace.execute = span
+        token = _span.set(span)
+        try:
+            yield
+        finally:
+            # A hook left unfinished by a failed phase is closed on garbage
+            # collection, outside the operation: the trace is no longer its to touch
+            if _trace.get() is trace:
+                _span.reset(token)
+                trace.keep(span)
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._phase("parse")
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._phase("validate")
+
+    def on_execute(self) -> Iterator[None]:
+        yield from self._phase("execute")
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        trace = _trace.get()
+        if trace is None:
+            return _next(root, info, *args, **kwargs)
+        span = trace.start_span(trace.field_parent(info.path), f"{info.parent_type.name}.{info.field_name}", "resolver")
+        token = _span.set(span)
+        try:
+            result = _next(root, info, *args, **kwargs)
+        except Exception:
+            trace.finish_field(span, info.path)
+            raise
+        finally:
+            _span.reset(token)
+        if not inspect.isawaitable(result):
+            trace.finish_field(span, info.path)
+            return result
+
+        async def traced():
+            inner = _span.set(span)
+            try:
+                return await result
+            finally:
+                _span.reset(inner)
+                trace.finish_field(span, info.path)
+        return traced()
@@ -1,31 +1,72 @@
+import time
+
+# Taken before anything heavy is imported, for the startup report
+_IMPORTS_STARTED = time.perf_counter()
+
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 # Import the core components of your application
-from app.core.database import Base, engine, get_db
+from app.core.database import engine, get_db
+# Importing the schema imports (and so registers) every model; see app/schema.py
 from app.schema import schema
 from app.helpers.middleware import AuthMiddleware
+from app.helpers.persisted_queries import PersistedQueryRouter
+from app.helpers.query_stats import QueryStatsMiddleware
 
-# Ensure all models are imported so SQLAlchemy mappers and Strawberry types are
-# registered before creating tables and building the GraphQL schema.
-import app.models.user
-import app.models.canteen
-import app.models.order
-import app.models.menu_item
-import app.models.cart
-import app.models.payment
-import app.models.complaints
 import app.helpers.payment as payment_helpers
 import app.helpers.dev_helpers as dev_helpers
+import app.helpers.export as export_helpers
+import app.helpers.http_cache as http_cache_helpers
+import app.helpers.metrics as metrics_helpers
+
+logger = logging.getLogger(__name__)
+
+# The app never creates or alters tables: the schema belongs to the Alembic
+# migrations, which docker-compose and the deployment's init container run
+# (`alembic upgrade head`) before the API starts. Startup only checks the
+# database is reachable, and gives up on waiting after this many seconds rather
+# than holding the pod back.
+STARTUP_DB_TIMEOUT = float(os.getenv("STARTUP_DB_TIMEOUT", "3"))
+
+def _warm_up_database() -> None:
+    # Opens the pool's first connection, so the first request doesn't pay for it
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown. Logs a startup timing report (also exported at /api/metrics)."""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_warm_up_database), timeout=STARTUP_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Database did not answer within %.1fs; starting anyway", STARTUP_DB_TIMEOUT)
+    except Exception as exc:
+        logger.warning("Database is not reachable yet (%s); starting anyway", exc)
+    database_seconds = time.perf_counter() - started
+
+    metrics_helpers.startup_seconds.update(
+        imports=IMPORT_SECONDS,
+        database=database_seconds,
+        total=time.perf_counter() - _IMPORTS_STARTED,
+    )
+    logger.info(
+        "Startup: imports %.0f ms, database %.0f ms, ready %.0f ms after import began",
+        IMPORT_SECONDS * 1000, database_seconds * 1000, metrics_helpers.startup_seconds["total"] * 1000,
+    )
+    yield
+    engine.dispose()
 
-# Best Practice Note: In a production application, you would typically use a migration
-# tool like Alembic to manage your database schema instead of `create_all`.
-# This line is great for development and testing.
-Base.metadata.create_all(bind=engine)
 
 # CRITICAL FIX: The context getter now uses FastAPI's dependency injection system
 # to provide a database session to every single GraphQL resolver.
@@ -54,14 +95,15 @@ IS_PROD = os.getenv("ENV", "").lower() == "production"
 # - GraphiQL playground is disabled (graphiql=False)
 # - Introspection is disabled via schema config in schema.py (if supported by installed Strawberry version)
 # Set ENV=production in your process environment for deployment to enforce these hardening measures.
-graphql_app = GraphQLRouter(
+# PersistedQueryRouter adds automatic persisted queries (hash-only requests) on top of GraphQLRouter.
+graphql_app = PersistedQueryRouter(
     schema=schema,
     context_getter=get_context,
     graphiql=not IS_PROD  # Disable GraphiQL playground in production
 )
 
 # Initialize the main FastAPI application.
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add your custom authentication middleware first to populate `request.scope["user"]`.
 app.add_middleware(AuthMiddleware)
@@ -77,16 +119,28 @@ app.add_middleware(
         "https://canteen-x-kappa.vercel.app",
     ],  # tighten wildcard domains in production; expand only if necessary
     allow_credentials=True,
-    allow_methods=["POST", "OPTIONS"],  # GraphQL typically needs only POST + preflight
-    allow_headers=["Authorization", "Content-Type"],
+    allow_methods=["GET", "POST", "OPTIONS"],  # POST for GraphQL, GET for the cacheable /api/cached queries
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
+# Added last so it wraps everything: counts every SQL statement a request runs
+# (auth lookup included) and adds a Server-Timing header.
+app.add_middleware(QueryStatsMiddleware)
+
 # Include the GraphQL router in your FastAPI application.
 app.include_router(graphql_app, prefix="/api/graphql")
 
 # Include REST payment endpoints (initiate/verify) used by the frontend demo checkout
 app.include_router(payment_helpers.router)
 app.include_router(dev_helpers.router)
+# Streaming CSV/NDJSON order exports for vendors and admins
+app.include_router(export_helpers.router)
+# GET-able persisted catalog queries with ETag / Cache-Control
+app.include_router(http_cache_helpers.router)
+# Prometheus text-format metrics (latency, resolvers, SQL, pool, caches)
+app.include_router(metrics_helpers.router)
+metrics_helpers.instrument_pool(engine.pool)
 
 @app.get("/api/hello")
 async def read_root():
@@ -103,6 +157,9 @@ async def health_check():
     """A simple health check endpoint."""
     return {"status": "healthy"}
 
+# Everything above ran at import time; the lifespan reports it
+IMPORT_SECONDS = time.perf_counter() - _IMPORTS_STARTED
+
 # Standard entrypoint for running the application with uvicorn.
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
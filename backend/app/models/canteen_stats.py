@@ -0,0 +1,47 @@
+import strawberry
+from typing import Optional
+
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+# ===================================================================
+# 1. STRAWBERRY GRAPHQL OUTPUT TYPES (for Queries)
+# ===================================================================
+
+@strawberry.type
+class CanteenRangeStatsType:
+    """Per-canteen totals over a date range, read from the daily rollups."""
+    canteenId: int
+    name: str
+    isOpen: bool
+    orderCount: int
+    cancelledCount: int
+    # Revenue of non-cancelled orders
+    revenue: float
+    # Average ticket of non-cancelled orders
+    avgTicket: float
+    fromDate: Optional[str] = None
+    toDate: Optional[str] = None
+
+# ===================================================================
+# 2. SQLAlchemy DATABASE MODEL
+# ===================================================================
+
+class CanteenDailyStats(Base):
+    """
+    Per-canteen, per-day order counters (day is the IST calendar date of `order_time`).
+    Maintained incrementally by `app.helpers.canteen_stats` when orders are
+    created or cancelled, and rebuildable with its backfill command.
+    """
+    __tablename__ = "canteen_daily_stats"
+    __table_args__ = (UniqueConstraint("canteen_id", "day", name="uq_canteen_daily_stats_canteen_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    canteen_id = Column(Integer, ForeignKey("canteens.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    order_count = Column(Integer, nullable=False, default=0)
+    # Sum of total_amount over every order placed that day, cancelled or not
+    gross_revenue = Column(Float, nullable=False, default=0.0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    cancelled_revenue = Column(Float, nullable=False, default=0.0)
@@ -1,11 +1,13 @@
 import strawberry
+from enum import Enum as PyEnum
 from typing import Optional, List, Any
 from datetime import datetime, timezone
 from app.helpers.time_utils import to_ist_iso
 
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.helpers.customizations import customization_hash
 
 # ===================================================================
 # 1. STRAWBERRY GRAPHQL OUTPUT TYPES (for Queries)
@@ -34,6 +36,9 @@ class CartItemType:
     specialInstructions: Optional[str] = None
     location: Optional[str] = None
     customizations: Optional[CustomizationsType] = None
+    # Server-side price of one unit including customization surcharges, and unitPrice * quantity
+    unitPrice: Optional[float] = None
+    lineTotal: Optional[float] = None
 
 
 @strawberry.type
@@ -46,6 +51,10 @@ class CartType:
     pickupDate: Optional[str] = None
     pickupTime: Optional[str] = None
     items: Optional[List[CartItemType]] = None
+    # Totals priced on the server (see app.helpers.pricing)
+    subtotal: float = 0.0
+    tax: float = 0.0
+    total: float = 0.0
 
 
 # ===================================================================
@@ -77,6 +86,29 @@ class AddToCartInput:
     canteenName: Optional[str] = None
 
 
+class CartOpKind(PyEnum):
+    ADD = "add"
+    UPDATE = "update"
+    REMOVE = "remove"
+
+CartOpKindEnum = strawberry.enum(CartOpKind)
+
+
+@strawberry.input
+class CartOp:
+    """
+    One change in a batch cart edit.
+    - ADD: menuItemId, quantity (default 1) and optional customizations
+    - UPDATE: cartItemId and the new quantity (0 or less removes the line)
+    - REMOVE: cartItemId
+    """
+    op: CartOpKindEnum
+    menuItemId: Optional[int] = None
+    cartItemId: Optional[int] = None
+    quantity: Optional[int] = None
+    customizations: Optional[CustomizationsInput] = None
+
+
 # ===================================================================
 # 3. STRAWBERRY MUTATION RESPONSE TYPE
 # ===================================================================
@@ -94,6 +126,18 @@ class CartMutationResponse:
     cartItem: Optional[CartItemType] = None
 
 
+@strawberry.type
+class CartOperationsResponse:
+    """Result of applyCartOperations: the final cart, returned once for the whole batch."""
+    success: bool
+    message: str
+    cart: Optional[CartType] = None
+    # Number of cart lines actually written (inserted, updated or deleted)
+    appliedCount: int = 0
+    # Indexes (into the submitted ops) of ops folded into an earlier op on the same line
+    coalescedOps: List[int] = strawberry.field(default_factory=list)
+
+
 # ===================================================================
 # 4. SQLAlchemy DATABASE MODELS
 # ===================================================================
@@ -109,7 +153,8 @@ class Cart(Base):
 
     user_id = Column(String, ForeignKey("users.id"), unique=True, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc)) 
+    # Indexed for the abandoned-cart sweeper (app.helpers.cart_sweeper)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), index=True)
     pickup_date = Column(DateTime, nullable=True)
     pickup_time = Column(String, nullable=True)
     user = relationship("User", back_populates="cart")
@@ -129,13 +174,24 @@ class CartItem(Base):
     The SQLAlchemy model for a single item within a cart.
     This is the source of truth for what a user has in their cart.
     It does NOT store redundant data like name or price.
+    A cart holds at most one line per (menu item, canonical customizations),
+    enforced by the unique index on `customization_hash`.
     """
     __tablename__ = "cart_items"
-    
+    __table_args__ = (
+        Index("uq_cart_items_line", "cart_id", "menu_item_id", "customization_hash", unique=True),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     quantity = Column(Integer, default=1, nullable=False)
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False)
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"), nullable=False)
     customizations = Column(JSON, nullable=True)
+    # sha256 of the canonical customizations; see app.helpers.customizations
+    customization_hash = Column(
+        String(64),
+        nullable=False,
+        default=lambda ctx: customization_hash(ctx.get_current_parameters().get("customizations")),
+    )
     cart = relationship("Cart", back_populates="items")
     menu_item = relationship("MenuItem", lazy="joined")
\ No newline at end of file
@@ -1,4 +1,5 @@
 import strawberry
+from enum import Enum as PyEnum
 from typing import Optional, List
 
 from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, ForeignKey
@@ -54,6 +55,58 @@ class MenuItemType:
     isFeatured: Optional[bool] = False
     stockCount: int = 0
 
+class SuggestionKind(PyEnum):
+    MENU_ITEM = "menu_item"
+    TAG = "tag"
+    CANTEEN = "canteen"
+
+SuggestionKindEnum = strawberry.enum(SuggestionKind)
+
+
+@strawberry.type
+class SuggestionType:
+    """One typeahead completion: a menu item, a tag or a canteen name."""
+    text: str
+    kind: SuggestionKindEnum
+    menuItemId: Optional[int] = None
+    canteenId: Optional[int] = None
+    canteenName: Optional[str] = None
+
+class BrowseSort(PyEnum):
+    POPULAR = "popular"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+    RATING = "rating"
+    NAME = "name"
+
+BrowseSortEnum = strawberry.enum(BrowseSort)
+
+
+@strawberry.type
+class FacetCount:
+    value: str
+    count: int
+
+
+@strawberry.type
+class MenuFacetsType:
+    """
+    How many items each facet value would match, given the filters on the
+    other facets (so counts within a multi-select facet don't collapse to 0).
+    """
+    categories: List[FacetCount]
+    tags: List[FacetCount]
+    priceBands: List[FacetCount]
+    vegetarian: int = 0
+    nonVegetarian: int = 0
+
+
+@strawberry.type
+class BrowseMenuResult:
+    items: List[MenuItemType]
+    total: int
+    facets: MenuFacetsType
+
 # ===================================================================
 # 2. STRAWBERRY GRAPHQL INPUT TYPES (for Mutations)
 # ===================================================================
@@ -105,6 +158,18 @@ class UpdateMenuItemInput:
     preparation_time: Optional[int] = None
     customization_options: Optional[CustomizationOptionsInput] = None
 
+@strawberry.input
+class BrowseMenuFilters:
+    """
+    Filters for browseMenu. Values within categories and price bands are
+    alternatives (OR); tags must all be present (AND); facets combine with AND.
+    """
+    categories: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    vegetarian: Optional[bool] = None
+    priceBands: Optional[List[str]] = None
+    availableOnly: bool = False
+
 # ===================================================================
 # 3. STRAWBERRY MUTATION RESPONSE TYPE
 # ===================================================================
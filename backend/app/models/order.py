@@ -7,6 +7,7 @@ from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Foreig
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.helpers.time_utils import to_ist_iso
+from app.helpers.customizations import EMPTY_CUSTOMIZATION_HASH
 
 # =_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=_=
 # 1. STRAWBERRY GRAPHQL OUTPUT TYPES (for Queries)
@@ -273,6 +274,8 @@ class OrderItem(Base):
     # Snapshot fields: store the name and unit price at the time of order
     snapshot_name = Column(String, nullable=True)
     snapshot_price = Column(Float, nullable=True)
+    # sha256 of the canonical customizations; see app.helpers.customizations
+    customization_hash = Column(String(64), nullable=False, index=True, default=EMPTY_CUSTOMIZATION_HASH)
     
     # --- Relationships ---
     order = relationship("Order", back_populates="items")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, Optional
 from app.models.payment import PaymentStatus, PaymentMethod # Import your enums
 
 # --- Payment DTOs ---
@@ -12,6 +12,21 @@ class PaymentCreateDTO(BaseModel):
     payment_status: PaymentStatus = PaymentStatus.PENDING
     razorpay_order_id: Optional[str] = None
 
+class PaymentRecordDTO(BaseModel):
+    """Session-independent view of a payment row, built from an INSERT ... RETURNING."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    order_id: int
+    user_id: str
+    merchant_id: Optional[int] = None
+    amount: float
+    payment_method: PaymentMethod
+    payment_status: PaymentStatus
+    razorpay_order_id: Optional[str] = None
+    # Processor data is never stored; it is attached for the client response only.
+    processor_data: Dict[str, Any] = {}
+
 class PaymentUpdateDTO(BaseModel):
     payment_status: Optional[PaymentStatus] = None
     transaction_id: Optional[str] = None
@@ -5,7 +5,6 @@ from fastapi import Response
 from passlib.context import CryptContext
 from strawberry.types import Info
 from sqlalchemy.orm import Session
-from cas import CASClient
 from urllib.parse import quote_plus
 from graphql import GraphQLError
 
@@ -24,11 +23,24 @@ CAS_SERVER_URL = os.getenv('CAS_SERVER_URL', 'https://login-new.iiit.ac.in/cas/'
 SERVICE_URL = os.getenv('SERVICE_URL', f'{BASE_URL}{SUBPATH}/cas')
 REDIRECT_URL = os.getenv('REDIRECT_URL', f'{BASE_URL}{SUBPATH}/cas')
 
-cas_client = CASClient(
-    version=3,
-    service_url=f"{SERVICE_URL}?next={quote_plus(REDIRECT_URL)}",
-    server_url=CAS_SERVER_URL,
-)
+_cas_client = None
+
+
+def get_cas_client():
+    """
+    The CAS client, built on first use. python-cas pulls in requests and lxml,
+    which a pod only needs once someone actually signs in through CAS.
+    """
+    global _cas_client
+    if _cas_client is None:
+        from cas import CASClient
+
+        _cas_client = CASClient(
+            version=3,
+            service_url=f"{SERVICE_URL}?next={quote_plus(REDIRECT_URL)}",
+            server_url=CAS_SERVER_URL,
+        )
+    return _cas_client
 
 @strawberry.type
 class AuthMutations:
@@ -61,7 +73,7 @@ class AuthMutations:
         """
         Returns the CAS login URL for the client to redirect the user to.
         """
-        return cas_client.get_login_url()
+        return get_cas_client().get_login_url()
 
     @strawberry.mutation
     def verify_cas_ticket(self, info: Info, ticket: str) -> AuthResponse:
@@ -74,7 +86,7 @@ class AuthMutations:
         db: Session = info.context["db"]
 
         try:
-            cas_user, attributes, _ = cas_client.verify_ticket(ticket)
+            cas_user, attributes, _ = get_cas_client().verify_ticket(ticket)
 
             if not cas_user:
                 return AuthResponse(success=False, message="Invalid or expired CAS ticket.", role=None, user=None)
@@ -1,17 +1,21 @@
 import strawberry
-import json
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from strawberry.types import Info
 from graphql import GraphQLError
 from datetime import datetime, timezone
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import JSON, Text, cast, delete, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.database import get_db
 from app.models.cart import Cart, CartItem, CartType, AddToCartInput, CustomizationsInput, CartMutationResponse, CartItemType, CustomizationsType
+from app.models.cart import CartOp, CartOpKind, CartOperationsResponse
 from app.models.menu_item import MenuItem
+from app.models.canteen import Canteen
 from app.models.user import User
+from app.helpers.customizations import canonicalize_customizations, customization_hash
+from app.helpers.pricing import price_tables, unit_price
+from app.queries.cart_queries import load_cart_type, parse_customizations
 
 # This helper function is central to getting or creating a user's cart.
 def _get_or_create_user_cart(db: Session, user_id: str):
@@ -27,13 +31,152 @@ def _get_or_create_user_cart(db: Session, user_id: str):
 
 # This helper normalizes customization data for consistent database storage and comparison.
 def _normalize_customizations(customizations: Optional[CustomizationsInput]) -> Optional[Dict[str, Any]]:
-    """Converts the CustomizationInput into a consistent dictionary for the database."""
+    """Converts the CustomizationInput into the canonical dictionary stored in the database."""
     if not customizations:
         return None
-    
-    # Use .__dict__ to get all fields from the input object
-    # Filter out unset values to avoid storing nulls for every possible key
-    return {k: v for k, v in customizations.__dict__.items() if v is not strawberry.UNSET}
+    return canonicalize_customizations(customizations)
+
+
+def _upsert_cart_line(
+    db: Session, user_id: str, menu_item_id: int, quantity: int, customizations: Optional[Dict[str, Any]]
+):
+    """
+    Adds `quantity` of a line to the user's cart with a single statement:
+    the cart row is created (or its updated_at bumped) in a CTE, and the line is
+    inserted or incremented through the (cart_id, menu_item_id, customization_hash)
+    unique index. Returns the resulting line's columns. Does not commit.
+    """
+    now = datetime.now(timezone.utc)
+    cart_row = (
+        pg_insert(Cart)
+        .values(user_id=user_id, created_at=now, updated_at=now)
+        .on_conflict_do_update(index_elements=[Cart.user_id], set_={"updated_at": now})
+        .returning(Cart.id)
+        .cte("cart_row")
+    )
+    line = pg_insert(CartItem).from_select(
+        ["cart_id", "menu_item_id", "quantity", "customizations", "customization_hash"],
+        # WHERE true keeps ON CONFLICT from being parsed as part of the SELECT
+        select(
+            cart_row.c.id,
+            literal(menu_item_id),
+            literal(quantity),
+            literal(customizations, JSON),
+            literal(customization_hash(customizations)),
+        ).where(true()),
+    )
+    line = line.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.menu_item_id, CartItem.customization_hash],
+        set_={"quantity": CartItem.quantity + line.excluded.quantity},
+    ).returning(CartItem.id, CartItem.cart_id, CartItem.menu_item_id, CartItem.quantity, CartItem.customizations)
+    return db.execute(line).one()
+
+
+def _selects_field(info: Info, name: str) -> bool:
+    """Whether the client selected `name` on this mutation's payload (fragments included)."""
+    def _contains(selections) -> bool:
+        for selection in selections:
+            # Fragments carry selections but no name; fields carry a name
+            if getattr(selection, "name", None) == name and not hasattr(selection, "type_condition"):
+                return True
+            if hasattr(selection, "type_condition") and _contains(selection.selections):
+                return True
+        return False
+
+    return any(_contains(field.selections) for field in info.selected_fields)
+
+
+class _PendingLine:
+    """In-memory state of one cart line while a batch of operations is folded."""
+    __slots__ = ("id", "menu_item_id", "customizations", "customization_hash", "quantity", "original_quantity", "touched")
+
+    def __init__(self, id, menu_item_id, customizations, customization_hash, quantity):
+        self.id = id
+        self.menu_item_id = menu_item_id
+        self.customizations = customizations
+        self.customization_hash = customization_hash
+        self.quantity = quantity
+        self.original_quantity = quantity
+        self.touched = False
+
+
+def _fold_cart_operations(cart: Optional[Cart], ops: List[CartOp]):
+    """
+    Applies the ops, in order, to an in-memory copy of the cart's lines so that
+    several ops on the same line collapse into a single write.
+    Returns (lines, indexes of coalesced ops). Raises GraphQLError on invalid ops.
+    """
+    by_id: Dict[int, _PendingLine] = {}
+    by_key: Dict[Any, _PendingLine] = {}
+    for item in (cart.items if cart else []):
+        line = _PendingLine(item.id, item.menu_item_id, item.customizations, item.customization_hash, item.quantity)
+        by_id[item.id] = line
+        by_key[(item.menu_item_id, item.customization_hash)] = line
+
+    coalesced: List[int] = []
+    for index, op in enumerate(ops):
+        kind = CartOpKind(op.op)
+        if kind == CartOpKind.ADD:
+            quantity = 1 if op.quantity is None else op.quantity
+            if op.menuItemId is None or quantity <= 0:
+                raise GraphQLError(f"Operation {index}: ADD requires menuItemId and a positive quantity.")
+            customizations = _normalize_customizations(op.customizations)
+            key = (op.menuItemId, customization_hash(customizations))
+            line = by_key.get(key)
+            if line is None:
+                line = _PendingLine(None, op.menuItemId, customizations, key[1], 0)
+                by_key[key] = line
+            if line.touched:
+                coalesced.append(index)
+            line.quantity = max(line.quantity, 0) + quantity
+        else:
+            line = by_id.get(op.cartItemId)
+            if line is None:
+                raise GraphQLError(f"Operation {index}: cart item not found or you do not have permission to modify it.")
+            if kind == CartOpKind.UPDATE and op.quantity is None:
+                raise GraphQLError(f"Operation {index}: UPDATE requires a quantity.")
+            if line.touched:
+                coalesced.append(index)
+            line.quantity = 0 if kind == CartOpKind.REMOVE else max(op.quantity, 0)
+        line.touched = True
+
+    return list(by_key.values()), coalesced
+
+
+def _write_cart_lines(db: Session, cart: Cart, lines: List[_PendingLine]) -> int:
+    """Persists the folded lines with at most one DELETE, one UPDATE and one INSERT. Does not commit."""
+    removed = [line.id for line in lines if line.id is not None and line.quantity <= 0]
+    changed = [
+        {"id": line.id, "quantity": line.quantity}
+        for line in lines
+        if line.id is not None and line.quantity > 0 and line.quantity != line.original_quantity
+    ]
+    added = [
+        {
+            "cart_id": cart.id,
+            "menu_item_id": line.menu_item_id,
+            "quantity": line.quantity,
+            "customizations": line.customizations,
+            "customization_hash": line.customization_hash,
+        }
+        for line in lines
+        if line.id is None and line.quantity > 0
+    ]
+
+    if removed:
+        db.execute(delete(CartItem).where(CartItem.id.in_(removed)))
+    if changed:
+        # ORM bulk UPDATE by primary key (executemany)
+        db.execute(update(CartItem), changed)
+    if added:
+        insert_stmt = pg_insert(CartItem).values(added)
+        db.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.menu_item_id, CartItem.customization_hash],
+                set_={"quantity": CartItem.quantity + insert_stmt.excluded.quantity},
+            )
+        )
+    return len(removed) + len(changed) + len(added)
 
 
 @strawberry.type
@@ -42,111 +185,51 @@ class CartMutations:
     def add_to_cart(self, info: Info, input: AddToCartInput) -> CartMutationResponse:
         """
         Adds an item to the cart or increases its quantity if an identical item already exists.
-        Returns the entire updated cart on success.
+        Returns the added/updated cart item; the full cart is only loaded when the client selects it.
         """
         db: Session = info.context["db"]
         current_user: User = info.context.get("user")
         if not current_user:
             raise GraphQLError("You must be logged in to modify the cart.")
 
-        # 1. Validate that the menu item exists (Source of Truth)
-        # The input uses camelCase field names coming from the frontend
-        menu_item = db.query(MenuItem).filter(MenuItem.id == input.menuItemId).first()
-        if not menu_item:
+        # 1. Validate that the menu item exists (Source of Truth), reading only
+        # the columns the response needs
+        menu_row = db.execute(
+            select(
+                MenuItem.id,
+                MenuItem.name,
+                MenuItem.price,
+                MenuItem.canteen_id,
+                cast(MenuItem.customization_options, Text).label("options"),
+                Canteen.name.label("canteen_name"),
+            )
+            .outerjoin(Canteen, Canteen.id == MenuItem.canteen_id)
+            .where(MenuItem.id == input.menuItemId)
+        ).first()
+        if not menu_row:
             raise GraphQLError("Menu item not found.")
 
-        # 2. Get or create the user's cart
-        cart = _get_or_create_user_cart(db, current_user.id)
-
-        # 3. Normalize customizations for consistent comparison and storage
+        # 2. Create the cart if needed and insert-or-increment the line in one statement
         customizations_dict = _normalize_customizations(input.customizations)
-
-        # 4. Check if an identical item (same menu item ID and same customizations) already exists
-        # Build a safe comparison for the JSON column. Postgres does not
-        # support the `=` operator for the `json` type in some setups; using
-        # jsonb equality is more robust. If customizations is None we check
-        # for NULL, otherwise cast the column to JSONB and compare.
-        if customizations_dict is None:
-            custom_filter = CartItem.customizations.is_(None)
-        else:
-            custom_filter = func.cast(CartItem.customizations, JSONB) == customizations_dict
-
-        existing_item = db.query(CartItem).filter(
-            CartItem.cart_id == cart.id,
-            CartItem.menu_item_id == input.menuItemId,
-            custom_filter
-        ).first()
-
-        if existing_item:
-            existing_item.quantity += input.quantity
-            # ensure we return the updated cart item
-            cart_item = existing_item
-        else:
-            new_cart_item = CartItem(
-                cart_id=cart.id,
-                menu_item_id=input.menuItemId,
-                quantity=input.quantity,
-                customizations=customizations_dict
-            )
-            db.add(new_cart_item)
-            # capture the newly created item for returning
-            cart_item = new_cart_item
-
-        cart.updated_at = datetime.now(timezone.utc)
+        line = _upsert_cart_line(db, current_user.id, input.menuItemId, input.quantity, customizations_dict)
         db.commit()
-        # refresh both cart and the single cart item we will return
-        db.refresh(cart)
-        try:
-            db.refresh(cart_item)
-        except Exception:
-            # If refresh fails for any reason, ignore and still return the cart
-            cart_item = None
-
-        # Build a safe GraphQL-friendly CartItemType to avoid Strawberry trying to access
-        # missing attributes on the SQLAlchemy model (which caused AttributeError for
-        # fields like `name` and `price` in previous responses).
-        cart_item_result = None
-        if cart_item is not None:
-            # Try to get the associated MenuItem to populate human-friendly fields
-            try:
-                menu_item = db.query(MenuItem).filter(MenuItem.id == cart_item.menu_item_id).first()
-            except Exception:
-                menu_item = None
-
-            # Map DB customizations (JSON/dict) into the GraphQL CustomizationsType
-            cs = getattr(cart_item, 'customizations', None)
-            cs_obj = None
-            if isinstance(cs, dict):
-                # Ensure additions/removals are lists of strings for GraphQL
-                def _coerce_list(values):
-                    if values is None:
-                        return None
-                    out = []
-                    for v in values:
-                        if isinstance(v, dict):
-                            out.append(v.get('name') or v.get('label') or str(v))
-                        else:
-                            out.append(str(v))
-                    return out if out else None
-
-                cs_obj = CustomizationsType(
-                    size=cs.get('size'),
-                    additions=_coerce_list(cs.get('additions')),
-                    removals=_coerce_list(cs.get('removals')),
-                    notes=(cs.get('notes') if not isinstance(cs.get('notes'), dict) else json.dumps(cs.get('notes'))),
-                )
-
-            cart_item_result = CartItemType(
-                id=cart_item.id,
-                menuItemId=int(cart_item.menu_item_id) if getattr(cart_item, 'menu_item_id', None) is not None else None,
-                quantity=int(getattr(cart_item, 'quantity', 0)),
-                name=menu_item.name if menu_item else None,
-                price=float(menu_item.price) if menu_item and getattr(menu_item, 'price', None) is not None else None,
-                canteenId=menu_item.canteenId if menu_item else None,
-                canteenName=menu_item.canteenName if menu_item else None,
-                cartId=int(cart.id) if cart is not None else None,
-                customizations=cs_obj,
-            )
+
+        # 3. Build the response from the rows in hand
+        each = round(unit_price(menu_row.price, price_tables.get(menu_row.options), line.customizations), 2)
+        cart_item_result = CartItemType(
+            id=line.id,
+            menuItemId=line.menu_item_id,
+            quantity=line.quantity,
+            name=menu_row.name,
+            price=float(menu_row.price) if menu_row.price is not None else None,
+            canteenId=menu_row.canteen_id,
+            canteenName=menu_row.canteen_name,
+            cartId=line.cart_id,
+            customizations=parse_customizations(line.customizations),
+            unitPrice=each,
+            lineTotal=round(each * line.quantity, 2),
+        )
+        cart = load_cart_type(db, current_user.id) if _selects_field(info, "cart") else None
 
         return CartMutationResponse(success=True, message="Item added to cart.", cart=cart, cartItem=cart_item_result)
 
@@ -178,8 +261,8 @@ class CartMutations:
         
         cart.updated_at = datetime.now(timezone.utc)
         db.commit()
-        db.refresh(cart)
-        
+
+        cart = load_cart_type(db, current_user.id) if _selects_field(info, "cart") else None
         return CartMutationResponse(success=True, message="Cart item updated.", cart=cart)
 
     @strawberry.mutation
@@ -203,8 +286,8 @@ class CartMutations:
         db.delete(cart_item)
         cart.updated_at = datetime.now(timezone.utc)
         db.commit()
-        db.refresh(cart)
 
+        cart = load_cart_type(db, current_user.id) if _selects_field(info, "cart") else None
         return CartMutationResponse(success=True, message="Item removed from cart.", cart=cart)
 
     @strawberry.mutation
@@ -221,9 +304,51 @@ class CartMutations:
             db.query(CartItem).filter(CartItem.cart_id == cart.id).delete(synchronize_session=False)
             cart.updated_at = datetime.now(timezone.utc)
             db.commit()
-            db.refresh(cart)
         elif not cart:
             # If the user has no cart, create an empty one for a consistent response
-            cart = _get_or_create_user_cart(db, current_user.id)
+            _get_or_create_user_cart(db, current_user.id)
 
+        cart = load_cart_type(db, current_user.id) if _selects_field(info, "cart") else None
         return CartMutationResponse(success=True, message="Cart cleared successfully.", cart=cart)
+
+    @strawberry.mutation
+    def apply_cart_operations(self, info: Info, ops: List[CartOp]) -> CartOperationsResponse:
+        """
+        Applies a list of adds, quantity updates and removals to the authenticated
+        user's cart in a single transaction and returns the final cart once.
+        Ops touching the same line are folded together before anything is written.
+        """
+        db: Session = info.context["db"]
+        current_user: User = info.context.get("user")
+        if not current_user:
+            raise GraphQLError("You must be logged in to modify the cart.")
+
+        cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+        lines, coalesced = _fold_cart_operations(cart, ops)
+
+        # Validate the menu items of new lines with one query
+        new_item_ids = {line.menu_item_id for line in lines if line.id is None and line.quantity > 0}
+        if new_item_ids:
+            found = set(db.execute(select(MenuItem.id).where(MenuItem.id.in_(new_item_ids))).scalars())
+            missing = sorted(new_item_ids - found)
+            if missing:
+                raise GraphQLError(f"Menu item not found: {', '.join(str(i) for i in missing)}.")
+
+        if cart is None:
+            now = datetime.now(timezone.utc)
+            cart = Cart(user_id=current_user.id, created_at=now, updated_at=now)
+            db.add(cart)
+            db.flush()
+
+        applied = _write_cart_lines(db, cart, lines)
+        if applied:
+            cart.updated_at = datetime.now(timezone.utc)
+        db.commit()
+
+        return CartOperationsResponse(
+            success=True,
+            message=f"Applied {len(ops)} cart operation(s).",
+            cart=load_cart_type(db, current_user.id),
+            appliedCount=applied,
+            coalescedOps=coalesced,
+        )
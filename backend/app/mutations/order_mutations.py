@@ -2,54 +2,65 @@ import strawberry
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import timedelta
 from strawberry.types import Info
+from sqlalchemy import Float, Integer, Text, cast, column, delete, insert, literal, select, update, values
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from graphql import GraphQLError
 
 from app.models.order import Order, OrderItem, OrderType, CreateOrderInput, OrderItemInput
 from app.models.menu_item import MenuItem
+from app.models.cart import Cart, CartItem
 from app.models.canteen import Canteen
 from app.models.user import User
+from app.helpers.canteen_stats import record_order_created, record_status_change
+from app.helpers.customizations import canonicalize_customizations, customization_hash
+from app.helpers.pricing import TAX_RATE, price_lines
 
 def _process_order_items_and_calculate_total(
     db: Session, items: List[OrderItemInput]
 ) -> Tuple[List[Dict[str, Any]], float]:
     """
-    Validates items, calculates the total amount based on DB prices,
-    and returns a list of processed items and the total.
+    Validates items, prices them from DB prices plus customization surcharges,
+    and returns a list of processed items and the subtotal.
     Raises GraphQLError if an item is not found.
     """
-    total_amount = 0.0
-    processed_items: List[Dict[str, Any]] = []
+    item_ids = {item_input.itemId for item_input in items}
+    menu_rows = {
+        row.id: row
+        for row in db.execute(
+            select(MenuItem.id, MenuItem.name, MenuItem.price, cast(MenuItem.customization_options, Text).label("options"))
+            .where(MenuItem.id.in_(item_ids))
+        )
+    }
 
+    lines: List[Dict[str, Any]] = []
     for item_input in items:
-        menu_item = db.query(MenuItem).filter(MenuItem.id == item_input.itemId).first()
-        if not menu_item:
+        menu_row = menu_rows.get(item_input.itemId)
+        if not menu_row:
             raise GraphQLError(f"Menu item with ID {item_input.itemId} not found.")
-        # Use current menu price as the snapshot price
-        price = float(menu_item.price or 0.0)
-        total_amount += price * (item_input.quantity or 0)
-
-        # Normalize customizations to a clean dictionary
-        customizations_dict = None
-        if getattr(item_input, "customizations", None):
-            customizations_dict = {
-                "size": getattr(item_input.customizations, "size", None),
-                "additions": getattr(item_input.customizations, "additions", []),
-                "removals": getattr(item_input.customizations, "removals", []),
-                "notes": getattr(item_input.customizations, "notes", None),
-            }
+        lines.append({
+            "menu_item_id": item_input.itemId,
+            "quantity": item_input.quantity or 0,
+            "base_price": menu_row.price,
+            "options": menu_row.options,
+            # Normalize customizations to their canonical dictionary
+            "customizations": canonicalize_customizations(getattr(item_input, "customizations", None)),
+        })
+    pricing = price_lines(lines)
 
+    processed_items: List[Dict[str, Any]] = []
+    for item_input, line, priced in zip(items, lines, pricing.lines):
         processed_items.append({
             "itemId": item_input.itemId,
             "quantity": item_input.quantity,
             "note": getattr(item_input, "note", None),
-            "customizations": customizations_dict,
-            "snapshot_name": getattr(menu_item, 'name', None),
-            "snapshot_price": price,
+            "customizations": line["customizations"],
+            "snapshot_name": menu_rows[item_input.itemId].name,
+            # Snapshot the unit price including surcharges
+            "snapshot_price": priced.unit_price,
         })
 
-    return processed_items, total_amount
+    return processed_items, pricing.subtotal
 
 
 def _get_order_and_verify_vendor(db: Session, order_id: int, user: User):
@@ -65,6 +76,127 @@ def _get_order_and_verify_vendor(db: Session, order_id: int, user: User):
     return order
 
 
+def _checkout_cart(
+    db: Session,
+    user_id: str,
+    payment_method: str,
+    pickup_time: Optional[str],
+    customer_note: Optional[str],
+    is_pre_order: bool,
+) -> Order:
+    """
+    Turns the user's cart into an order inside the session's transaction:
+    locks the cart and the menu rows, prices the lines, reserves stock, copies
+    the lines into order_items with INSERT ... SELECT and clears the cart.
+    Does not commit. Raises GraphQLError when the cart cannot be checked out.
+    """
+    # Locking the cart row makes concurrent add-to-cart upserts wait for the checkout
+    cart = db.execute(
+        select(Cart.id, Cart.pickup_time).where(Cart.user_id == user_id).with_for_update()
+    ).first()
+    if not cart:
+        raise GraphQLError("Your cart is empty.")
+
+    lines = db.execute(
+        select(
+            CartItem.id.label("line_id"),
+            CartItem.menu_item_id,
+            CartItem.quantity,
+            CartItem.customizations,
+            MenuItem.name,
+            MenuItem.price,
+            MenuItem.canteen_id,
+            MenuItem.stock_count,
+            MenuItem.is_available,
+            cast(MenuItem.customization_options, Text).label("options"),
+        )
+        .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+        .where(CartItem.cart_id == cart.id)
+        # Lock menu rows in a stable order so concurrent checkouts can't deadlock
+        .order_by(MenuItem.id, CartItem.id)
+        .with_for_update(of=MenuItem)
+    ).all()
+    if not lines:
+        raise GraphQLError("Your cart is empty.")
+
+    canteen_ids = {line.canteen_id for line in lines}
+    if len(canteen_ids) > 1:
+        raise GraphQLError("Your cart has items from more than one canteen. Please check out one canteen at a time.")
+
+    # Reserve stock: stock_count None means unlimited, like create_order
+    needed: Dict[int, int] = {}
+    for line in lines:
+        if line.is_available is False:
+            raise GraphQLError(f"'{line.name}' is currently unavailable.")
+        needed[line.menu_item_id] = needed.get(line.menu_item_id, 0) + (line.quantity or 0)
+    stock = {line.menu_item_id: (line.name, line.stock_count) for line in lines}
+    reservations = []
+    for item_id, qty in needed.items():
+        name, current_stock = stock[item_id]
+        if current_stock is None:
+            continue
+        if current_stock < qty:
+            raise GraphQLError(f"Insufficient stock for item '{name}'. Available: {current_stock}, requested: {qty}")
+        reservations.append({"id": item_id, "stock_count": current_stock - qty})
+    if reservations:
+        # ORM bulk UPDATE by primary key (executemany)
+        db.execute(update(MenuItem), reservations)
+
+    pricing = price_lines(
+        {
+            "menu_item_id": line.menu_item_id,
+            "quantity": line.quantity,
+            "base_price": line.price,
+            "options": line.options,
+            "customizations": canonicalize_customizations(line.customizations),
+        }
+        for line in lines
+    )
+
+    order = Order(
+        user_id=user_id,
+        canteen_id=canteen_ids.pop(),
+        total_amount=pricing.total,
+        subtotal=pricing.subtotal,
+        tax=pricing.tax,
+        status="scheduled" if is_pre_order else "pending",
+        order_time=datetime.now(timezone.utc),
+        payment_method=payment_method,
+        payment_status="Pending",
+        customer_note=customer_note,
+        is_pre_order=is_pre_order,
+        pickup_time=pickup_time or cart.pickup_time,
+    )
+    db.add(order)
+    db.flush()  # ensure order.id is available
+
+    # Copy the lines server-side; only the computed unit prices travel as a VALUES list
+    unit_prices = values(
+        column("line_id", Integer), column("unit_price", Float), name="unit_prices"
+    ).data([(line.line_id, priced.unit_price) for line, priced in zip(lines, pricing.lines)])
+    db.execute(
+        insert(OrderItem).from_select(
+            ["order_id", "item_id", "quantity", "note", "customization_hash", "snapshot_name", "snapshot_price"],
+            select(
+                literal(order.id),
+                CartItem.menu_item_id,
+                CartItem.quantity,
+                CartItem.customizations["notes"].as_string(),
+                CartItem.customization_hash,
+                MenuItem.name,
+                unit_prices.c.unit_price,
+            )
+            .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+            .join(unit_prices, unit_prices.c.line_id == CartItem.id)
+            .where(CartItem.cart_id == cart.id),
+        )
+    )
+    db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+
+    record_order_created(db, order)
+    return order
+
+
 @strawberry.type
 class OrderMutations:
     @strawberry.mutation
@@ -80,10 +212,9 @@ class OrderMutations:
         # Validate items, calculate subtotal (without tax) and prepare processed items
         processed_items, subtotal_amount = _process_order_items_and_calculate_total(db, input.items)
 
-        # Compute tax and total. Tax rate is a simple site-wide default for now.
-        TAX_RATE = 0.05
+        # Compute tax and total with the site-wide tax rate
         tax_amount = round(float(subtotal_amount) * TAX_RATE, 2)
-        total_amount = float(subtotal_amount) + float(tax_amount)
+        total_amount = round(float(subtotal_amount) + float(tax_amount), 2)
 
         # Check and decrement stock for each item if stock_count is present.
         # This should run inside the same DB session/transaction to avoid overselling.
@@ -151,17 +282,49 @@ class OrderMutations:
                 item_id=pi.get("itemId"),
                 quantity=pi.get("quantity") or 0,
                 customizations=pi.get("customizations"),
+                customization_hash=customization_hash(pi.get("customizations")),
                 note=pi.get("note"),
                 snapshot_name=pi.get("snapshot_name"),
                 snapshot_price=pi.get("snapshot_price"),
             )
             db.add(oi)
 
+        # Keep the per-canteen daily rollups in the same transaction as the order
+        record_order_created(db, new_order)
+
         db.commit()
         db.refresh(new_order)
 
         return new_order
 
+    @strawberry.mutation
+    def checkout_cart(
+        self,
+        info: Info,
+        payment_method: str,
+        pickup_time: Optional[str] = None,
+        customer_note: Optional[str] = None,
+        is_pre_order: bool = False,
+    ) -> OrderType:
+        """
+        Places an order for everything in the authenticated user's cart and empties
+        the cart, in one transaction. Prices, stock and items all come from the
+        server-side cart, so the client only sends how it will pay and pick up.
+        """
+        db: Session = info.context["db"]
+        current_user = info.context.get("user")
+        if not current_user:
+            raise GraphQLError("You must be logged in to check out.")
+
+        try:
+            order = _checkout_cart(db, current_user.id, payment_method, pickup_time, customer_note, is_pre_order)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.refresh(order)
+        return order
+
     @strawberry.mutation
     def update_order_status(self, info: Info, order_id: int, status: str) -> OrderType:
         """Update order status. Requires canteen vendor privileges."""
@@ -174,6 +337,7 @@ class OrderMutations:
 
         # Update status and corresponding timestamp (use DB column names)
         now = datetime.now(timezone.utc)
+        record_status_change(db, order, order.status, status)
         order.status = status
         timestamps = {
             "confirmed": "confirmed_time",
@@ -230,6 +394,7 @@ class OrderMutations:
             if now - order_time > timedelta(minutes=5):
                 return OrderMutations.CancelOrderPayload(success=False, message="Cancellation window (5 minutes) has expired.", orderId=orderId)
         # Perform cancellation using underlying DB columns
+        record_status_change(db, order, order.status, "cancelled")
         order.status = "cancelled"
         order.cancelled_time = datetime.now(timezone.utc)
         order.cancellation_reason = reason
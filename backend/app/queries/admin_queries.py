@@ -1,10 +1,14 @@
 import strawberry
-from typing import List, Optional
+from datetime import date
+from typing import Annotated, List, Optional
 from strawberry.types import Info
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.helpers.permissions import IsAdmin
+from app.helpers.tracing import Trace, slow_traces as trace_buffer
 from app.models.canteen import Canteen, CanteenType
+from app.models.canteen_stats import CanteenDailyStats, CanteenRangeStatsType
 from app.models.order import Order
 from app.models.menu_item import MenuItem, MenuItemType
 from app.models.user import User, UserType
@@ -20,6 +24,49 @@ class CanteenStatsType:
     isOpen: bool
 
 
+@strawberry.type
+class TraceSpanType:
+    id: int
+    parentId: Optional[int]
+    name: str
+    kind: str
+    startMs: float
+    durationMs: float
+
+
+@strawberry.type
+class TraceType:
+    id: str
+    operation: str
+    startedAt: str
+    durationMs: float
+    droppedSpans: int
+    # Flat list in start order; rebuild the tree from parentId
+    spans: List[TraceSpanType]
+
+
+def _convert_trace_to_type(trace: Trace) -> TraceType:
+    spans = sorted(trace.spans, key=lambda s: (s.start, s.id))
+    return TraceType(
+        id=trace.id,
+        operation=trace.operation,
+        startedAt=trace.started_at.isoformat(),
+        durationMs=round(trace.duration * 1000, 3),
+        droppedSpans=trace.dropped_spans,
+        spans=[
+            TraceSpanType(
+                id=s.id,
+                parentId=s.parent_id,
+                name=s.name,
+                kind=s.kind,
+                startMs=round(trace.offset_ms(s.start), 3),
+                durationMs=round((s.end - s.start) * 1000, 3) if s.end is not None else 0.0,
+            )
+            for s in spans
+        ],
+    )
+
+
 def _convert_menu_item_to_type(item: MenuItem) -> MenuItemType:
     # reuse existing model converters pattern
     return MenuItemType(
@@ -68,16 +115,17 @@ class AdminQueries:
     def get_canteen_stats(self, info: Info) -> List[CanteenStatsType]:
         """Returns basic stats (order count, revenue) per canteen."""
         db: Session = info.context["db"]
-        # Left join orders to canteens and aggregate
+        # Aggregate the per-day rollups rather than the orders table, so the cost
+        # depends on the number of canteen-days, not on total order volume.
         q = (
             db.query(
                 Canteen.id.label("cid"),
                 Canteen.name.label("name"),
-                func.count(Order.id).label("order_count"),
-                func.coalesce(func.sum(Order.total_amount), 0.0).label("revenue"),
+                func.coalesce(func.sum(CanteenDailyStats.order_count), 0).label("order_count"),
+                func.coalesce(func.sum(CanteenDailyStats.gross_revenue), 0.0).label("revenue"),
                 Canteen.is_open.label("is_open"),
             )
-            .outerjoin(Order, Order.canteen_id == Canteen.id)
+            .outerjoin(CanteenDailyStats, CanteenDailyStats.canteen_id == Canteen.id)
             .group_by(Canteen.id)
         )
 
@@ -96,6 +144,65 @@ class AdminQueries:
 
         return stats
 
+    @strawberry.field(permission_classes=[IsAdmin])
+    def canteen_stats(
+        self,
+        info: Info,
+        from_: Annotated[Optional[date], strawberry.argument(name="from")] = None,
+        to: Optional[date] = None,
+    ) -> List[CanteenRangeStatsType]:
+        """
+        Per-canteen orders, cancellations, revenue and average ticket for an
+        inclusive IST date range, read only from the daily rollups.
+        """
+        db: Session = info.context["db"]
+        # Range conditions go in the join so canteens without rollups still appear with zeros.
+        join_on = CanteenDailyStats.canteen_id == Canteen.id
+        if from_ is not None:
+            join_on = join_on & (CanteenDailyStats.day >= from_)
+        if to is not None:
+            join_on = join_on & (CanteenDailyStats.day <= to)
+
+        rows = (
+            db.query(
+                Canteen.id.label("cid"),
+                Canteen.name.label("name"),
+                Canteen.is_open.label("is_open"),
+                func.coalesce(func.sum(CanteenDailyStats.order_count), 0).label("orders"),
+                func.coalesce(func.sum(CanteenDailyStats.cancelled_count), 0).label("cancelled"),
+                func.coalesce(func.sum(CanteenDailyStats.gross_revenue), 0.0).label("gross"),
+                func.coalesce(func.sum(CanteenDailyStats.cancelled_revenue), 0.0).label("cancelled_revenue"),
+            )
+            .outerjoin(CanteenDailyStats, join_on)
+            .group_by(Canteen.id)
+            .order_by(Canteen.id)
+            .all()
+        )
+
+        stats = []
+        for r in rows:
+            completed = int(r.orders or 0) - int(r.cancelled or 0)
+            revenue = float(r.gross or 0.0) - float(r.cancelled_revenue or 0.0)
+            stats.append(
+                CanteenRangeStatsType(
+                    canteenId=r.cid,
+                    name=r.name,
+                    isOpen=bool(r.is_open),
+                    orderCount=int(r.orders or 0),
+                    cancelledCount=int(r.cancelled or 0),
+                    revenue=round(revenue, 2),
+                    avgTicket=round(revenue / completed, 2) if completed > 0 else 0.0,
+                    fromDate=from_.isoformat() if from_ else None,
+                    toDate=to.isoformat() if to else None,
+                )
+            )
+        return stats
+
+    @strawberry.field(permission_classes=[IsAdmin])
+    def slow_traces(self, info: Info, limit: Optional[int] = None) -> List[TraceType]:
+        """The slowest sampled operation traces kept by this worker (see app.helpers.tracing)."""
+        return [_convert_trace_to_type(t) for t in trace_buffer.slowest(limit)]
+
     @strawberry.field
     def get_canteen_detail(self, canteen_id: int, info: Info) -> Optional[CanteenType]:
         """Return canteen detail with owner, menu items and complaints."""
@@ -0,0 +1,118 @@
+import strawberry
+from datetime import datetime
+from typing import Annotated, List, Optional
+from strawberry.types import Info
+from sqlalchemy.orm import Session
+from graphql import GraphQLError
+
+from app.helpers import analytics
+from app.helpers.permissions import IsAuthenticated
+from app.models.canteen import Canteen
+
+
+@strawberry.type
+class SalesBucketType:
+    """Orders and revenue for one time bucket (bucketStart is IST wall-clock time)."""
+    bucketStart: str
+    orders: int
+    revenue: float
+    avgTicket: float
+
+
+@strawberry.type
+class TopItemType:
+    rank: int
+    itemId: int
+    name: Optional[str] = None
+    quantity: int
+    revenue: float
+
+
+@strawberry.type
+class HeatmapCellType:
+    """Orders per ISO weekday (1 = Monday) and IST hour of day."""
+    weekday: int
+    hour: int
+    orders: int
+    revenue: float
+
+
+def _ensure_canteen_access(db: Session, user, canteen_id: int) -> None:
+    """Admins can see every canteen; vendors and staff only their own."""
+    if user.role == "admin":
+        return
+    canteen = db.query(Canteen).filter(Canteen.id == canteen_id).first()
+    if not canteen:
+        raise GraphQLError("Canteen not found.")
+    if canteen.user_id != user.id and not any(s.id == user.id for s in canteen.staff):
+        raise GraphQLError("Unauthorized: You can only view analytics for your own canteen.")
+
+
+@strawberry.type
+class AnalyticsQueries:
+    @strawberry.field(permission_classes=[IsAuthenticated])
+    def sales_timeseries(
+        self,
+        info: Info,
+        canteen_id: int,
+        granularity: str = "hour",
+        from_: Annotated[Optional[datetime], strawberry.argument(name="from")] = None,
+        to: Optional[datetime] = None,
+    ) -> List[SalesBucketType]:
+        """Zero-filled orders/revenue per hour, day, week or month (defaults to the last 7 days)."""
+        db: Session = info.context["db"]
+        _ensure_canteen_access(db, info.context["user"], canteen_id)
+        try:
+            series = analytics.sales_timeseries(db, canteen_id, granularity, from_, to)
+        except ValueError as e:
+            raise GraphQLError(str(e))
+        return [
+            SalesBucketType(
+                bucketStart=b["bucket_start"].isoformat(),
+                orders=b["orders"],
+                revenue=b["revenue"],
+                avgTicket=b["avg_ticket"],
+            )
+            for b in series
+        ]
+
+    @strawberry.field(permission_classes=[IsAuthenticated])
+    def top_items(
+        self,
+        info: Info,
+        canteen_id: int,
+        from_: Annotated[Optional[datetime], strawberry.argument(name="from")] = None,
+        to: Optional[datetime] = None,
+        limit: int = 10,
+    ) -> List[TopItemType]:
+        """Best-selling items by quantity (defaults to the last 30 days)."""
+        db: Session = info.context["db"]
+        _ensure_canteen_access(db, info.context["user"], canteen_id)
+        try:
+            items = analytics.top_items(db, canteen_id, from_, to, limit=max(1, min(limit, 100)))
+        except ValueError as e:
+            raise GraphQLError(str(e))
+        return [
+            TopItemType(rank=i["rank"], itemId=i["item_id"], name=i["name"], quantity=i["quantity"], revenue=i["revenue"])
+            for i in items
+        ]
+
+    @strawberry.field(permission_classes=[IsAuthenticated])
+    def hourly_heatmap(
+        self,
+        info: Info,
+        canteen_id: int,
+        from_: Annotated[Optional[datetime], strawberry.argument(name="from")] = None,
+        to: Optional[datetime] = None,
+    ) -> List[HeatmapCellType]:
+        """Peak-time heatmap of orders by weekday and hour (defaults to the last 4 weeks)."""
+        db: Session = info.context["db"]
+        _ensure_canteen_access(db, info.context["user"], canteen_id)
+        try:
+            cells = analytics.hourly_heatmap(db, canteen_id, from_, to)
+        except ValueError as e:
+            raise GraphQLError(str(e))
+        return [
+            HeatmapCellType(weekday=c["weekday"], hour=c["hour"], orders=c["orders"], revenue=c["revenue"])
+            for c in cells
+        ]
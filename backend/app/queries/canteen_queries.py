@@ -6,6 +6,7 @@ from fastapi import Depends
 
 from app.models.canteen import Canteen, CanteenType, ScheduleType
 from app.core.database import get_db
+from app.helpers.search import search_canteens
 
 def convert_canteen_model_to_type(canteen: Canteen) -> CanteenType:
     """Converts a Canteen SQLAlchemy model to a CanteenType."""
@@ -64,11 +65,8 @@ class CanteenQueries:
         return [convert_canteen_model_to_type(canteen) for canteen in canteens]
 
     @strawberry.field
-    def search_canteens(self, query: str, info: Info) -> List[CanteenType]:
-        """Search canteens by name or location"""
+    def search_canteens(self, query: str, info: Info, limit: int = 50, offset: int = 0) -> List[CanteenType]:
+        """Ranked, typo-tolerant search over canteen names, locations and descriptions"""
         db: Session = info.context["db"]
-        canteens = db.query(Canteen).filter(
-            (Canteen.name.ilike(f"%{query}%")) |
-            (Canteen.location.ilike(f"%{query}%"))
-        ).all()
+        canteens = search_canteens(db, query, limit=limit, offset=offset)
         return [convert_canteen_model_to_type(canteen) for canteen in canteens]
\ No newline at end of file
@@ -1,110 +1,160 @@
 import strawberry
 import json
-from typing import Optional
+from typing import Any, Iterable, Optional
 from strawberry.types import Info
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Text, cast, select
+from sqlalchemy.orm import Session
 from app.models.cart import Cart, CartItem, CartType, CartItemType, CustomizationsType
+from app.models.menu_item import MenuItem
+from app.models.canteen import Canteen
+from app.helpers.customizations import canonicalize_customizations
+from app.helpers.pricing import price_lines
 
-def _parse_customizations(item: CartItem) -> Optional[CustomizationsType]:
+def _coerce_list_to_strings(values):
+    if values is None:
+        return None
+    out = []
+    for v in values:
+        if isinstance(v, dict):
+            # prefer common keys
+            out.append(v.get('name') or v.get('label') or str(v))
+        else:
+            out.append(str(v))
+    return out if out else None
+
+def _to_customizations_type(custom_data: dict) -> CustomizationsType:
+    notes = custom_data.get("notes")
+    return CustomizationsType(
+        size=custom_data.get("size"),
+        additions=_coerce_list_to_strings(custom_data.get("additions")),
+        removals=_coerce_list_to_strings(custom_data.get("removals")),
+        notes=json.dumps(notes) if isinstance(notes, dict) else notes,
+    )
+
+def parse_customizations(customizations: Any, menu_options: Any = None) -> Optional[CustomizationsType]:
     """
-    Parses customizations from various possible data formats on a CartItem.
-    Handles modern JSON format, legacy fields, and string-encoded JSON.
+    Parses a cart line's stored customizations (a dict, or legacy string-encoded JSON).
+    `menu_options` is the menu item's customization options (JSON text or dict).
     """
-    def _coerce_list_to_strings(values):
-        if values is None:
-            return None
-        out = []
-        for v in values:
-            if isinstance(v, dict):
-                # prefer common keys
-                out.append(v.get('name') or v.get('label') or str(v))
-            else:
-                out.append(str(v))
-        return out if out else None
-
     # Modern format: `customizations` is a dictionary
-    if getattr(item, "customizations", None) and isinstance(item.customizations, dict):
-        custom_data = item.customizations
-        return CustomizationsType(
-            size=custom_data.get("size"),
-            additions=_coerce_list_to_strings(custom_data.get("additions")),
-            removals=_coerce_list_to_strings(custom_data.get("removals")),
-            notes=(custom_data.get("notes") if not isinstance(custom_data.get("notes"), dict) else json.dumps(custom_data.get("notes"))),
-        )
+    if customizations and isinstance(customizations, dict):
+        return _to_customizations_type(customizations)
 
     # Handle `customizations` stored as a JSON string
-    if getattr(item, "customizations", None) and isinstance(item.customizations, str):
+    if customizations and isinstance(customizations, str):
         try:
-            custom_data = json.loads(item.customizations)
-            return CustomizationsType(
-                size=custom_data.get("size"),
-                additions=custom_data.get("additions"),
-                removals=custom_data.get("removals"),
-                notes=custom_data.get("notes"),
-            )
+            custom_data = json.loads(customizations)
+            if isinstance(custom_data, dict):
+                return _to_customizations_type(custom_data)
         except json.JSONDecodeError:
-            # If parsing fails, fall back to legacy fields or nothing
+            # If parsing fails, fall back to the menu item's options or nothing
             pass
 
-    # Fallback: if the cart item has no customizations, try the linked menu_item's
+    # Fallback: if the cart item has no customizations, use the linked menu item's
     # customization options (this covers cases where the frontend sent item-level
     # customizations or the DB stores options on the menu item itself).
-    menu_item = getattr(item, "menu_item", None)
-    if menu_item is not None:
-        opts = getattr(menu_item, "customizationOptions", None)
-        if isinstance(opts, dict):
-            return CustomizationsType(
-                size=opts.get("size"),
-                additions=_coerce_list_to_strings(opts.get("additions")),
-                removals=_coerce_list_to_strings(opts.get("removals")),
-                notes=(opts.get("notes") if not isinstance(opts.get("notes"), dict) else json.dumps(opts.get("notes"))),
-            )
+    if isinstance(menu_options, str):
+        try:
+            menu_options = json.loads(menu_options)
+        except json.JSONDecodeError:
+            menu_options = None
+    if isinstance(menu_options, dict):
+        return _to_customizations_type(menu_options)
 
     return None
 
-def _convert_cart_item_to_type(item: CartItem) -> CartItemType:
-    """Converts a CartItem SQLAlchemy model to a CartItemType."""
-    return CartItemType(
-        id=item.id,
-        menuItemId=item.menu_item_id,
-        quantity=item.quantity,
-        name=getattr(getattr(item, "menu_item", None), "name", None),
-        price=getattr(getattr(item, "menu_item", None), "price", None),
-        canteenId=getattr(getattr(item, "menu_item", None), "canteenId", None),
-        canteenName=getattr(getattr(item, "menu_item", None), "canteenName", None),
-        cartId=getattr(item, "cart_id", None),
-        specialInstructions=( _parse_customizations(item).notes if _parse_customizations(item) and getattr(_parse_customizations(item), 'notes', None) else None ),
-        location=getattr(getattr(getattr(item, "menu_item", None), "canteen", None), "location", None),
-        customizations=_parse_customizations(item),
+def _cart_rows_statement(user_id: str):
+    """
+    One statement for the whole cart: the cart columns (repeated per line) with
+    each line's menu item and canteen columns. A cart without lines yields a
+    single row whose line columns are NULL.
+    """
+    return (
+        select(
+            Cart.id.label("cart_id"),
+            Cart.user_id,
+            Cart.created_at,
+            Cart.updated_at,
+            Cart.pickup_date,
+            Cart.pickup_time,
+            CartItem.id.label("line_id"),
+            CartItem.menu_item_id,
+            CartItem.quantity,
+            CartItem.customizations,
+            MenuItem.name,
+            MenuItem.price,
+            MenuItem.canteen_id,
+            # Text keeps the options cheap to key pricing tables by; parsed only when needed
+            cast(MenuItem.customization_options, Text).label("options"),
+            Canteen.name.label("canteen_name"),
+            Canteen.location,
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(MenuItem, MenuItem.id == CartItem.menu_item_id)
+        .outerjoin(Canteen, Canteen.id == MenuItem.canteen_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.id)
     )
 
+def build_cart_type(rows: Iterable[Any]) -> Optional[CartType]:
+    """Builds a priced CartType from the rows of `_cart_rows_statement`, parsing each line once."""
+    rows = list(rows)
+    if not rows:
+        return None
+    lines = [row for row in rows if row.line_id is not None]
+    pricing = price_lines(
+        {
+            "menu_item_id": row.menu_item_id,
+            "quantity": row.quantity,
+            "base_price": row.price,
+            "options": row.options,
+            "customizations": canonicalize_customizations(row.customizations),
+        }
+        for row in lines
+    )
+
+    items = []
+    for row, priced in zip(lines, pricing.lines):
+        customizations = parse_customizations(row.customizations, row.options)
+        items.append(CartItemType(
+            id=row.line_id,
+            menuItemId=row.menu_item_id,
+            quantity=row.quantity,
+            name=row.name,
+            price=row.price,
+            canteenId=row.canteen_id,
+            canteenName=row.canteen_name,
+            cartId=row.cart_id,
+            specialInstructions=customizations.notes if customizations and customizations.notes else None,
+            location=row.location,
+            customizations=customizations,
+            unitPrice=priced.unit_price,
+            lineTotal=priced.line_total,
+        ))
+
+    cart = rows[0]
+    return CartType(
+        id=cart.cart_id,
+        userId=cart.user_id,
+        createdAt=cart.created_at.isoformat() if cart.created_at else None,
+        updatedAt=cart.updated_at.isoformat() if cart.updated_at else None,
+        pickupDate=cart.pickup_date.isoformat() if cart.pickup_date else None,
+        pickupTime=cart.pickup_time if cart.pickup_time else None,
+        items=items,
+        subtotal=pricing.subtotal,
+        tax=pricing.tax,
+        total=pricing.total,
+    )
+
+def load_cart_type(db: Session, user_id: str) -> Optional[CartType]:
+    """Reads a user's cart with a single query and converts it to a CartType."""
+    return build_cart_type(db.execute(_cart_rows_statement(user_id)))
+
 @strawberry.type
 class CartQueries:
     @strawberry.field
     def get_cart_by_user_id(self, userId: str, info: Info) -> Optional[CartType]:
         """Get the cart for a specific user, including all items."""
         db: Session = info.context["db"]
-        
-        # Use selectinload to efficiently fetch the cart and its items in one go
-        cart = (
-            db.query(Cart)
-            .options(selectinload(Cart.items))
-            .filter(Cart.user_id == userId)
-            .first()
-        )
-        
-        if not cart:
-            return None
-
-        # Convert cart items using the helper function
-        cart_items_types = [_convert_cart_item_to_type(item) for item in cart.items]
-
-        return CartType(
-            id=cart.id,
-            userId=cart.user_id,
-            createdAt=cart.created_at.isoformat() if cart.created_at else None,
-            updatedAt=cart.updated_at.isoformat() if cart.updated_at else None,
-            pickupDate=cart.pickup_date.isoformat() if cart.pickup_date else None,
-            pickupTime=cart.pickup_time if cart.pickup_time else None,
-            items=cart_items_types
-        )
\ No newline at end of file
+        return load_cart_type(db, userId)
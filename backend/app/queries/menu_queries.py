@@ -1,6 +1,7 @@
 import strawberry
-from typing import List
+from typing import List, Optional
 from strawberry.types import Info
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.menu_item import (
@@ -9,23 +10,57 @@ from app.models.menu_item import (
     CustomizationOptionsType,
     SizeOption,
     AdditionOption,
+    SuggestionType,
+    BrowseMenuFilters,
+    BrowseMenuResult,
+    BrowseSort,
+    BrowseSortEnum,
+    FacetCount,
+    MenuFacetsType,
 )
 from app.core.database import get_db
+from app.helpers.search import MenuSearchFilters, search_menu_items
+from app.helpers.suggest import suggest
+from app.helpers.catalog import CatalogMenuItem, catalog
+from app.helpers.menu_browse import BrowseQuery, browse_menu
+
+def _convert_customization_options(custom_data) -> Optional[CustomizationOptionsType]:
+    if not custom_data or not isinstance(custom_data, dict):
+        return None
+    # Use .get() to safely access keys without modifying the original dict
+    return CustomizationOptionsType(
+        sizes=[SizeOption(**size) for size in custom_data.get("sizes", [])],
+        additions=[AdditionOption(**addition) for addition in custom_data.get("additions", [])],
+        removals=custom_data.get("removals", []),
+    )
+
+def _convert_catalog_item_to_type(item: CatalogMenuItem, canteen_name: Optional[str], stock_count: int) -> "MenuItemType":
+    """Converts a catalog snapshot entry to a MenuItemType (same fields as `_convert_menu_item_to_type`)."""
+    return MenuItemType(
+        id=item.id,
+        canteenId=item.canteen_id,
+        canteenName=canteen_name,
+        name=item.name,
+        description=item.description,
+        price=item.price,
+        category=item.category,
+        image=item.image,
+        tags=list(item.tags),
+        rating=item.rating,
+        ratingCount=item.rating_count,
+        isAvailable=item.is_available,
+        preparationTime=item.preparation_time,
+        isPopular=item.is_popular,
+        customizationOptions=_convert_customization_options(item.customization_options),
+        stockCount=stock_count,
+    )
 
 def _convert_menu_item_to_type(item: MenuItem) -> "MenuItemType":
     """
     Safely converts a MenuItem SQLAlchemy model to a MenuItemType,
     handling potentially null or incomplete customization options.
     """
-    customization_options_type = None
-    if item.customizationOptions and isinstance(item.customizationOptions, dict):
-        # Use .get() to safely access keys without modifying the original dict
-        custom_data = item.customizationOptions
-        customization_options_type = CustomizationOptionsType(
-            sizes=[SizeOption(**size) for size in custom_data.get("sizes", [])],
-            additions=[AdditionOption(**addition) for addition in custom_data.get("additions", [])],
-            removals=custom_data.get("removals", []),
-        )
+    customization_options_type = _convert_customization_options(item.customizationOptions)
 
     return MenuItemType(
         id=item.id,
@@ -83,12 +118,74 @@ class MenuQueries:
         return [_convert_menu_item_to_type(item) for item in items]
 
     @strawberry.field
-    def search_menu_items(self, query: str, info: Info) -> List["MenuItemType"]:
-        """Search menu items by name or description."""
+    def search_menu_items(
+        self,
+        query: str,
+        info: Info,
+        canteen_id: Optional[int] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        vegetarian: Optional[bool] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List["MenuItemType"]:
+        """Ranked, typo-tolerant search over menu item names, categories and descriptions."""
+        db: Session = info.context["db"]
+        filters = MenuSearchFilters(canteen_id=canteen_id, category=category, tags=tags or [], vegetarian=vegetarian)
+        items = search_menu_items(db, query, filters, limit=limit, offset=offset)
+        return [_convert_menu_item_to_type(item) for item in items]
+
+    @strawberry.field
+    def suggest(self, prefix: str, info: Info, limit: int = 8) -> List[SuggestionType]:
+        """Typeahead completions (menu items, tags, canteens) for a prefix; served from memory."""
         db: Session = info.context["db"]
-        search_filter = f"%{query}%"
-        items = db.query(MenuItem).filter(
-            (MenuItem.name.ilike(search_filter)) |
-            (MenuItem.description.ilike(search_filter))
-        ).all()
-        return [_convert_menu_item_to_type(item) for item in items]
\ No newline at end of file
+        return [
+            SuggestionType(
+                text=s.text,
+                kind=s.kind,
+                menuItemId=s.menu_item_id,
+                canteenId=s.canteen_id,
+                canteenName=s.canteen_name,
+            )
+            for s in suggest(db, prefix, limit)
+        ]
+
+    @strawberry.field
+    def browse_menu(
+        self,
+        canteen_id: int,
+        info: Info,
+        filters: Optional[BrowseMenuFilters] = None,
+        sort: BrowseSortEnum = BrowseSort.POPULAR,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> BrowseMenuResult:
+        """A canteen's menu filtered by category, tags, veg and price band, with facet counts."""
+        db: Session = info.context["db"]
+        query = BrowseQuery(
+            categories=tuple(filters.categories or ()),
+            tags=tuple(filters.tags or ()),
+            vegetarian=filters.vegetarian,
+            price_bands=tuple(filters.priceBands or ()),
+            available_only=filters.availableOnly,
+        ) if filters else BrowseQuery()
+        outcome = browse_menu(db, canteen_id, query, sort, limit=limit, offset=offset)
+
+        # Stock is not part of the catalog; read it for the returned page only
+        ids = [item.id for item in outcome.items]
+        stock = dict(db.execute(select(MenuItem.id, MenuItem.stock_count).where(MenuItem.id.in_(ids))).all()) if ids else {}
+        canteen = catalog.get(db).canteens_by_id.get(canteen_id)
+        return BrowseMenuResult(
+            items=[
+                _convert_catalog_item_to_type(item, canteen.name if canteen else None, stock.get(item.id) or 0)
+                for item in outcome.items
+            ],
+            total=outcome.total,
+            facets=MenuFacetsType(
+                categories=[FacetCount(value=v, count=c) for v, c in outcome.categories],
+                tags=[FacetCount(value=v, count=c) for v, c in outcome.tags],
+                priceBands=[FacetCount(value=v, count=c) for v, c in outcome.price_bands],
+                vegetarian=outcome.vegetarian,
+                nonVegetarian=outcome.non_vegetarian,
+            ),
+        )
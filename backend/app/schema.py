@@ -1,5 +1,13 @@
 import strawberry
 
+from strawberry.extensions import QueryDepthLimiter
+
+from app.helpers.metrics import ResolverTimingExtension
+from app.helpers.persisted_queries import DocumentCache
+from app.helpers.query_cost import QUERY_MAX_DEPTH, QueryCostLimiter, ignore_introspection
+from app.helpers.query_stats import QueryStatsExtension
+from app.helpers.tracing import TracingExtension
+
 from app.queries.canteen_queries import CanteenQueries
 from app.queries.cart_queries import CartQueries
 from app.queries.complaint_queries import ComplaintQueries
@@ -8,6 +16,7 @@ from app.queries.order_queries import OrderQueries
 from app.queries.payment_queries import PaymentQueries
 from app.queries.user_queries import UserQueries
 from app.queries.admin_queries import AdminQueries
+from app.queries.analytics_queries import AnalyticsQueries
 
 from app.mutations.auth_mutations import AuthMutations
 from app.mutations.cart_mutations import CartMutations
@@ -28,6 +37,7 @@ class Query(
     UserQueries,
     PaymentQueries,
     AdminQueries,
+    AnalyticsQueries,
 ):
     """
     The root query type for the GraphQL schema.
@@ -64,6 +74,23 @@ import app.models.menu_item
 import app.models.cart
 import app.models.payment
 import app.models.complaints
+import app.models.canteen_stats
 
 # The final schema object that will be used by the GraphQL router.
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# TracingExtension comes first so its spans enclose the other extensions' work (see app.helpers.tracing);
+# DocumentCache skips parsing/validation for query texts seen before (see app.helpers.persisted_queries);
+# QueryDepthLimiter and QueryCostLimiter keep single queries from monopolising the DB (see app.helpers.query_cost);
+# QueryStatsExtension names the request's SQL stats after the operation (see app.helpers.query_stats);
+# ResolverTimingExtension feeds the resolver latency histograms of /api/metrics.
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        TracingExtension,
+        DocumentCache,
+        QueryDepthLimiter(max_depth=QUERY_MAX_DEPTH, should_ignore=ignore_introspection),
+        QueryCostLimiter,
+        QueryStatsExtension,
+        ResolverTimingExtension,
+    ],
+)
@@ -0,0 +1,138 @@
+"""
+A minimal in-process ASGI client for the benchmarks.
+
+Requests go straight into the application callable: no sockets, no server and
+no HTTP client library, so what is measured is the app itself (middleware,
+GraphQL execution and the database). Only what the load test needs is
+supported: buffered request and response bodies, cookies sent as a header,
+and the lifespan protocol for startup/shutdown hooks.
+"""
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class ASGIResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def db_timing(self) -> Tuple[int, float]:
+        """(statements, db milliseconds) from the Server-Timing header, (0, 0.0) when absent."""
+        match = _SERVER_TIMING_DB.search(self.headers.get("server-timing", ""))
+        if match is None:
+            return 0, 0.0
+        return int(match.group(2)), float(match.group(1))
+
+
+class ASGIClient:
+    def __init__(self, app, host: str = "bench.local"):
+        self.app = app
+        self.host = host
+        self._lifespan: Optional[asyncio.Task] = None
+        self._lifespan_in: Optional[asyncio.Queue] = None
+        self._lifespan_out: Optional[asyncio.Queue] = None
+
+    async def __aenter__(self) -> "ASGIClient":
+        await self._lifespan_event("startup")
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._lifespan_event("shutdown")
+
+    async def _lifespan_event(self, name: str) -> None:
+        if self._lifespan is None:
+            self._lifespan_in, self._lifespan_out = asyncio.Queue(), asyncio.Queue()
+            scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+            self._lifespan = asyncio.create_task(
+                self.app(scope, self._lifespan_in.get, self._lifespan_out.put)
+            )
+        await self._lifespan_in.put({"type": f"lifespan.{name}"})
+        message = await self._lifespan_out.get()
+        if message["type"] == f"lifespan.{name}.failed":
+            raise RuntimeError(f"Application {name} failed: {message.get('message')}")
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+    ) -> ASGIResponse:
+        path, _, query_string = path.partition("?")
+        raw_headers: List[Tuple[bytes, bytes]] = [(b"host", self.host.encode())]
+        for key, value in (headers or {}).items():
+            raw_headers.append((key.lower().encode("latin-1"), value.encode("latin-1")))
+        if cookies:
+            cookie = "; ".join(f"{key}={value}" for key, value in cookies.items())
+            raw_headers.append((b"cookie", cookie.encode("latin-1")))
+        if body:
+            raw_headers.append((b"content-length", str(len(body)).encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query_string.encode(),
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": (self.host, 80),
+        }
+        request_sent = False
+        response_complete = asyncio.Event()
+        status = 500
+        response_headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal request_sent
+            if request_sent:
+                # Like a real client: disconnect only once the response is complete
+                await response_complete.wait()
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", []):
+                    name = key.decode("latin-1").lower()
+                    value = value.decode("latin-1")
+                    response_headers[name] = f"{response_headers[name]}, {value}" if name in response_headers else value
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        await self.app(scope, receive, send)
+        return ASGIResponse(status, response_headers, b"".join(chunks))
+
+    async def graphql(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        path: str = "/api/graphql",
+    ) -> ASGIResponse:
+        payload = {"query": query, "variables": variables or {}}
+        return await self.request(
+            "POST",
+            path,
+            body=json.dumps(payload).encode(),
+            headers={"content-type": "application/json", "accept": "application/json"},
+            cookies=cookies,
+        )
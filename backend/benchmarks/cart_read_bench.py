@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of the cart read pipeline (rows -> priced CartType) on a 30-line cart.
+
+Runs without a database: it feeds `build_cart_type` rows shaped like the
+single cart statement's result, so it measures the Python side only
+(customization parsing, pricing, GraphQL object construction).
+
+    cd backend && python -m benchmarks.cart_read_bench --lines 30 --repeat 2000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from app.queries.cart_queries import build_cart_type
+
+CartRow = namedtuple(
+    "CartRow",
+    "cart_id user_id created_at updated_at pickup_date pickup_time line_id menu_item_id quantity "
+    "customizations name price canteen_id options canteen_name location",
+)
+
+OPTIONS = [
+    None,
+    json.dumps({"sizes": [], "additions": [{"name": "Extra Masala", "price": 10}], "removals": [], "notes_allowed": True}),
+    json.dumps({
+        "sizes": [{"name": "Small", "price": 0}, {"name": "Large", "price": 20}],
+        "additions": [{"name": "Extra Shot", "price": 15}],
+        "removals": [],
+        "notes_allowed": False,
+    }),
+]
+CUSTOMIZATIONS = [
+    None,
+    {"notes": "Less oil"},
+    {"size": "Large", "additions": ["Extra Shot"]},
+]
+
+
+def make_rows(lines: int):
+    now = datetime.now(timezone.utc)
+    return [
+        CartRow(
+            cart_id=1, user_id="bench-user", created_at=now, updated_at=now, pickup_date=None, pickup_time=None,
+            line_id=i + 1, menu_item_id=100 + i, quantity=1 + i % 3,
+            customizations=CUSTOMIZATIONS[i % len(CUSTOMIZATIONS)],
+            name=f"Item {i}", price=50.0 + i, canteen_id=1 + i % 4,
+            options=OPTIONS[i % len(OPTIONS)], canteen_name=f"Canteen {1 + i % 4}", location="Campus",
+        )
+        for i in range(lines)
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark building a CartType from cart rows.")
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.lines)
+    build_cart_type(rows)  # warm the pricing tables
+
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        build_cart_type(rows)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+
+    def pct(p: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    print(f"cart read, {args.lines} lines x {args.repeat} runs")
+    print(f"  mean {statistics.fmean(samples):8.1f} us")
+    print(f"  p50  {pct(0.50):8.1f} us")
+    print(f"  p95  {pct(0.95):8.1f} us")
+    print(f"  p99  {pct(0.99):8.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Seeds a scaled, deterministic dataset for the load test.
+
+    cd backend && DATABASE_URL=postgresql+psycopg2://... \\
+        python -m benchmarks.dataset --canteens 8 --items 60 --users 5000 --orders 200000 --reset
+
+DATABASE_URL must point at a scratch database: `--reset` drops and recreates
+every table. The rows come from app.helpers.synthetic_data (COPY on Postgres,
+realistic time-of-day and popularity skew); this module pins the layout the
+load test relies on. After a reset, canteen ids run 1..canteens, each
+canteen's menu items are numbered consecutively (see item_id) and users are
+named by student_id/vendor_id.
+
+Every bench user shares the DEV_*_PASSWORD of their role, hashed once. The
+load test signs its own session cookies, so it never needs them; they are
+there for poking at the seeded data by hand.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, NamedTuple
+
+from app.helpers import synthetic_data
+
+PREFIX = "bench"
+
+
+class Scale(NamedTuple):
+    canteens: int = 8
+    items_per_canteen: int = 60
+    users: int = 5000
+    orders: int = 200_000
+    days: int = 90
+    seed: int = 42
+
+
+def student_id(i: int) -> str:
+    return synthetic_data.student_id(PREFIX, i)
+
+
+def vendor_id(canteen_id: int) -> str:
+    return synthetic_data.vendor_id(PREFIX, canteen_id)
+
+
+def item_id(canteen_id: int, i: int, scale: Scale) -> int:
+    return (canteen_id - 1) * scale.items_per_canteen + i + 1
+
+
+def seed(scale: Scale, reset: bool = False) -> Dict[str, int]:
+    """Writes the dataset and returns row counts per table."""
+    result = synthetic_data.generate(
+        synthetic_data.SyntheticScale(
+            canteens=scale.canteens, items_per_canteen=scale.items_per_canteen, students=scale.users,
+            orders=scale.orders, days=scale.days, seed=scale.seed,
+        ),
+        prefix=PREFIX,
+        reset=reset,
+    )
+    return {key: value for key, value in result.items() if not key.endswith("_seconds")}
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser, defaults: Scale = Scale()) -> None:
+    parser.add_argument("--canteens", type=int, default=defaults.canteens)
+    parser.add_argument("--items", type=int, default=defaults.items_per_canteen, help="Menu items per canteen.")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Student accounts.")
+    parser.add_argument("--orders", type=int, default=defaults.orders, help="Historical orders.")
+    parser.add_argument("--days", type=int, default=defaults.days, help="Days of order history.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    return Scale(args.canteens, args.items, args.users, args.orders, args.days, args.seed)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a scaled benchmark dataset (scratch databases only).")
+    add_scale_arguments(parser)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate every table first.")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = seed(scale_from_args(args), reset=args.reset)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"  {table:<20} {count:>10}")
+    print(f"✅ Seeded in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Replays lunch-rush traffic against `app.main:app` in-process and reports
+latency percentiles and SQL statements per operation.
+
+    # seed a scratch database, then run 5000 requests with 16 virtual users
+    cd backend && DATABASE_URL=postgresql+psycopg2://.../bench \\
+        python -m benchmarks.load_test --populate --reset --requests 5000 --concurrency 16
+
+    # CI: small dataset, one virtual user (deterministic statement counts),
+    # compared against a baseline report from the target branch
+    python -m benchmarks.load_test --ci --populate --reset --report head.json --baseline base.json --check
+
+Requests go through `benchmarks.asgi_client`, so the numbers cover the whole
+app (middleware, GraphQL, ORM, database) without a server or network in
+between. Statement counts come from the Server-Timing header that
+QueryStatsMiddleware adds to every response.
+
+Students pick actions from STUDENT_MIX: browse a canteen's menu, add to the
+cart, look at the cart, check out (then initiate the UPI payment over REST,
+as the frontend does), and poll their active orders. Vendors (one per canteen) poll their canteen's active orders and move the oldest one
+along pending -> confirmed -> preparing -> ready -> delivered.
+
+With --check the run fails (exit code 1) when any request errored, when an
+operation ran more statements than its STATEMENT_LIMITS ceiling (checked with
+or without a baseline), or when an operation's mean statements or p95 latency
+exceed the baseline's by more than the given tolerances.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from benchmarks.asgi_client import ASGIClient, ASGIResponse
+from benchmarks.dataset import Scale, add_scale_arguments, scale_from_args, seed, student_id, vendor_id
+
+CI_SCALE = Scale(canteens=3, items_per_canteen=30, users=200, orders=5000, days=14, seed=42)
+CI_REQUESTS = 600
+
+# Relative weights of student actions during the rush
+STUDENT_MIX = {
+    "BrowseMenu": 35,
+    "AddToCart": 20,
+    "GetCart": 10,
+    "CheckoutCart": 8,
+    "GetActiveOrders": 27,
+}
+# One vendor action (poll or status update) per this many student actions
+VENDOR_EVERY = 4
+NEXT_STATUS = {"pending": "confirmed", "confirmed": "preparing", "preparing": "ready", "ready": "delivered"}
+# Most SQL statements any single request of these operations may run: the
+# session's user lookup (AuthMiddleware) plus the handler's one read and one
+# write. The baseline comparison only catches growth, so a slow creep past
+# these would otherwise pass one tolerance at a time.
+STATEMENT_LIMITS = {
+    "AddToCart": 3,
+    "InitiatePayment": 3,
+}
+INITIATE_PAYMENT_PATH = "/api/payment/initiate"
+
+BROWSE_MENU = """
+query BrowseMenu($canteenId: Int!, $filters: BrowseMenuFilters, $sort: BrowseSort!, $offset: Int!) {
+  browseMenu(canteenId: $canteenId, filters: $filters, sort: $sort, limit: 20, offset: $offset) {
+    total
+    items { id name price category tags rating isAvailable stockCount canteenName
+      customizationOptions { sizes { name price } additions { name price } removals } }
+    facets { categories { value count } tags { value count } priceBands { value count } vegetarian nonVegetarian }
+  }
+}
+"""
+ADD_TO_CART = """
+mutation AddToCart($input: AddToCartInput!) {
+  addToCart(input: $input) { success message cartItem { id name quantity unitPrice lineTotal } }
+}
+"""
+GET_CART = """
+query GetCart($userId: String!) {
+  getCartByUserId(userId: $userId) { id subtotal tax total items { id menuItemId name quantity unitPrice lineTotal } }
+}
+"""
+CHECKOUT_CART = """
+mutation CheckoutCart($paymentMethod: String!) {
+  checkoutCart(paymentMethod: $paymentMethod, isPreOrder: false) { id status totalAmount items { itemId name quantity } }
+}
+"""
+GET_ACTIVE_ORDERS = """
+query GetActiveOrders($userId: String!) {
+  getActiveOrders(userId: $userId) { id status totalAmount orderTime items { itemId name price quantity } }
+}
+"""
+GET_CANTEEN_ACTIVE_ORDERS = """
+query GetCanteenActiveOrders($canteenId: Int!) {
+  getCanteenActiveOrders(canteenId: $canteenId) { id status orderTime totalAmount items { itemId name quantity } }
+}
+"""
+UPDATE_ORDER_STATUS = """
+mutation UpdateOrderStatus($orderId: Int!, $status: String!) {
+  updateOrderStatus(orderId: $orderId, status: $status) { id status }
+}
+"""
+
+
+def session_cookie(user_id: str, role: str) -> Dict[str, str]:
+    """An access-token cookie for `user_id`, signed the way create_and_set_tokens signs it."""
+    from app.helpers.auth_utils import _create_token
+
+    token = _create_token({"sub": user_id, "username": user_id, "role": role}, timedelta(hours=6))
+    return {"access_token": token}
+
+
+class OperationStats:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.statements: List[int] = []
+        self.errors = 0
+        self.first_error: Optional[str] = None
+
+    def record(self, response: ASGIResponse, elapsed_ms: float) -> Optional[Dict[str, Any]]:
+        self.latencies_ms.append(elapsed_ms)
+        self.statements.append(response.db_timing()[0])
+        payload = None
+        try:
+            payload = response.json()
+        except ValueError:
+            pass
+        if response.status != 200 or not isinstance(payload, dict) or payload.get("errors"):
+            self.errors += 1
+            if self.first_error is None:
+                self.first_error = f"HTTP {response.status}: {response.body[:300]!r}"
+            return None
+        return payload.get("data")
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies_ms)
+
+        def pct(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 2)
+
+        return {
+            "count": len(samples),
+            "errors": self.errors,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "mean_ms": round(statistics.fmean(samples), 2),
+            "mean_queries": round(statistics.fmean(self.statements), 2),
+            "max_queries": max(self.statements),
+        }
+
+
+class Student:
+    def __init__(self, index: int, canteen_id: int):
+        self.user_id = student_id(index)
+        self.cookies = session_cookie(self.user_id, "student")
+        self.canteen_id = canteen_id
+        self.cart_lines = 0
+
+
+class Vendor:
+    def __init__(self, canteen_id: int):
+        self.canteen_id = canteen_id
+        self.cookies = session_cookie(vendor_id(canteen_id), "vendor")
+        self.active: List[Dict[str, Any]] = []
+
+
+class LoadTest:
+    def __init__(self, client: ASGIClient, scale: Scale, rng: random.Random):
+        self.client = client
+        self.scale = scale
+        self.rng = rng
+        self.stats: Dict[str, OperationStats] = {}
+        self.record = True
+        self.vendors = [Vendor(c) for c in range(1, scale.canteens + 1)]
+        self._actions = list(STUDENT_MIX)
+        self._weights = list(STUDENT_MIX.values())
+
+    def _record(self, name: str, response: ASGIResponse, started: float) -> Optional[Dict[str, Any]]:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.stats.setdefault(name, OperationStats()) if self.record else OperationStats()
+        return stats.record(response, elapsed_ms)
+
+    async def call(self, name: str, query: str, variables: Dict[str, Any], cookies) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        response = await self.client.graphql(query, variables, cookies=cookies)
+        return self._record(name, response, started)
+
+    async def initiate_payment(self, order_id: int, cookies) -> None:
+        started = time.perf_counter()
+        response = await self.client.request(
+            "POST",
+            INITIATE_PAYMENT_PATH,
+            body=json.dumps({"order_id": order_id, "payment_method": "UPI"}).encode(),
+            headers={"content-type": "application/json"},
+            cookies=cookies,
+        )
+        self._record("InitiatePayment", response, started)
+
+    def _menu_item(self, canteen_id: int) -> int:
+        # Popular items get most of the orders
+        i = min(int(self.rng.paretovariate(1.2)) - 1, self.scale.items_per_canteen - 1)
+        return (canteen_id - 1) * self.scale.items_per_canteen + i + 1
+
+    async def student_action(self, student: Student) -> None:
+        action = self.rng.choices(self._actions, self._weights)[0]
+        if action == "CheckoutCart" and not student.cart_lines:
+            action = "AddToCart"
+
+        if action == "BrowseMenu":
+            filters = self.rng.choice([None, {"vegetarian": True}, {"categories": ["Lunch"]}, {"priceBands": ["50-100"]}])
+            await self.call(action, BROWSE_MENU, {
+                "canteenId": student.canteen_id, "filters": filters,
+                "sort": self.rng.choice(["POPULAR", "PRICE_ASC", "RATING"]), "offset": self.rng.choice([0, 0, 20]),
+            }, student.cookies)
+        elif action == "AddToCart":
+            data = await self.call(action, ADD_TO_CART, {
+                "input": {"menuItemId": self._menu_item(student.canteen_id), "quantity": self.rng.randint(1, 2)},
+            }, student.cookies)
+            if data:
+                student.cart_lines += 1
+        elif action == "GetCart":
+            await self.call(action, GET_CART, {"userId": student.user_id}, student.cookies)
+        elif action == "CheckoutCart":
+            data = await self.call(action, CHECKOUT_CART, {"paymentMethod": "UPI"}, student.cookies)
+            if data:
+                await self.initiate_payment(data["checkoutCart"]["id"], student.cookies)
+                student.cart_lines = 0
+                # Next visit may be to another canteen (carts hold one canteen at a time)
+                student.canteen_id = self.rng.randint(1, self.scale.canteens)
+        else:
+            await self.call(action, GET_ACTIVE_ORDERS, {"userId": student.user_id}, student.cookies)
+
+    async def vendor_action(self, vendor: Vendor) -> None:
+        if not vendor.active:
+            data = await self.call(
+                "GetCanteenActiveOrders", GET_CANTEEN_ACTIVE_ORDERS, {"canteenId": vendor.canteen_id}, vendor.cookies
+            )
+            orders = (data or {}).get("getCanteenActiveOrders") or []
+            vendor.active = sorted(orders, key=lambda o: o["id"])
+            return
+        order = vendor.active.pop(0)
+        status = NEXT_STATUS.get(order["status"])
+        if status:
+            await self.call("UpdateOrderStatus", UPDATE_ORDER_STATUS, {"orderId": order["id"], "status": status}, vendor.cookies)
+
+    async def run(self, requests: int, concurrency: int) -> None:
+        remaining = requests
+
+        async def virtual_user(index: int) -> None:
+            nonlocal remaining
+            student = Student(self.rng.randrange(self.scale.users), self.rng.randint(1, self.scale.canteens))
+            while remaining > 0:
+                remaining -= 1
+                if remaining % VENDOR_EVERY == 0:
+                    await self.vendor_action(self.vendors[remaining % len(self.vendors)])
+                else:
+                    await self.student_action(student)
+
+        await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], query_tolerance: float, latency_tolerance: float) -> List[str]:
+    """Regressions of `report` against `baseline` and STATEMENT_LIMITS, as human-readable lines."""
+    problems = []
+    for name, current in sorted(report["operations"].items()):
+        if current["errors"]:
+            problems.append(f"{name}: {current['errors']} failed requests")
+        limit = STATEMENT_LIMITS.get(name)
+        if limit is not None and current["max_queries"] > limit:
+            problems.append(f"{name}: up to {current['max_queries']} statements/op, limit {limit}")
+        before = baseline.get("operations", {}).get(name)
+        if before is None:
+            continue
+        query_limit = before["mean_queries"] * (1 + query_tolerance)
+        if current["mean_queries"] > query_limit + 1e-9:
+            problems.append(
+                f"{name}: {current['mean_queries']} statements/op, baseline {before['mean_queries']}"
+            )
+        latency_limit = before["p95_ms"] * (1 + latency_tolerance)
+        if current["p95_ms"] > latency_limit:
+            problems.append(f"{name}: p95 {current['p95_ms']} ms, baseline {before['p95_ms']} ms")
+    return problems
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}, {report['seconds']:.1f}s")
+    print(f"{'operation':<24}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/op':>7}{'max q':>7}")
+    for name, s in sorted(report["operations"].items()):
+        print(
+            f"{name:<24}{s['count']:>7}{s['errors']:>5}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}"
+            f"{s['p99_ms']:>9.2f}{s['mean_queries']:>7.1f}{s['max_queries']:>7}"
+        )
+
+
+async def run_load_test(scale: Scale, requests: int, concurrency: int, warmup: int, rng_seed: int) -> Dict[str, Any]:
+    # Imported here so seeding can create the schema first
+    from app.main import app
+
+    rng = random.Random(rng_seed)
+    async with ASGIClient(app) as client:
+        test = LoadTest(client, scale, rng)
+        test.record = False
+        await test.run(warmup, concurrency)
+        test.record = True
+        started = time.perf_counter()
+        await test.run(requests, concurrency)
+        seconds = time.perf_counter() - started
+
+    for name, stats in test.stats.items():
+        if stats.first_error:
+            print(f"⚠️ {name} failed: {stats.first_error}", file=sys.stderr)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "scale": scale._asdict(),
+        "python": platform.python_version(),
+        "operations": {name: stats.summary() for name, stats in test.stats.items()},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay lunch-rush GraphQL traffic in-process.")
+    add_scale_arguments(parser)
+    parser.add_argument("--ci", action="store_true", help="Small, deterministic preset for CI (overrides scale and load).")
+    parser.add_argument("--populate", action="store_true", help="Seed the dataset before running.")
+    parser.add_argument("--reset", action="store_true", help="With --populate: drop and recreate every table first.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=200, help="Unrecorded requests that warm caches first.")
+    parser.add_argument("--report", help="Write the JSON report here.")
+    parser.add_argument("--baseline", help="JSON report to compare against.")
+    parser.add_argument("--check", action="store_true", help="Exit 1 on errors, statement limits or regressions against --baseline.")
+    parser.add_argument("--query-tolerance", type=float, default=0.1, help="Allowed growth in mean statements/op.")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="Allowed growth in p95 latency.")
+    args = parser.parse_args(argv)
+
+    scale = scale_from_args(args)
+    if args.ci:
+        scale = CI_SCALE
+        args.requests, args.concurrency, args.warmup = CI_REQUESTS, 1, 60
+
+    if args.populate:
+        print("Seeding dataset...")
+        for table, count in seed(scale, reset=args.reset).items():
+            print(f"  {table:<20} {count:>10}")
+
+    report = asyncio.run(run_load_test(scale, args.requests, args.concurrency, args.warmup, scale.seed))
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if not args.check:
+        return 0
+    baseline = {}
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}; checking for errors and statement limits only.")
+    problems = compare(report, baseline, args.query_tolerance, args.latency_tolerance)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print("✅ No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-import { ApolloClient, InMemoryCache, ApolloProvider } from '@apollo/client';
+import { ApolloClient, InMemoryCache, ApolloProvider, HttpLink } from '@apollo/client';
+import { createPersistedQueryLink } from '@apollo/client/link/persisted-queries';
 
 // Get API URL from environment variables
 // Vite exposes env variables that start with VITE_ prefix
@@ -9,10 +10,24 @@ const GRAPHQL_ENDPOINT = import.meta.env.VITE_GRAPHQL_ENDPOINT || '/api/graphql'
 // If API_URL is empty, it will use relative path (useful when served from same origin)
 const graphqlUri = API_URL ? `${API_URL}${GRAPHQL_ENDPOINT}` : GRAPHQL_ENDPOINT;
 
-const client = new ApolloClient({
+// Automatic persisted queries: send only the query's sha256 and fall back to
+// the full text the first time the server hasn't seen it. Web Crypto is only
+// available in secure contexts, so plain-http deployments send full queries.
+const sha256 = async (query) => {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query));
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+};
+
+const httpLink = new HttpLink({
     uri: graphqlUri,
-    cache: new InMemoryCache(),
     credentials: 'include', // Include cookies for authentication
+});
+
+const link = globalThis.crypto?.subtle ? createPersistedQueryLink({ sha256 }).concat(httpLink) : httpLink;
+
+const client = new ApolloClient({
+    link,
+    cache: new InMemoryCache(),
     defaultOptions: {
         watchQuery: {
             fetchPolicy: 'cache-and-network',
@@ -73,4 +73,39 @@ mutation ClearCart {
     message
   }
 }
-`;
\ No newline at end of file
+`;
+/**
+ * Mutation to apply several cart edits (adds, quantity updates, removals)
+ * in one request; returns the final cart once
+ */
+export const APPLY_CART_OPERATIONS = gql`
+mutation ApplyCartOperations($ops: [CartOp!]!) {
+  applyCartOperations(ops: $ops) {
+    success
+    message
+    appliedCount
+    coalescedOps
+    cart {
+      id
+      subtotal
+      tax
+      total
+      items {
+        id
+        menuItemId
+        name
+        price
+        quantity
+        unitPrice
+        lineTotal
+        customizations {
+          size
+          additions
+          removals
+          notes
+        }
+      }
+    }
+  }
+}
+`;
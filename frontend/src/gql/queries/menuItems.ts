@@ -104,3 +104,67 @@ export const SEARCH_MENU_ITEMS = gql`
     }
   }
 `;
+
+export const BROWSE_MENU = gql`
+  query BrowseMenu($canteenId: Int!, $filters: BrowseMenuFilters, $sort: BrowseSort, $limit: Int, $offset: Int) {
+    browseMenu(canteenId: $canteenId, filters: $filters, sort: $sort, limit: $limit, offset: $offset) {
+      total
+      items {
+        id
+        canteenId
+        canteenName
+        name
+        description
+        price
+        category
+        image
+        tags
+        rating
+        ratingCount
+        isAvailable
+        isPopular
+        preparationTime
+        customizationOptions {
+          sizes {
+            name
+            price
+          }
+          additions {
+            name
+            price
+          }
+          removals
+        }
+        stockCount
+      }
+      facets {
+        categories {
+          value
+          count
+        }
+        tags {
+          value
+          count
+        }
+        priceBands {
+          value
+          count
+        }
+        vegetarian
+        nonVegetarian
+      }
+    }
+  }
+`;
+
+export const SUGGEST = gql`
+  query Suggest($prefix: String!, $limit: Int) {
+    suggest(prefix: $prefix, limit: $limit) {
+      text
+      kind
+      menuItemId
+      canteenId
+      canteenName
+    }
+  }
+`;